@@ -34,6 +34,12 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'system.middleware.MetricsMiddleware',
+    'system.middleware.TracingMiddleware',
+    'system.middleware.RequestCaptureMiddleware',
+    'system.middleware.CompressionMiddleware',
+    'system.middleware.ProfilingMiddleware',
+    'system.middleware.QueryContextMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -64,7 +70,16 @@ WSGI_APPLICATION = 'config.wsgi.application'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'system.authentication.JWTAuthentication',
+    ),
+    'DEFAULT_RENDERER_CLASSES': (
+        'system.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'system.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
     ),
     'EXCEPTION_HANDLER': 'system.exceptions.custom_exception_handler',
     'DEFAULT_PAGINATION_CLASS': 'system.pagination.StandardPagination',
@@ -72,6 +87,89 @@ REST_FRAMEWORK = {
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
 }
 
+# 响应压缩：小于该字节数的响应不压缩
+COMPRESSION_MIN_SIZE = 1024
+
+# 批量接口：单次最多子请求数、并发执行读请求的线程数
+BATCH_MAX_REQUESTS = 20
+BATCH_MAX_WORKERS = 4
+
+# 缓存：模型写版本（ETag）与列表响应缓存都存于默认缓存。默认的 LocMemCache 为进程内缓存，多 worker 部署时
+# 一个进程的写入无法使其他进程的缓存失效，需改为共享后端（如 Redis、Memcached）；使用进程内缓存时，
+# 列表响应缓存（视图集的 list_cache_timeout）与 ETag 304 仅在 CACHE_SINGLE_PROCESS 为 True（单进程运行，如 runserver）时启用
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+CACHE_SINGLE_PROCESS = DEBUG
+
+# 操作日志（sys_oper_log）：异步批量写入的队列容量、每批条数、最长等待毫秒数，以及参数截断长度
+OPER_LOG_ENABLED = True
+OPER_LOG_QUEUE_SIZE = 10000
+OPER_LOG_BATCH_SIZE = 200
+OPER_LOG_FLUSH_INTERVAL_MS = 500
+OPER_LOG_PARAM_MAX_LENGTH = 2000
+
+# 登录日志（sys_logininfor）：异步批量写入参数，含义同上
+LOGIN_LOG_QUEUE_SIZE = 10000
+LOGIN_LOG_BATCH_SIZE = 200
+LOGIN_LOG_FLUSH_INTERVAL_MS = 500
+
+# 审计数据（操作/登录日志按月分区）所在数据库别名，以及保留月数（prune_audit_logs 删除更早的分区）
+DATABASE_ROUTERS = ['system.routers.AuditRouter']
+AUDIT_DATABASE = 'default'
+AUDIT_RETENTION_MONTHS = 12
+
+# 请求剖析（Server-Timing 与 N+1 检测），默认关闭；开启后最近请求的剖析结果保存在环形缓冲中
+REQUEST_PROFILING = False
+REQUEST_PROFILING_NPLUSONE_THRESHOLD = 5
+REQUEST_PROFILING_BUFFER_SIZE = 200
+
+# 慢 SQL：超过该毫秒数的语句记日志并按指纹聚合（None 关闭），聚合结果每隔 SLOW_QUERY_DUMP_INTERVAL 秒输出一次
+SLOW_QUERY_MS = 200
+SLOW_QUERY_DUMP_INTERVAL = 300
+SLOW_QUERY_MAX_FINGERPRINTS = 500
+
+# 指标（GET /metrics，Prometheus 文本格式）：管理员或携带 METRICS_TOKEN（X-Metrics-Token 头或 ?token=）可访问；
+# 多 worker 部署时 METRICS_DIR 设为各进程共享的目录，各进程每隔 METRICS_FLUSH_INTERVAL 秒写入快照供汇总
+METRICS_ENABLED = True
+METRICS_TOKEN = None
+METRICS_DIR = None
+METRICS_FLUSH_INTERVAL = 15
+METRICS_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# 请求追踪，默认关闭：按 TRACING_SAMPLE_RATE 采样，耗时达到 TRACING_SLOW_MS 的请求总是导出；
+# trace 以 OTLP/JSON 每行一条追加到 TRACING_EXPORT_FILE，超过 TRACING_EXPORT_MAX_BYTES 轮转
+TRACING_ENABLED = False
+TRACING_SAMPLE_RATE = 0.01
+TRACING_SLOW_MS = 1000
+TRACING_MAX_SPANS = 1000
+TRACING_SERVICE_NAME = 'web-hrms'
+TRACING_EXPORT_FILE = BASE_DIR / 'logs' / 'traces.jsonl'
+TRACING_EXPORT_MAX_BYTES = 50 * 1024 * 1024
+TRACING_EXPORT_BACKUP_COUNT = 5
+TRACING_EXPORT_QUEUE_SIZE = 10000
+
+# 按需剖析：管理员经 /monitor/captures/sign 签发令牌（REQUEST_CAPTURE_TOKEN_MAX_AGE 秒内有效），携带令牌的请求
+# 在 cProfile + tracemalloc 下执行，结果保存到 REQUEST_CAPTURE_DIR，仅保留最近 REQUEST_CAPTURE_MAX_FILES 次
+REQUEST_CAPTURE_ENABLED = True
+REQUEST_CAPTURE_DIR = BASE_DIR / 'logs' / 'captures'
+REQUEST_CAPTURE_TOKEN_MAX_AGE = 600
+REQUEST_CAPTURE_MAX_FILES = 50
+REQUEST_CAPTURE_TOP = 30
+REQUEST_CAPTURE_TRACEMALLOC_FRAMES = 10
+
+# 服务监控（/monitor/server）：该秒数内的重复轮询复用上次采样结果
+SERVER_MONITOR_CACHE_SECONDS = 2
+
+# 接口异常：按指纹聚合计数（最多 ERROR_TELEMETRY_MAX_GROUPS 组，/monitor/errors 查看）；服务端错误及按比例采样的
+# 客户端错误保留完整堆栈，经异步队列（ERROR_TELEMETRY_QUEUE_SIZE）写日志
+ERROR_TELEMETRY_MAX_GROUPS = 500
+ERROR_TELEMETRY_RECENT_SIZE = 200
+ERROR_TELEMETRY_CLIENT_SAMPLE_RATE = 0.01
+ERROR_TELEMETRY_QUEUE_SIZE = 1000
+
 # JWT settings
 from datetime import timedelta
 SIMPLE_JWT = {
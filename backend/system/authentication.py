@@ -0,0 +1,10 @@
+from rest_framework_simplejwt.authentication import JWTAuthentication as BaseJWTAuthentication
+
+from .tracing import span
+
+
+class JWTAuthentication(BaseJWTAuthentication):
+    """simplejwt 认证，追踪中的请求把认证（含用户查询）记为 auth span。"""
+    def authenticate(self, request):
+        with span('auth.JWTAuthentication'):
+            return super().authenticate(request)
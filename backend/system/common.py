@@ -1,8 +1,73 @@
 import functools
+import hashlib
+import json
 import logging
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.cache import get_conditional_response
+
+from .logwriter import build_writer
+from .models import LoginInfor, OperLog
+from .partitions import login_log_partitions, oper_log_partitions
+
+
+# 操作日志中需脱敏的请求参数
+SENSITIVE_PARAMS = frozenset({'password', 'oldPassword', 'newPassword', 'confirmPassword'})
+
+
+@functools.lru_cache(maxsize=None)
+def get_oper_log_writer():
+    return build_writer(OperLog, 'OPER_LOG', sink=oper_log_partitions.bulk_create)
+
+
+@functools.lru_cache(maxsize=None)
+def get_login_log_writer():
+    return build_writer(LoginInfor, 'LOGIN_LOG', sink=login_log_partitions.bulk_create)
+
+
+def client_ip(request):
+    forwarded = request.META.get('HTTP_X_FORWARDED_FOR')
+    if forwarded:
+        return forwarded.split(',')[0].strip()
+    return request.META.get('REMOTE_ADDR', '') or ''
+
+
+def oper_params(request):
+    """请求参数摘要：脱敏后序列化为 JSON 并按 OPER_LOG_PARAM_MAX_LENGTH 截断。"""
+    try:
+        data = request.query_params if request.method in ('GET', 'HEAD', 'DELETE') else request.data
+        if hasattr(data, 'dict'):
+            data = data.dict()
+        if isinstance(data, dict):
+            data = {k: ('******' if k in SENSITIVE_PARAMS else v) for k, v in data.items()}
+        text = json.dumps(data, ensure_ascii=False, default=str)
+    except Exception:
+        return ''
+    return text[:getattr(settings, 'OPER_LOG_PARAM_MAX_LENGTH', 2000)]
+
+
+def record_login(request, user_name, success, msg=''):
+    """记录一次登录事件（成功/失败），经异步批量写入器写入 sys_logininfor。"""
+    try:
+        get_login_log_writer().submit(LoginInfor(
+            user_name=str(user_name or '')[:64],
+            ipaddr=client_ip(request)[:128],
+            user_agent=request.META.get('HTTP_USER_AGENT', '')[:255],
+            status='0' if success else '1',
+            msg=msg[:255],
+        ))
+    except Exception:
+        pass
 
 
 def audit_log(func):
+    """
+    操作审计：记录操作人、请求、视图动作、响应状态与耗时。
+    记录只放入异步批量写入器的队列（见 system.logwriter），由后台线程批量写入 sys_oper_log，请求线程不访问数据库。
+    """
     @functools.wraps(func)
     def wrapper(self, request, *args, **kwargs):
         try:
@@ -10,10 +75,114 @@ def audit_log(func):
             logging.getLogger().info(f"{getattr(user, 'username', 'anonymous')} {request.method} {request.path}")
         except Exception:
             pass
-        return func(self, request, *args, **kwargs)
+        if not getattr(settings, 'OPER_LOG_ENABLED', True):
+            return func(self, request, *args, **kwargs)
+        start = time.perf_counter()
+        status_code = 500
+        try:
+            response = func(self, request, *args, **kwargs)
+            status_code = getattr(response, 'status_code', 200)
+            return response
+        except Exception as exc:
+            status_code = getattr(exc, 'status_code', 500)
+            raise
+        finally:
+            try:
+                user = getattr(request, 'user', None)
+                get_oper_log_writer().submit(OperLog(
+                    oper_name=(getattr(user, 'username', '') or '')[:64],
+                    request_method=request.method,
+                    oper_url=request.path[:255],
+                    method=f"{type(self).__name__}.{getattr(self, 'action', None) or func.__name__}"[:100],
+                    oper_ip=client_ip(request)[:128],
+                    oper_param=oper_params(request),
+                    status=status_code,
+                    cost_time=int((time.perf_counter() - start) * 1000),
+                ))
+            except Exception:
+                pass
     return wrapper
 
 
+# 进程内缓存后端：多 worker 部署时各进程各有一份，写版本递增无法使其他进程的缓存失效
+LOCAL_CACHE_BACKENDS = frozenset({
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+})
+
+
+def shared_cache_configured() -> bool:
+    """默认缓存是否为进程间共享的后端（Redis、Memcached、数据库、文件等）。"""
+    backend = settings.CACHES.get('default', {}).get('BACKEND', '')
+    return backend not in LOCAL_CACHE_BACKENDS
+
+
+def version_cache_usable() -> bool:
+    """
+    基于模型写版本的列表缓存与 ETag 是否可用：版本放在默认缓存中，只有共享后端或单进程运行
+    （settings.CACHE_SINGLE_PROCESS）时，任意写入才能及时使所有进程的缓存与 ETag 失效。
+    """
+    return shared_cache_configured() or getattr(settings, 'CACHE_SINGLE_PROCESS', False)
+
+
+def _version_seed() -> int:
+    # 以毫秒时间戳作为版本初始值：缓存被清空（如 refreshCache 调用 cache.clear()）后版本不会回到旧值，
+    # 客户端持有的旧 ETag 不会误命中
+    return int(time.time() * 1000)
+
+
+def get_cache_version(name: str) -> int:
+    """读取命名版本戳（不存在时以当前时间戳初始化），用于缓存键与 ETag 派生。"""
+    key = f'version:{name}'
+    version = cache.get(key)
+    if version is None:
+        seed = _version_seed()
+        cache.add(key, seed, timeout=None)
+        version = cache.get(key, seed)
+    return version
+
+
+def bump_cache_version(name: str) -> int:
+    """递增命名版本戳，使依赖该版本的缓存整体失效。"""
+    key = f'version:{name}'
+    try:
+        return cache.incr(key)
+    except ValueError:
+        seed = _version_seed()
+        cache.set(key, seed, timeout=None)
+        return seed
+
+
+def model_version(model) -> int:
+    """模型写版本：该模型任意写入后递增，用于派生 ETag 与缓存键。"""
+    return get_cache_version(f'model:{model._meta.db_table}')
+
+
+def bump_model_version(*models):
+    """
+    在事务提交后递增模型写版本。实例 save() 由 system.signals 自动处理；
+    批量 update()/bulk_create()/delete() 及原生 SQL 写入不触发 post_save，需显式调用。
+    """
+    for model in models:
+        transaction.on_commit(functools.partial(bump_cache_version, f'model:{model._meta.db_table}'))
+
+
+def version_etag(*parts) -> str:
+    """由版本戳等组成部分派生强 ETag。"""
+    digest = hashlib.sha1('|'.join(str(p) for p in parts).encode()).hexdigest()
+    return f'"{digest}"'
+
+
+def not_modified(request, etag):
+    """If-None-Match 命中时返回带 ETag 的 304 响应，否则返回 None（写版本不可靠时总是返回 None）。"""
+    if not version_cache_usable():
+        return None
+    response = get_conditional_response(request, etag=etag)
+    if response is not None:
+        response['ETag'] = etag
+    return response
+
+
 def camel_to_snake(name: str) -> str:
     out = []
     for ch in name:
@@ -0,0 +1,130 @@
+import secrets
+import zlib
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_string
+
+from .renderers import FastJSONRenderer
+
+try:
+    import brotli
+except ImportError:  # 未安装 brotli 时仅协商 gzip
+    brotli = None
+
+
+def get_min_size():
+    return getattr(settings, 'COMPRESSION_MIN_SIZE', 1024)
+
+
+def accepted_encoding(request):
+    """按 Accept-Encoding 协商压缩算法：优先 br（需安装 brotli），其次 gzip；q=0 视为拒绝。"""
+    header = request.META.get('HTTP_ACCEPT_ENCODING', '')
+    accepted = {}
+    for part in header.split(','):
+        name, _, params = part.partition(';')
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name.strip().lower()] = q
+    if brotli is not None and accepted.get('br', 0) > 0:
+        return 'br'
+    if accepted.get('gzip', 0) > 0:
+        return 'gzip'
+    return None
+
+
+def _brotli_padding(max_random_bytes):
+    """
+    随机长度（1~min(max_random_bytes, 256) 字节）的 brotli 元数据块，解码器会跳过其内容。
+    块头：ISLAST=0、MNIBBLES=0（编码为 3）、保留位 0、MSKIPBYTES=1，随后 8 位 MSKIPLEN-1，按字节补齐。
+    """
+    length = secrets.randbelow(min(max_random_bytes, 256)) + 1
+    skip = length - 1
+    header = bytes([(3 << 1) | (1 << 4) | ((skip & 0x3) << 6), skip >> 2])
+    return header + secrets.token_bytes(length)
+
+
+def compress_body(body, encoding, max_random_bytes=None):
+    """
+    压缩响应体。max_random_bytes 为缓解 BREACH 的随机长度填充：gzip 沿用 Django 的随机文件名头，
+    br 在流头部刷新（按字节对齐）后插入等效的随机长度元数据块。
+    """
+    if encoding == 'br':
+        if not max_random_bytes:
+            return brotli.compress(body)
+        compressor = brotli.Compressor()
+        head = compressor.process(b'') + compressor.flush()
+        return head + _brotli_padding(max_random_bytes) + compressor.process(body) + compressor.finish()
+    return compress_string(body, max_random_bytes=max_random_bytes)
+
+
+class StreamCompressor:
+    """流式响应的增量压缩器，每个分块后同步刷新，保证客户端能及时收到数据。"""
+    def __init__(self, encoding):
+        self.encoding = encoding
+        if encoding == 'br':
+            self._compressor = brotli.Compressor()
+        else:
+            self._compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, chunk):
+        if self.encoding == 'br':
+            return self._compressor.process(chunk) + self._compressor.flush()
+        return self._compressor.compress(chunk) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        if self.encoding == 'br':
+            return self._compressor.finish()
+        return self._compressor.flush()
+
+    def wrap(self, iterator):
+        for chunk in iterator:
+            data = self.compress(chunk)
+            if data:
+                yield data
+        yield self.finish()
+
+    async def awrap(self, iterator):
+        async for chunk in iterator:
+            data = self.compress(chunk)
+            if data:
+                yield data
+        yield self.finish()
+
+
+class CachedPayload:
+    """
+    缓存中的响应载荷：保存原始数据，同时保存渲染好的统一响应包（{code, msg, data}）
+    及其 gzip/br 压缩结果。命中缓存时按 Accept-Encoding 直接返回对应字节，不再重复渲染和压缩。
+    传入 envelope 时按该完整响应体渲染（如分页列表的 {code, msg, rows, total}）。
+    """
+    def __init__(self, data=None, msg='操作成功', version=None, envelope=None):
+        self.data = data
+        self.version = version
+        if envelope is None:
+            envelope = {'code': 200, 'msg': msg, 'data': data}
+        body = FastJSONRenderer().render(envelope)
+        self.encoded = {None: body}
+        if len(body) >= get_min_size():
+            self.encoded['gzip'] = compress_body(body, 'gzip')
+            if brotli is not None:
+                self.encoded['br'] = compress_body(body, 'br')
+
+    def response(self, request, etag=None):
+        encoding = accepted_encoding(request)
+        if encoding not in self.encoded:
+            encoding = None
+        response = HttpResponse(self.encoded[encoding], content_type='application/json')
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        if etag:
+            # 压缩表示与原始表示字节不同，按 RFC 9110 使用弱 ETag
+            response.headers['ETag'] = f'W/{etag}' if encoding else etag
+        patch_vary_headers(response, ('Accept-Encoding',))
+        return response
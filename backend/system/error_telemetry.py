@@ -0,0 +1,200 @@
+import collections
+import hashlib
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import threading
+import time
+import traceback
+
+from django.conf import settings
+from django.db.models import ProtectedError, RestrictedError
+
+from . import metrics
+
+logger = logging.getLogger('system.errors')
+
+CLIENT = 'client'
+SERVER = 'server'
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """队列满时丢弃日志并计数，不阻塞也不向 stderr 报错。"""
+    dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_listener = None
+_listener_pid = None
+_listener_lock = threading.Lock()
+
+
+def ensure_error_logging():
+    """
+    异常日志的异步输出：请求线程只把日志记录放入有界队列，由 QueueListener 线程写到 stderr；
+    fork 后的子进程重新建立队列与线程。logger 已另行配置处理器（如 settings.LOGGING）时沿用其配置。
+    """
+    global _listener, _listener_pid
+    if _listener_pid == os.getpid():
+        return
+    with _listener_lock:
+        if _listener_pid == os.getpid():
+            return
+        if _listener is None and logger.handlers:
+            _listener_pid = os.getpid()
+            return
+        for old in list(logger.handlers):
+            if isinstance(old, DroppingQueueHandler):
+                logger.removeHandler(old)
+        handler = DroppingQueueHandler(queue.Queue(getattr(settings, 'ERROR_TELEMETRY_QUEUE_SIZE', 1000)))
+        target = logging.StreamHandler(sys.stderr)
+        target.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(name)s %(message)s'))
+        _listener = logging.handlers.QueueListener(handler.queue, target)
+        _listener.start()
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+        _listener_pid = os.getpid()
+
+
+def view_name(context):
+    view = (context or {}).get('view')
+    if view is None:
+        return '-'
+    action = getattr(view, 'action', None)
+    request = (context or {}).get('request')
+    method = getattr(request, 'method', '').lower()
+    return f'{type(view).__name__}.{action or method}'
+
+
+def classify(exc, status_code):
+    """客户端错误（4xx、校验失败、删除受保护数据）或服务端错误（5xx 及其他未处理异常）。"""
+    if status_code < 500 or isinstance(exc, (ProtectedError, RestrictedError)):
+        return CLIENT
+    return SERVER
+
+
+def origin_frame(exc):
+    """异常在项目代码中的最内层调用位置（file:line:function），用于区分同类型的不同服务端错误。"""
+    base = str(settings.BASE_DIR)
+    frames = traceback.extract_tb(exc.__traceback__)
+    for frame in reversed(frames):
+        if frame.filename.startswith(base) and 'site-packages' not in frame.filename:
+            return f'{os.path.relpath(frame.filename, base)}:{frame.lineno}:{frame.name}'
+    if frames:
+        frame = frames[-1]
+        return f'{frame.filename}:{frame.lineno}:{frame.name}'
+    return ''
+
+
+def fingerprint(kind, exc, view, status_code):
+    parts = [kind, type(exc).__name__, view, str(status_code)]
+    if kind == SERVER:
+        parts.append(origin_frame(exc))
+    return hashlib.sha1('|'.join(parts).encode()).hexdigest()[:12]
+
+
+class ErrorGroups:
+    """
+    按指纹聚合的异常分组（次数、首次/最近时间、最近一次消息与保留的堆栈），按最近出现排序，
+    超过 max_groups 时淘汰最久未出现的分组；另保留最近 recent_size 次异常事件。
+    """
+    def __init__(self, max_groups=500, recent_size=200):
+        self.max_groups = max_groups
+        self._groups = collections.OrderedDict()
+        self._recent = collections.deque(maxlen=recent_size)
+        self._evicted = 0
+        self._since = time.time()
+        self._lock = threading.Lock()
+
+    def record(self, key, event, trace=None):
+        now = event['time']
+        with self._lock:
+            group = self._groups.pop(key, None)
+            if group is None:
+                group = {
+                    'fingerprint': key, 'kind': event['kind'], 'type': event['type'], 'view': event['view'],
+                    'status': event['status'], 'count': 0, 'firstSeen': now, 'traceback': None,
+                }
+                if len(self._groups) >= self.max_groups:
+                    self._groups.popitem(last=False)
+                    self._evicted += 1
+            group['count'] += 1
+            group['lastSeen'] = now
+            group['message'] = event['message']
+            group['path'] = event['path']
+            if trace:
+                group['traceback'] = trace
+            self._groups[key] = group
+            self._recent.append(dict(event, fingerprint=key))
+
+    def snapshot(self, kind=None):
+        """按次数降序的分组列表（不含堆栈）及最近事件（新→旧）。"""
+        with self._lock:
+            groups = [dict(g) for g in self._groups.values() if kind in (None, g['kind'])]
+            recent = [e for e in reversed(self._recent) if kind in (None, e['kind'])]
+            result = {'since': self._since, 'evicted': self._evicted}
+        for group in groups:
+            group['hasTraceback'] = bool(group.pop('traceback'))
+        groups.sort(key=lambda g: g['count'], reverse=True)
+        result.update(groups=groups, recent=recent)
+        return result
+
+    def get(self, key):
+        with self._lock:
+            group = self._groups.get(key)
+            return dict(group) if group else None
+
+    def clear(self):
+        with self._lock:
+            self._groups.clear()
+            self._recent.clear()
+            self._evicted = 0
+            self._since = time.time()
+
+
+error_groups = ErrorGroups(
+    getattr(settings, 'ERROR_TELEMETRY_MAX_GROUPS', 500),
+    getattr(settings, 'ERROR_TELEMETRY_RECENT_SIZE', 200),
+)
+
+
+def record_exception(exc, context, status_code, message):
+    """
+    记录一次接口异常：分类、计数并按指纹归组；服务端错误及按 ERROR_TELEMETRY_CLIENT_SAMPLE_RATE
+    采样到的客户端错误保留完整堆栈并经异步日志输出，其余只计数。
+    """
+    kind = classify(exc, status_code)
+    view = view_name(context)
+    key = fingerprint(kind, exc, view, status_code)
+    request = (context or {}).get('request')
+    event = {
+        'time': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'kind': kind,
+        'type': type(exc).__name__,
+        'view': view,
+        'status': status_code,
+        'method': getattr(request, 'method', ''),
+        'path': getattr(request, 'path', ''),
+        'user': getattr(getattr(request, 'user', None), 'username', '') or '',
+        'message': str(message)[:500],
+    }
+    trace = None
+    rate = getattr(settings, 'ERROR_TELEMETRY_CLIENT_SAMPLE_RATE', 0.01)
+    if kind == SERVER or (rate > 0 and random.random() < rate):
+        trace = ''.join(traceback.format_exception(exc))
+        ensure_error_logging()
+        log = logger.error if kind == SERVER else logger.info
+        log('%s 异常 %s %s %s %s [%s]\n%s', kind, event['method'], event['path'], view, event['type'], key, trace)
+    error_groups.record(key, event, trace)
+    if getattr(settings, 'METRICS_ENABLED', False):
+        metrics.registry.inc('app_errors_total', (('kind', kind), ('status', str(status_code))))
+    return key
@@ -4,7 +4,7 @@ from rest_framework import status
 from django.db.models import ProtectedError, RestrictedError
 from django.db.utils import DatabaseError
 
-import traceback
+from .error_telemetry import record_exception
 
 
 
@@ -34,12 +34,12 @@ def custom_exception_handler(exc, context):
     Custom DRF exception handler that wraps all errors with {code, message}.
     """
     response = exception_handler(exc, context)
-    traceback.print_exc()
     if response is not None:
         message = _first_error_message(response.data)
         # Fallback when message is empty
         if not message:
             message = '请求错误'
+        record_exception(exc, context, response.status_code, message)
         response.data = {
             'code': response.status_code,
             'message': message,
@@ -54,5 +54,6 @@ def custom_exception_handler(exc, context):
         msg = "接口服务器异常,请联系管理员" + str(exc)
     elif isinstance(exc, Exception):
         msg = str(exc)
+    record_exception(exc, context, status.HTTP_500_INTERNAL_SERVER_ERROR, msg)
     # Non-DRF or unhandled exceptions → 500
     return Response({'code': status.HTTP_500_INTERNAL_SERVER_ERROR, 'message': msg}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
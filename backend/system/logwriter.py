@@ -0,0 +1,123 @@
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+
+from django.conf import settings
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncBatchWriter:
+    """
+    异步批量写入器：请求线程只把待写模型实例放入有界队列（put_nowait，微秒级），
+    后台守护线程每攒够 batch_size 条或等待满 flush_interval 毫秒即以一次 bulk_create 落库。
+
+    - 背压：队列满时直接丢弃新记录并计数，不阻塞请求线程；
+    - 计数：submitted/written/dropped/failed/flushes，可由 stats() 读取；
+    - 后台线程惰性启动，并在 fork 后的子进程中重新启动；进程退出时尽量刷出剩余记录。
+    """
+    def __init__(self, model, queue_size=10000, batch_size=200, flush_interval=500, sink=None):
+        self.model = model
+        # 实际落库函数，默认 model.objects.bulk_create；分区表传入 PartitionedTable.bulk_create
+        self.sink = sink or model.objects.bulk_create
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval / 1000
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.counters = {'submitted': 0, 'written': 0, 'dropped': 0, 'failed': 0, 'flushes': 0}
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        atexit.register(self.flush)
+
+    def submit(self, obj):
+        self._ensure_started()
+        try:
+            self.queue.put_nowait(obj)
+        except queue.Full:
+            self._count('dropped')
+            return False
+        self._count('submitted')
+        return True
+
+    def stats(self):
+        with self._lock:
+            data = dict(self.counters)
+        data['pending'] = self.queue.qsize()
+        return data
+
+    def flush(self):
+        """同步刷出当前队列中的全部记录（进程退出、测试或管理命令中使用）。"""
+        while True:
+            batch = self._drain(self.batch_size)
+            if not batch:
+                return
+            self._write(batch)
+
+    def _count(self, name, n=1):
+        with self._lock:
+            self.counters[name] += n
+
+    def _ensure_started(self):
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(
+                target=self._run, name=f'{self.model._meta.db_table}-writer', daemon=True
+            )
+            self._thread.start()
+
+    def _drain(self, limit):
+        batch = []
+        while len(batch) < limit:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            try:
+                first = self.queue.get()
+            except Exception:
+                continue
+            batch = [first]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._write(batch)
+
+    def _write(self, batch):
+        try:
+            self.sink(batch, batch_size=self.batch_size)
+            self._count('written', len(batch))
+        except Exception:
+            self._count('failed', len(batch))
+            logger.exception('批量写入 %s 失败，丢弃 %d 条记录', self.model._meta.db_table, len(batch))
+        finally:
+            self._count('flushes')
+            close_old_connections()
+
+
+def build_writer(model, prefix, sink=None):
+    """按 settings 中 <prefix>_QUEUE_SIZE / _BATCH_SIZE / _FLUSH_INTERVAL_MS 创建写入器。"""
+    return AsyncBatchWriter(
+        model,
+        queue_size=getattr(settings, f'{prefix}_QUEUE_SIZE', 10000),
+        batch_size=getattr(settings, f'{prefix}_BATCH_SIZE', 200),
+        flush_interval=getattr(settings, f'{prefix}_FLUSH_INTERVAL_MS', 500),
+        sink=sink,
+    )
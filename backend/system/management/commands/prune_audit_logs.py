@@ -0,0 +1,28 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from system.partitions import AUDIT_PARTITIONS, add_months, month_key
+
+
+class Command(BaseCommand):
+    help = "将模板表中分区化之前的历史记录迁入月分区；按保留策略删除过期的月分区（整表 DROP），可选先归档为 jsonl.gz；并预建下月分区"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--months', type=int, default=None,
+                            help='保留最近几个月（含当月），默认 settings.AUDIT_RETENTION_MONTHS')
+        parser.add_argument('--archive-dir', default=None, help='删除前将分区数据导出到该目录')
+
+    def handle(self, *args, **options):
+        months = options['months'] or getattr(settings, 'AUDIT_RETENTION_MONTHS', 12)
+        current = month_key(timezone.now())
+        keep_from = add_months(current, -(max(months, 1) - 1))
+        for table in AUDIT_PARTITIONS:
+            moved = table.absorb_base_table()
+            if moved:
+                self.stdout.write(f"{table.base_table}: 迁入月分区 {moved} 条历史记录")
+            dropped = table.drop_before(keep_from, archive_dir=options['archive_dir'])
+            # 预建下月分区，避免月初首批写入时建表
+            table.ensure(add_months(current, 1))
+            names = ', '.join(str(m) for m in dropped) or '无'
+            self.stdout.write(f"{table.base_table}: 删除分区 {names}")
@@ -0,0 +1,27 @@
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from system.rollups import rollup_login_daily
+
+
+class Command(BaseCommand):
+    help = "汇总登录日志到 sys_logininfor_daily（默认汇总昨天），可重复执行"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help='汇总截止日期 YYYY-MM-DD，默认昨天')
+        parser.add_argument('--days', type=int, default=1, help='自截止日期向前汇总的天数，默认 1')
+
+    def handle(self, *args, **options):
+        if options['date']:
+            try:
+                end = datetime.date.fromisoformat(options['date'])
+            except ValueError:
+                raise CommandError('日期格式应为 YYYY-MM-DD')
+        else:
+            end = timezone.localdate() - datetime.timedelta(days=1)
+        for offset in range(max(options['days'], 1)):
+            day = end - datetime.timedelta(days=offset)
+            count = rollup_login_daily(day)
+            self.stdout.write(f"{day}: {count} 行")
@@ -0,0 +1,378 @@
+import bisect
+import contextlib
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+import weakref
+
+from django.conf import settings
+
+logger = logging.getLogger('system.metrics')
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# 指标类型与说明，导出时写入 # HELP / # TYPE
+METRIC_META = {
+    'http_requests_total': ('counter', '请求数（按路由、方法、状态码）'),
+    'http_request_duration_seconds': ('histogram', '请求耗时（秒）'),
+    'http_request_db_queries_total': ('counter', '请求内执行的 SQL 条数'),
+    'http_request_db_seconds_total': ('counter', '请求内 SQL 累计耗时（秒）'),
+    'app_cache_requests_total': ('counter', '应用层缓存查找次数（hit/miss）'),
+    'app_errors_total': ('counter', '接口异常次数（client/server）'),
+    'log_writer_pending': ('gauge', '异步日志写入器队列中待写记录数'),
+    'log_writer_records_total': ('counter', '异步日志写入器记录数（submitted/written/dropped/failed）'),
+    'process_resident_memory_bytes': ('gauge', '进程常驻内存（字节）'),
+    'process_cpu_seconds_total': ('counter', '进程 CPU 时间（秒）'),
+    'process_start_time_seconds': ('gauge', '进程启动时间（Unix 秒）'),
+}
+
+# 当前请求的 SQL 计数 [条数, 秒]；不在请求内时为 None
+current_queries = contextvars.ContextVar('current_queries', default=None)
+
+PROCESS_START_TIME = time.time()
+
+
+class _Shard:
+    __slots__ = ('pid', 'thread', 'counters', 'histograms')
+
+    def __init__(self, pid, thread=None):
+        self.pid = pid
+        self.thread = thread
+        self.counters = {}
+        self.histograms = {}
+
+    def merge_into(self, counters, histograms):
+        # items() 拷贝在 GIL 下一次完成，不受写入线程并发插入影响
+        for key, value in list(self.counters.items()):
+            counters[key] = counters.get(key, 0) + value
+        for key, (buckets, total, count) in list(self.histograms.items()):
+            merged = histograms.setdefault(key, [[0] * len(buckets), 0.0, 0])
+            for i, n in enumerate(list(buckets)):
+                merged[0][i] += n
+            merged[1] += total
+            merged[2] += count
+
+
+class MetricsRegistry:
+    """
+    进程内指标：计数器与直方图按线程分片，每个线程只写自己的分片，记录时不加锁；导出时合并各分片。
+    已结束线程（如 runserver 每个连接一个线程）的分片在导出时并入进程级的 retired 合计后移除，
+    分片数量只与存活线程数有关。
+
+    多进程部署（多个 worker）时设置 METRICS_DIR：各进程每隔 METRICS_FLUSH_INTERVAL 秒把快照写入
+    该目录下的 <pid>.json，/metrics 汇总目录内所有存活进程的快照，任一 worker 响应抓取都能得到全局数据。
+    已退出进程的快照在汇总时删除，其计数随之消失（Prometheus 的 rate() 按计数器重置处理）。
+    """
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._local = threading.local()
+        self._shards = []
+        self._retired = _Shard(os.getpid())
+        # 仅在线程首次记录（登记分片）、导出时回收分片及 fork 后重置时使用
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self._flusher = None
+        self._collectors = []
+
+    def _shard(self):
+        shard = getattr(self._local, 'shard', None)
+        if shard is not None and shard.pid == os.getpid():
+            return shard
+        with self._lock:
+            pid = os.getpid()
+            if self._pid != pid:
+                # fork 出的子进程不继承父进程已记录的数据
+                self._pid = pid
+                self._shards = []
+                self._retired = _Shard(pid)
+                self._flusher = None
+            self._retire_dead_shards()
+            shard = _Shard(pid, weakref.ref(threading.current_thread()))
+            self._shards.append(shard)
+        self._local.shard = shard
+        return shard
+
+    def inc(self, name, labels=(), value=1):
+        counters = self._shard().counters
+        key = (name, labels)
+        counters[key] = counters.get(key, 0) + value
+
+    def observe(self, name, labels, value):
+        histograms = self._shard().histograms
+        key = (name, labels)
+        item = histograms.get(key)
+        if item is None:
+            item = histograms[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        item[0][bisect.bisect_left(self.buckets, value)] += 1
+        item[1] += value
+        item[2] += 1
+
+    def counter_totals(self, name):
+        """当前进程某个计数器各标签组合的合计（不含采集函数产生的计数）。"""
+        totals = {}
+        for (key_name, labels), value in self._merged_shards()[0].items():
+            if key_name == name:
+                totals[labels] = totals.get(labels, 0) + value
+        return totals
+
+    def _retire_dead_shards(self):
+        """（持锁调用）已结束线程不会再写入，其分片并入 retired 后移除，返回存活线程的分片。"""
+        pid = os.getpid()
+        live = []
+        for shard in self._shards:
+            if shard.pid != pid:
+                continue
+            thread = shard.thread() if shard.thread is not None else None
+            if thread is None or not thread.is_alive():
+                shard.merge_into(self._retired.counters, self._retired.histograms)
+            else:
+                live.append(shard)
+        self._shards = live
+        return live
+
+    def _merged_shards(self):
+        """合并当前进程各分片（含 retired），返回 (counters, histograms)。"""
+        counters = {}
+        histograms = {}
+        with self._lock:
+            live = self._retire_dead_shards()
+            if self._retired.pid == os.getpid():
+                self._retired.merge_into(counters, histograms)
+        for shard in live:
+            shard.merge_into(counters, histograms)
+        return counters, histograms
+
+    def register_collector(self, func):
+        """登记导出时调用的采集函数，返回 (类型, 名称, 标签, 值) 列表，用于队列深度、内存等即时读数。"""
+        self._collectors.append(func)
+        return func
+
+    def snapshot(self):
+        """当前进程的指标快照（可 JSON 序列化）。"""
+        counters, histograms = self._merged_shards()
+        gauges = []
+        for func in self._collectors:
+            try:
+                for kind, name, labels, value in func():
+                    if kind == 'counter':
+                        counters[(name, labels)] = counters.get((name, labels), 0) + value
+                    else:
+                        gauges.append([name, list(labels), value])
+            except Exception:
+                logger.exception('指标采集失败：%s', getattr(func, '__name__', func))
+        return {
+            'pid': os.getpid(),
+            'time': time.time(),
+            'buckets': list(self.buckets),
+            'counters': [[name, list(labels), value] for (name, labels), value in counters.items()],
+            'histograms': [[name, list(labels)] + item for (name, labels), item in histograms.items()],
+            'gauges': gauges,
+        }
+
+    # ---- 多进程汇总 ----
+
+    def _directory(self):
+        return getattr(settings, 'METRICS_DIR', None)
+
+    def write_snapshot(self, data=None):
+        directory = self._directory()
+        if not directory:
+            return
+        data = data or self.snapshot()
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{data['pid']}.json")
+        tmp = f'{path}.tmp'
+        with open(tmp, 'w', encoding='utf-8') as fp:
+            json.dump(data, fp)
+        os.replace(tmp, path)
+
+    def ensure_flusher(self):
+        interval = getattr(settings, 'METRICS_FLUSH_INTERVAL', 15)
+        if not self._directory() or not interval:
+            return
+        if self._flusher is not None and self._flusher.is_alive() and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._flusher is not None and self._flusher.is_alive() and self._pid == os.getpid():
+                return
+            self._flusher = threading.Thread(target=self._flush_loop, args=(interval,), name='metrics-flush', daemon=True)
+            self._flusher.start()
+
+    def _flush_loop(self, interval):
+        while True:
+            time.sleep(interval)
+            try:
+                self.write_snapshot()
+            except Exception:
+                logger.exception('指标快照写入失败')
+
+    def collect(self):
+        """全部进程的快照：未配置 METRICS_DIR 时只有当前进程。"""
+        own = self.snapshot()
+        directory = self._directory()
+        if not directory:
+            return [own]
+        self.write_snapshot(own)
+        result = [own]
+        for name in os.listdir(directory):
+            stem, ext = os.path.splitext(name)
+            if ext != '.json' or not stem.isdigit() or int(stem) == own['pid']:
+                continue
+            path = os.path.join(directory, name)
+            if not _pid_alive(int(stem)):
+                with contextlib.suppress(OSError):
+                    os.remove(path)
+                continue
+            try:
+                with open(path, encoding='utf-8') as fp:
+                    result.append(json.load(fp))
+            except (OSError, ValueError):
+                continue
+        return result
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def merge(snapshots, buckets):
+    """汇总多个进程的快照：计数器、直方图相加；瞬时值（gauge）按 pid 分别保留。"""
+    counters = {}
+    histograms = {}
+    gauges = []
+    for data in snapshots:
+        for name, labels, value in data['counters']:
+            key = (name, tuple(map(tuple, labels)))
+            counters[key] = counters.get(key, 0) + value
+        if data.get('buckets') == list(buckets):
+            for name, labels, counts, total, count in data['histograms']:
+                key = (name, tuple(map(tuple, labels)))
+                merged = histograms.setdefault(key, [[0] * len(counts), 0.0, 0])
+                for i, n in enumerate(counts):
+                    merged[0][i] += n
+                merged[1] += total
+                merged[2] += count
+        for name, labels, value in data['gauges']:
+            gauges.append((name, tuple(map(tuple, labels)) + (('pid', str(data['pid'])),), value))
+    return counters, histograms, gauges
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in labels) + '}'
+
+
+def _number(value):
+    if isinstance(value, float):
+        return repr(value) if value != int(value) or abs(value) >= 1e15 else str(int(value))
+    return str(value)
+
+
+def render(snapshots, buckets):
+    """Prometheus 文本格式（0.0.4）。"""
+    counters, histograms, gauges = merge(snapshots, buckets)
+    series = {}
+    for (name, labels), value in counters.items():
+        series.setdefault(name, []).append(f'{name}{_labels(labels)} {_number(value)}')
+    for name, labels, value in gauges:
+        series.setdefault(name, []).append(f'{name}{_labels(labels)} {_number(value)}')
+    for (name, labels), (counts, total, count) in histograms.items():
+        lines = series.setdefault(name, [])
+        cumulative = 0
+        for bound, n in zip(list(buckets) + ['+Inf'], counts):
+            cumulative += n
+            le = bound if bound == '+Inf' else _number(float(bound))
+            lines.append(f'{name}_bucket{_labels(labels + (("le", le),))} {cumulative}')
+        lines.append(f'{name}_sum{_labels(labels)} {_number(total)}')
+        lines.append(f'{name}_count{_labels(labels)} {count}')
+    out = []
+    for name in sorted(series):
+        kind, help_text = METRIC_META.get(name, ('untyped', name))
+        out.append(f'# HELP {name} {help_text}')
+        out.append(f'# TYPE {name} {kind}')
+        out.extend(sorted(series[name]) if kind != 'histogram' else series[name])
+    return '\n'.join(out) + '\n'
+
+
+registry = MetricsRegistry(getattr(settings, 'METRICS_LATENCY_BUCKETS', DEFAULT_BUCKETS))
+
+
+def record_request(route, method, status, duration, queries=None):
+    registry.inc('http_requests_total', (('route', route), ('method', method), ('status', str(status))))
+    registry.observe('http_request_duration_seconds', (('route', route), ('method', method)), duration)
+    if queries is not None and queries[0]:
+        registry.inc('http_request_db_queries_total', (('route', route),), queries[0])
+        registry.inc('http_request_db_seconds_total', (('route', route),), queries[1])
+
+
+def record_cache_lookup(hit):
+    registry.inc('app_cache_requests_total', (('result', 'hit' if hit else 'miss'),))
+
+
+def query_count_wrapper(execute, sql, params, many, context):
+    """数据库执行包装：把 SQL 条数与耗时计入当前请求（请求外的执行不计）。"""
+    counter = current_queries.get()
+    if counter is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        counter[0] += 1
+        counter[1] += time.perf_counter() - start
+
+
+def install(connection):
+    """为新建的数据库连接挂上 SQL 计数包装。"""
+    if not getattr(settings, 'METRICS_ENABLED', False):
+        return
+    if query_count_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(query_count_wrapper)
+
+
+def _rss_bytes():
+    try:
+        with open('/proc/self/statm') as fp:
+            return int(fp.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        import resource
+        # 非 Linux 平台退化为峰值常驻内存（macOS 单位为字节，其余为 KB）
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if os.uname().sysname == 'Darwin' else peak * 1024
+
+
+@registry.register_collector
+def process_metrics():
+    cpu = os.times()
+    return [
+        ('gauge', 'process_resident_memory_bytes', (), _rss_bytes()),
+        ('counter', 'process_cpu_seconds_total', (), cpu.user + cpu.system),
+        ('gauge', 'process_start_time_seconds', (), PROCESS_START_TIME),
+    ]
+
+
+@registry.register_collector
+def log_writer_metrics():
+    # 写入器依赖模型，延迟导入避免循环引用
+    from .common import get_login_log_writer, get_oper_log_writer
+    rows = []
+    for name, writer in (('oper_log', get_oper_log_writer()), ('login_log', get_login_log_writer())):
+        stats = writer.stats()
+        rows.append(('gauge', 'log_writer_pending', (('writer', name),), stats['pending']))
+        for result in ('submitted', 'written', 'dropped', 'failed'):
+            rows.append(('counter', 'log_writer_records_total', (('writer', name), ('result', result)), stats[result]))
+    return rows
@@ -0,0 +1,273 @@
+import contextlib
+import logging
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.utils import timezone
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+
+from . import metrics, request_profiler, tracing
+from .compression import StreamCompressor, accepted_encoding, compress_body, get_min_size
+from .profiling import RequestProfile, current_profile, recent_profiles
+from .slowquery import current_view
+
+profiling_logger = logging.getLogger('system.profiling')
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """
+    响应压缩：按 Accept-Encoding 协商 br/gzip，小于 COMPRESSION_MIN_SIZE 的响应不压缩；
+    流式响应按分块增量压缩；已带 Content-Encoding 的响应（如预压缩的缓存载荷）原样返回。
+    """
+    max_random_bytes = 100
+
+    def process_response(self, request, response):
+        if response.has_header('Content-Encoding'):
+            return response
+        if not response.streaming and len(response.content) < get_min_size():
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = accepted_encoding(request)
+        if not encoding:
+            return response
+
+        if response.streaming:
+            compressor = StreamCompressor(encoding)
+            if response.is_async:
+                response.streaming_content = compressor.awrap(response.streaming_content)
+            else:
+                response.streaming_content = compressor.wrap(response.streaming_content)
+            # 流式压缩后的长度未知
+            del response.headers['Content-Length']
+        else:
+            compressed = compress_body(response.content, encoding, self.max_random_bytes)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers['Content-Length'] = str(len(compressed))
+
+        # 压缩后内容与原始表示不再逐字节一致，强 ETag 需降为弱 ETag
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = encoding
+        return response
+
+
+class ProfilingMiddleware:
+    """
+    请求剖析（settings.REQUEST_PROFILING 开启时生效，否则不加载）：统计 SQL 次数/耗时、序列化与渲染耗时、
+    应用层缓存命中及总耗时，写入 Server-Timing 响应头；同形 SQL 重复达到
+    REQUEST_PROFILING_NPLUSONE_THRESHOLD 次时记为疑似 N+1 并写日志。每个请求的结果进入环形缓冲，
+    管理员可通过 /monitor/profiles 查看。
+    """
+    def __init__(self, get_response):
+        if not getattr(settings, 'REQUEST_PROFILING', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.threshold = getattr(settings, 'REQUEST_PROFILING_NPLUSONE_THRESHOLD', 5)
+
+    def __call__(self, request):
+        profile = RequestProfile(request)
+        token = current_profile.set(profile)
+        try:
+            with contextlib.ExitStack() as stack:
+                for conn in connections.all():
+                    stack.enter_context(conn.execute_wrapper(profile.execute_wrapper))
+                response = self.get_response(request)
+        finally:
+            current_profile.reset(token)
+        total = time.perf_counter() - profile.started
+        self.finish(request, response, profile, total)
+        return response
+
+    def process_template_response(self, request, response):
+        # DRF Response 在中间件链内渲染，借渲染回调单独计出渲染耗时
+        profile = current_profile.get()
+        if profile is not None:
+            start = time.perf_counter()
+
+            def rendered(resp):
+                profile.sections['render'] += time.perf_counter() - start
+            response.add_post_render_callback(rendered)
+        return response
+
+    def finish(self, request, response, profile, total):
+        repeated = profile.repeated_queries(self.threshold)
+        timings = [f'db;dur={profile.query_time * 1000:.1f};desc="{profile.query_count} queries"']
+        timings += [f'{name};dur={seconds * 1000:.1f}' for name, seconds in profile.sections.items()]
+        if profile.cache_hits or profile.cache_misses:
+            timings.append(f'cache;desc="hit {profile.cache_hits} / miss {profile.cache_misses}"')
+        timings.append(f'total;dur={total * 1000:.1f}')
+        response.headers['Server-Timing'] = ', '.join(timings)
+        if repeated:
+            profiling_logger.warning(
+                '疑似 N+1：%s %s 同形 SQL 重复 %d 次：%s',
+                request.method, request.path, repeated[0]['count'], repeated[0]['sql'],
+            )
+        recent_profiles.append({
+            'time': timezone.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'method': profile.method,
+            'path': profile.path,
+            'user': getattr(getattr(request, 'user', None), 'username', '') or '',
+            'status': response.status_code,
+            'totalMs': round(total * 1000, 1),
+            'dbCount': profile.query_count,
+            'dbMs': round(profile.query_time * 1000, 1),
+            'sections': {name: round(seconds * 1000, 1) for name, seconds in profile.sections.items()},
+            'cacheHits': profile.cache_hits,
+            'cacheMisses': profile.cache_misses,
+            'repeatedQueries': repeated,
+        })
+
+
+class QueryContextMiddleware:
+    """记录当前请求对应的视图/动作（如 UserViewSet.list），供慢 SQL 日志归属调用方。"""
+    def __init__(self, get_response):
+        if getattr(settings, 'SLOW_QUERY_MS', None) is None:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = current_view.set(request.path)
+        try:
+            return self.get_response(request)
+        finally:
+            current_view.reset(token)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        current_view.set(view_label(request, view_func))
+        return None
+
+
+def view_label(request, view_func):
+    """视图/动作标识，如 UserViewSet.list；函数视图取函数名。"""
+    cls = getattr(view_func, 'cls', None) or getattr(view_func, 'view_class', None)
+    if cls is None:
+        return getattr(view_func, '__name__', request.path)
+    actions = getattr(view_func, 'actions', None) or {}
+    return f'{cls.__name__}.{actions.get(request.method.lower()) or request.method.lower()}'
+
+
+class MetricsMiddleware:
+    """
+    请求指标（settings.METRICS_ENABLED 开启时生效）：按视图/动作统计请求数、状态码、耗时直方图
+    及请求内 SQL 条数/耗时，由 /metrics 导出。路由标签取视图名而非 URL，避免路径参数导致标签基数膨胀。
+    """
+    def __init__(self, get_response):
+        if not getattr(settings, 'METRICS_ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        metrics.registry.ensure_flusher()
+        start = time.perf_counter()
+        queries = [0, 0.0]
+        token = metrics.current_queries.set(queries)
+        try:
+            response = self.get_response(request)
+        finally:
+            metrics.current_queries.reset(token)
+        route = getattr(request, '_metrics_route', 'unmatched')
+        metrics.record_request(route, request.method, response.status_code, time.perf_counter() - start, queries)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._metrics_route = view_label(request, view_func)
+        return None
+
+
+class TracingMiddleware:
+    """
+    请求追踪（settings.TRACING_ENABLED 开启时生效）：为每个请求建立 trace（沿用上游 traceparent，
+    请求 ID 沿用 X-Request-ID 或取 trace ID 并写回响应头），认证、权限、查询构建、SQL、序列化、
+    渲染各阶段记为子 span。按 TRACING_SAMPLE_RATE 采样，耗时达到 TRACING_SLOW_MS 的请求总是导出。
+    """
+    def __init__(self, get_response):
+        if not getattr(settings, 'TRACING_ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.max_spans = getattr(settings, 'TRACING_MAX_SPANS', 1000)
+        self.slow_ms = getattr(settings, 'TRACING_SLOW_MS', None)
+
+    def __call__(self, request):
+        request_id = tracing.request_id_from(request.headers.get('X-Request-ID'))
+        parent = tracing.parse_traceparent(request.headers.get('traceparent'))
+        if parent:
+            trace_id, parent_id, sampled = parent
+            trace = tracing.Trace(trace_id, parent_id, sampled or tracing.should_sample(), request_id, self.max_spans)
+        else:
+            trace = tracing.Trace(sampled=tracing.should_sample(), request_id=request_id, max_spans=self.max_spans)
+        root = tracing.Span(f'{request.method} {request.path}', trace.parent_id, tracing.KIND_SERVER, {
+            'http.request.method': request.method,
+            'url.path': request.path,
+            'request.id': trace.request_id,
+        })
+        request.request_id = trace.request_id
+        request._trace_root = root
+        trace_token = tracing.current_trace.set(trace)
+        span_token = tracing.current_span.set(root)
+        try:
+            response = self.get_response(request)
+        finally:
+            tracing.current_span.reset(span_token)
+            tracing.current_trace.reset(trace_token)
+        root.set_attribute('http.response.status_code', response.status_code)
+        root.set_attribute('enduser.id', getattr(getattr(request, 'user', None), 'username', None) or None)
+        root.finish()
+        if response.status_code >= 500:
+            root.error = f'HTTP {response.status_code}'
+        trace.add(root)
+        if trace.dropped:
+            root.set_attribute('trace.dropped_spans', trace.dropped)
+        duration_ms = (root.end - root.start) / 1e6
+        if trace.sampled or (self.slow_ms is not None and duration_ms >= self.slow_ms):
+            tracing.exporter.export(trace)
+        response.headers['X-Request-ID'] = trace.request_id
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        route = view_label(request, view_func)
+        request._trace_root.name = f'{request.method} {route}'
+        request._trace_root.set_attribute('http.route', route)
+        return None
+
+    def process_template_response(self, request, response):
+        trace = tracing.current_trace.get()
+        if trace is not None:
+            item = trace.start_span('render')
+
+            def rendered(resp):
+                item.finish()
+                trace.add(item)
+            response.add_post_render_callback(rendered)
+        return response
+
+
+class RequestCaptureMiddleware:
+    """
+    按需剖析单个请求：携带管理员签发的 X-Profile-Token（绑定方法与路径，REQUEST_CAPTURE_TOKEN_MAX_AGE 秒内有效）
+    的请求在 cProfile 与 tracemalloc 下执行，pstats/内存快照及摘要保存到 REQUEST_CAPTURE_DIR，
+    响应头 X-Profile-Id 为剖析编号，可在 /monitor/captures 查看。同一时刻只剖析一个请求，其余照常执行。
+    """
+    def __init__(self, get_response):
+        if not getattr(settings, 'REQUEST_CAPTURE_ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        capture = request_profiler.try_capture(request)
+        if capture is None:
+            return self.get_response(request)
+        try:
+            with capture:
+                response = self.get_response(request)
+            capture.save(request, response)
+        finally:
+            request_profiler.release()
+        response.headers['X-Profile-Id'] = capture.id
+        return response
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.8 on 2026-10-19 13:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('system', '0008_rolemenu_create_by_rolemenu_create_time_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='userrole',
+            index=models.Index(fields=['role', 'user'], name='sys_user_ro_role_id_8ba3ad_idx'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.8 on 2026-10-19 14:13
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('system', '0009_userrole_role_user_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OperLog',
+            fields=[
+                ('oper_id', models.BigAutoField(primary_key=True, serialize=False, verbose_name='日志主键')),
+                ('oper_name', models.CharField(blank=True, default='', max_length=64, verbose_name='操作人员')),
+                ('request_method', models.CharField(max_length=10, verbose_name='请求方式')),
+                ('oper_url', models.CharField(max_length=255, verbose_name='请求URL')),
+                ('method', models.CharField(blank=True, default='', max_length=100, verbose_name='方法名称')),
+                ('oper_ip', models.CharField(blank=True, default='', max_length=128, verbose_name='主机地址')),
+                ('oper_param', models.TextField(blank=True, default='', verbose_name='请求参数')),
+                ('status', models.IntegerField(default=200, verbose_name='响应状态码')),
+                ('cost_time', models.IntegerField(default=0, verbose_name='消耗时间（毫秒）')),
+                ('oper_time', models.DateTimeField(default=django.utils.timezone.now, verbose_name='操作时间')),
+            ],
+            options={
+                'verbose_name': '操作日志',
+                'verbose_name_plural': '操作日志',
+                'db_table': 'sys_oper_log',
+                'indexes': [models.Index(fields=['oper_time'], name='sys_oper_lo_oper_ti_62325b_idx'), models.Index(fields=['oper_name', 'oper_time'], name='sys_oper_lo_oper_na_b1ff9b_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.8 on 2026-10-19 14:15
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('system', '0010_oper_log'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LoginInfor',
+            fields=[
+                ('info_id', models.BigAutoField(primary_key=True, serialize=False, verbose_name='访问ID')),
+                ('user_name', models.CharField(blank=True, default='', max_length=64, verbose_name='用户账号')),
+                ('ipaddr', models.CharField(blank=True, default='', max_length=128, verbose_name='登录IP地址')),
+                ('user_agent', models.CharField(blank=True, default='', max_length=255, verbose_name='客户端标识')),
+                ('status', models.CharField(choices=[('0', '成功'), ('1', '失败')], default='0', max_length=1, verbose_name='登录状态')),
+                ('msg', models.CharField(blank=True, default='', max_length=255, verbose_name='提示消息')),
+                ('login_time', models.DateTimeField(default=django.utils.timezone.now, verbose_name='访问时间')),
+            ],
+            options={
+                'verbose_name': '登录日志',
+                'verbose_name_plural': '登录日志',
+                'db_table': 'sys_logininfor',
+                'indexes': [models.Index(fields=['login_time'], name='sys_loginin_login_t_0ef90c_idx'), models.Index(fields=['user_name', 'login_time'], name='sys_loginin_user_na_8c9ca9_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='LoginInforDaily',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('stat_date', models.DateField(verbose_name='统计日期')),
+                ('user_name', models.CharField(blank=True, default='', max_length=64, verbose_name='用户账号')),
+                ('ipaddr', models.CharField(blank=True, default='', max_length=128, verbose_name='登录IP地址')),
+                ('status', models.CharField(choices=[('0', '成功'), ('1', '失败')], default='0', max_length=1, verbose_name='登录状态')),
+                ('count', models.IntegerField(default=0, verbose_name='次数')),
+            ],
+            options={
+                'verbose_name': '登录日志日汇总',
+                'verbose_name_plural': '登录日志日汇总',
+                'db_table': 'sys_logininfor_daily',
+                'constraints': [models.UniqueConstraint(fields=('stat_date', 'user_name', 'ipaddr', 'status'), name='uniq_logininfor_daily')],
+            },
+        ),
+    ]
@@ -95,6 +95,9 @@ class UserRole(BaseModel):
         verbose_name = '用户角色关联'
         verbose_name_plural = '用户角色关联'
         unique_together = ('user', 'role')
+        indexes = [
+            models.Index(fields=['role', 'user']),
+        ]
 
 
 class Menu(BaseModel):
@@ -205,3 +208,82 @@ class Config(BaseModel):
 
     def __str__(self):
         return f"{self.config_name}({self.config_key})"
+
+
+class OperLog(models.Model):
+    """
+    操作日志模板表：实际数据按月写入 sys_oper_log_YYYYMM 分区（见 system.partitions）；
+    分区化之前写入本表的记录由 prune_audit_logs 迁入对应月分区。
+    """
+    audit_storage = True
+
+    oper_id = models.BigAutoField(primary_key=True, verbose_name='日志主键')
+    oper_name = models.CharField(max_length=64, blank=True, default='', verbose_name='操作人员')
+    request_method = models.CharField(max_length=10, verbose_name='请求方式')
+    oper_url = models.CharField(max_length=255, verbose_name='请求URL')
+    method = models.CharField(max_length=100, blank=True, default='', verbose_name='方法名称')
+    oper_ip = models.CharField(max_length=128, blank=True, default='', verbose_name='主机地址')
+    oper_param = models.TextField(blank=True, default='', verbose_name='请求参数')
+    status = models.IntegerField(default=200, verbose_name='响应状态码')
+    cost_time = models.IntegerField(default=0, verbose_name='消耗时间（毫秒）')
+    oper_time = models.DateTimeField(default=timezone.now, verbose_name='操作时间')
+
+    class Meta:
+        db_table = 'sys_oper_log'
+        verbose_name = '操作日志'
+        verbose_name_plural = '操作日志'
+        indexes = [
+            models.Index(fields=['oper_time']),
+            models.Index(fields=['oper_name', 'oper_time']),
+        ]
+
+    def __str__(self):
+        return f"{self.oper_name} {self.request_method} {self.oper_url}"
+
+
+class LoginInfor(models.Model):
+    """
+    登录日志模板表：实际数据按月写入 sys_logininfor_YYYYMM 分区（见 system.partitions）；
+    分区化之前写入本表的记录由 prune_audit_logs 迁入对应月分区。
+    """
+    audit_storage = True
+
+    info_id = models.BigAutoField(primary_key=True, verbose_name='访问ID')
+    user_name = models.CharField(max_length=64, blank=True, default='', verbose_name='用户账号')
+    ipaddr = models.CharField(max_length=128, blank=True, default='', verbose_name='登录IP地址')
+    user_agent = models.CharField(max_length=255, blank=True, default='', verbose_name='客户端标识')
+    status = models.CharField(max_length=1, choices=[('0', '成功'), ('1', '失败')], default='0', verbose_name='登录状态')
+    msg = models.CharField(max_length=255, blank=True, default='', verbose_name='提示消息')
+    login_time = models.DateTimeField(default=timezone.now, verbose_name='访问时间')
+
+    class Meta:
+        db_table = 'sys_logininfor'
+        verbose_name = '登录日志'
+        verbose_name_plural = '登录日志'
+        indexes = [
+            models.Index(fields=['login_time']),
+            models.Index(fields=['user_name', 'login_time']),
+        ]
+
+    def __str__(self):
+        return f"{self.user_name} {self.ipaddr} {self.status}"
+
+
+class LoginInforDaily(models.Model):
+    """登录日志按日汇总（用户/IP/登录状态），由 rollup_logininfor 命令生成。"""
+    stat_date = models.DateField(verbose_name='统计日期')
+    user_name = models.CharField(max_length=64, blank=True, default='', verbose_name='用户账号')
+    ipaddr = models.CharField(max_length=128, blank=True, default='', verbose_name='登录IP地址')
+    status = models.CharField(max_length=1, choices=[('0', '成功'), ('1', '失败')], default='0', verbose_name='登录状态')
+    count = models.IntegerField(default=0, verbose_name='次数')
+
+    class Meta:
+        db_table = 'sys_logininfor_daily'
+        verbose_name = '登录日志日汇总'
+        verbose_name_plural = '登录日志日汇总'
+        constraints = [
+            models.UniqueConstraint(fields=['stat_date', 'user_name', 'ipaddr', 'status'], name='uniq_logininfor_daily'),
+        ]
+
+    def __str__(self):
+        return f"{self.stat_date} {self.user_name} {self.ipaddr} {self.status} {self.count}"
@@ -1,4 +1,5 @@
-from rest_framework.pagination import PageNumberPagination
+from django.conf import settings
+from rest_framework.pagination import BasePagination, PageNumberPagination
 from rest_framework.response import Response
 
 
@@ -7,4 +8,41 @@ class StandardPagination(PageNumberPagination):
     page_size_query_param = 'pageSize'
     max_page_size = 100
     def get_paginated_response(self, data):
-        return Response({'code': 200, 'msg': '操作成功', 'total': self.page.paginator.count, 'rows': data})
\ No newline at end of file
+        return Response({'code': 200, 'msg': '操作成功', 'total': self.page.paginator.count, 'rows': data})
+
+
+class KeysetPagination(BasePagination):
+    """
+    主键游标分页：按主键倒序，?lastId=<上一页最后一条主键>&pageSize=N 取下一页。
+    不做 COUNT 与 OFFSET，翻页代价与数据量无关；返回 nextId 作为下一页游标（无更多数据时为 None）。
+    """
+    cursor_query_param = 'lastId'
+    page_size_query_param = 'pageSize'
+    max_page_size = 100
+
+    def is_requested(self, request):
+        return self.cursor_query_param in request.query_params
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param))
+        except (TypeError, ValueError):
+            size = settings.REST_FRAMEWORK.get('PAGE_SIZE', 10)
+        return max(1, min(size, self.max_page_size))
+
+    def paginate_queryset(self, queryset, request, view=None):
+        key = queryset.model._meta.pk.attname
+        size = self.get_page_size(request)
+        queryset = queryset.order_by(f'-{key}')
+        try:
+            last = int(request.query_params.get(self.cursor_query_param))
+        except (TypeError, ValueError):
+            last = None
+        if last:
+            queryset = queryset.filter(**{f'{key}__lt': last})
+        rows = list(queryset[:size + 1])
+        self.next_cursor = getattr(rows[size - 1], key) if len(rows) > size else None
+        return rows[:size]
+
+    def get_paginated_response(self, data):
+        return Response({'code': 200, 'msg': '操作成功', 'rows': data, 'nextId': self.next_cursor})
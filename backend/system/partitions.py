@@ -0,0 +1,211 @@
+import datetime
+import gzip
+import json
+import os
+import threading
+import time
+
+from django.apps.registry import Apps
+from django.conf import settings
+from django.db import DatabaseError, connections, models, router, transaction
+from django.utils import timezone
+
+from .models import LoginInfor, OperLog
+
+# 分区模型注册在独立的应用注册表中，不参与迁移与系统检查
+partition_apps = Apps()
+
+# 写入路径上已知分区列表的缓存秒数；查询总是重新读取表名（见 months_between）
+MONTHS_CACHE_SECONDS = 60
+
+
+def month_key(value):
+    """时间（按当前时区）所在月份，形如 202610。"""
+    if isinstance(value, datetime.datetime):
+        if settings.USE_TZ and timezone.is_aware(value):
+            value = timezone.localtime(value)
+    return value.year * 100 + value.month
+
+
+def add_months(month, delta):
+    year, mon = divmod(month // 100 * 12 + month % 100 - 1 + delta, 12)
+    return year * 100 + mon + 1
+
+
+class PartitionedTable:
+    """
+    按月分区的审计表：模板模型（如 OperLog）的结构按月复制为 <表名>_YYYYMM 物理表，
+    写入按记录时间路由到对应分区（首次写入某月时建表及 (时间)、(用户, 时间) 索引）。
+
+    - 查询按时间范围裁剪分区，只访问范围内存在的月表，多个分区以 UNION ALL 合并；
+    - 保留策略按月整表 DROP（可先归档为 jsonl.gz），耗时与行数无关；
+    - 所在数据库由 AuditRouter（settings.AUDIT_DATABASE）决定，可放到单独的数据库文件。
+
+    分区表主键在各自表内自增，跨月不唯一。
+    """
+    def __init__(self, model, time_field, user_field, index_prefix):
+        self.model = model
+        self.time_field = time_field
+        self.user_field = user_field
+        self.index_prefix = index_prefix
+        self.base_table = model._meta.db_table
+        self._models = {}
+        self._months = None
+        self._checked = 0
+        self._lock = threading.Lock()
+
+    @property
+    def alias(self):
+        return router.db_for_write(self.model)
+
+    def table_name(self, month):
+        return f'{self.base_table}_{month}'
+
+    def partition_model(self, month):
+        cls = self._models.get(month)
+        if cls is not None:
+            return cls
+        attrs = {'__module__': __name__, 'audit_storage': True}
+        for field in self.model._meta.local_fields:
+            attrs[field.name] = field.clone()
+        attrs['Meta'] = type('Meta', (), {
+            'apps': partition_apps,
+            'app_label': self.model._meta.app_label,
+            'db_table': self.table_name(month),
+            # managed 才会由 schema_editor 一并建索引；分区模型不在全局注册表中，不会生成迁移
+            'managed': True,
+            'indexes': [
+                models.Index(fields=[self.time_field], name=f'{self.index_prefix}_{month}_time'),
+                models.Index(fields=[self.user_field, self.time_field], name=f'{self.index_prefix}_{month}_user'),
+            ],
+        })
+        cls = type(f'{self.model.__name__}{month}', (models.Model,), attrs)
+        self._models[month] = cls
+        return cls
+
+    def existing_months(self, refresh=False):
+        # 其他进程（如 prune_audit_logs）可能增删分区，已知分区列表定期重新读取
+        if self._months is None or refresh or time.monotonic() - self._checked > MONTHS_CACHE_SECONDS:
+            prefix = f'{self.base_table}_'
+            months = set()
+            for table in connections[self.alias].introspection.table_names():
+                suffix = table[len(prefix):]
+                if table.startswith(prefix) and len(suffix) == 6 and suffix.isdigit():
+                    months.add(int(suffix))
+            self._months = months
+            self._checked = time.monotonic()
+        return self._months
+
+    def ensure(self, month):
+        if month in self.existing_months():
+            return self.partition_model(month)
+        with self._lock:
+            if month not in self.existing_months(refresh=True):
+                try:
+                    with connections[self.alias].schema_editor() as editor:
+                        editor.create_model(self.partition_model(month))
+                except DatabaseError:
+                    # 其他进程可能已并发建表
+                    if month not in self.existing_months(refresh=True):
+                        raise
+                self._months.add(month)
+        return self.partition_model(month)
+
+    def bulk_create(self, objs, batch_size=None):
+        """按记录时间分组写入各月分区。"""
+        groups = {}
+        for obj in objs:
+            if getattr(obj, self.time_field) is None:
+                setattr(obj, self.time_field, timezone.now())
+            groups.setdefault(month_key(getattr(obj, self.time_field)), []).append(obj)
+        fields = [f.attname for f in self.model._meta.local_fields if not f.primary_key]
+        for month, items in groups.items():
+            part = self.ensure(month)
+            part.objects.using(self.alias).bulk_create(
+                [part(**{name: getattr(obj, name) for name in fields}) for obj in items],
+                batch_size=batch_size,
+            )
+
+    def absorb_base_table(self, batch_size=2000):
+        """
+        把模板表中的记录（分区化之前直接写入的历史数据）按记录时间迁入月分区，返回迁移行数。
+        每批在一个事务内写入分区并删除原行，中途失败可重复执行。
+        """
+        manager = self.model.objects.using(self.alias)
+        moved = 0
+        while True:
+            batch = list(manager.order_by('pk')[:batch_size])
+            if not batch:
+                return moved
+            # SQLite 不能在事务内建表，先在事务外建好本批涉及的分区
+            for obj in batch:
+                if getattr(obj, self.time_field) is None:
+                    setattr(obj, self.time_field, timezone.now())
+                self.ensure(month_key(getattr(obj, self.time_field)))
+            with transaction.atomic(using=self.alias):
+                self.bulk_create(batch)
+                manager.filter(pk__in=[obj.pk for obj in batch]).delete()
+            moved += len(batch)
+
+    def months_between(self, start=None, end=None):
+        """
+        范围内存在的分区月份（新→旧）；start/end 为空表示不限。
+        每次都从数据库读取表名（SQLite 为一次 sqlite_master 查询）：prune_audit_logs 在其他进程中删除分区后，
+        查询不会再引用已删除的表。
+        """
+        low = month_key(start) if start else None
+        high = month_key(end) if end else None
+        return sorted(
+            (m for m in self.existing_months(refresh=True) if (low is None or m >= low) and (high is None or m <= high)),
+            reverse=True,
+        )
+
+    def querysets(self, start=None, end=None):
+        """范围内各分区的 QuerySet（新→旧），已按时间范围过滤。"""
+        lookups = {}
+        if start:
+            lookups[f'{self.time_field}__gte'] = start
+        if end:
+            lookups[f'{self.time_field}__lte'] = end
+        return [
+            self.partition_model(month).objects.using(self.alias).filter(**lookups)
+            for month in self.months_between(start, end)
+        ]
+
+    def union(self, start=None, end=None, apply=None):
+        """范围内分区合并为一个 QuerySet（UNION ALL），apply 用于在各分区上追加相同过滤条件。"""
+        querysets = self.querysets(start, end)
+        if apply:
+            querysets = [apply(qs) for qs in querysets]
+        if not querysets:
+            return self.model.objects.none()
+        if len(querysets) == 1:
+            return querysets[0]
+        return querysets[0].union(*querysets[1:], all=True)
+
+    def drop_before(self, month, archive_dir=None):
+        """删除早于 month 的全部分区（整表 DROP），指定 archive_dir 时先逐表导出为 jsonl.gz。返回删除的月份。"""
+        dropped = []
+        for old in sorted(m for m in self.existing_months(refresh=True) if m < month):
+            part = self.partition_model(old)
+            if archive_dir:
+                self.archive(part, archive_dir)
+            with connections[self.alias].schema_editor() as editor:
+                editor.delete_model(part)
+            self._months.discard(old)
+            dropped.append(old)
+        return dropped
+
+    def archive(self, part, archive_dir):
+        os.makedirs(archive_dir, exist_ok=True)
+        path = os.path.join(archive_dir, f'{part._meta.db_table}.jsonl.gz')
+        with gzip.open(path, 'wt', encoding='utf-8') as fp:
+            for row in part.objects.using(self.alias).values().iterator(chunk_size=2000):
+                fp.write(json.dumps(row, ensure_ascii=False, default=str))
+                fp.write('\n')
+        return path
+
+
+oper_log_partitions = PartitionedTable(OperLog, 'oper_time', 'oper_name', 'oplog')
+login_log_partitions = PartitionedTable(LoginInfor, 'login_time', 'user_name', 'logininfor')
+AUDIT_PARTITIONS = (oper_log_partitions, login_log_partitions)
@@ -1,5 +1,24 @@
+import hmac
+
+from django.conf import settings
 from rest_framework.permissions import BasePermission
 from .models import UserRole
+from .tracing import span
+
+
+def get_user_role_keys(user):
+    """
+    用户角色标识列表，查询结果暂存在用户对象上：同一请求（及批量接口共享认证用户的各子请求）
+    内的权限判断与用户信息只查询一次角色。
+    """
+    roles = getattr(user, '_role_keys', None)
+    if roles is None:
+        try:
+            roles = [ur.role.role_key for ur in UserRole.objects.filter(user=user).select_related('role')]
+        except Exception:
+            roles = []
+        user._role_keys = roles
+    return roles
 
 
 class HasRolePermission(BasePermission):
@@ -7,9 +26,17 @@ class HasRolePermission(BasePermission):
         required = getattr(view, 'required_roles', None)
         if not required:
             return True
+        with span('permission.HasRolePermission'):
+            roles = get_user_role_keys(request.user)
+            return any(r in roles for r in required) or ('admin' in roles)
+
+
+class MetricsPermission(BasePermission):
+    """指标抓取：请求携带与 settings.METRICS_TOKEN 一致的令牌（X-Metrics-Token 头或 ?token=），或为管理员。"""
+    def has_permission(self, request, view):
+        expected = getattr(settings, 'METRICS_TOKEN', None)
+        supplied = request.headers.get('X-Metrics-Token') or request.query_params.get('token')
+        if expected and supplied:
+            return hmac.compare_digest(str(supplied).encode(), str(expected).encode())
         user = request.user
-        try:
-            roles = [ur.role.role_key for ur in UserRole.objects.filter(user=user).select_related('role')]
-        except Exception:
-            roles = []
-        return any(r in roles for r in required) or ('admin' in roles)
\ No newline at end of file
+        return bool(user and user.is_authenticated) and 'admin' in get_user_role_keys(user)
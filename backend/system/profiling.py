@@ -0,0 +1,101 @@
+import collections
+import contextlib
+import contextvars
+import re
+import threading
+import time
+
+from django.conf import settings
+
+from . import metrics, tracing
+
+# 当前请求的性能记录；未启用剖析或不在请求内时为 None，埋点调用直接返回
+current_profile = contextvars.ContextVar('current_profile', default=None)
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+_IN_LIST_RE = re.compile(r'\(\s*(?:%s|\?)(?:\s*,\s*(?:%s|\?))*\s*\)')
+
+
+def sql_shape(sql):
+    """SQL 形状：字面量替换为 ?，IN (...) 列表折叠为 (...)，用于识别重复执行的同形查询。"""
+    sql = _STRING_RE.sub('?', sql)
+    sql = _NUMBER_RE.sub('?', sql)
+    sql = _IN_LIST_RE.sub('(...)', sql)
+    return ' '.join(sql.split())
+
+
+class RequestProfile:
+    """单个请求的剖析数据：SQL 次数/耗时与形状统计、各分段耗时、缓存命中。"""
+    def __init__(self, request):
+        self.method = request.method
+        self.path = request.path
+        self.started = time.perf_counter()
+        self.query_count = 0
+        self.query_time = 0.0
+        self.shapes = collections.Counter()
+        self.sections = collections.defaultdict(float)
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def execute_wrapper(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.query_count += 1
+            self.query_time += time.perf_counter() - start
+            self.shapes[sql] += 1
+
+    def repeated_queries(self, threshold):
+        """按形状聚合后重复次数达到阈值的查询（疑似 N+1），按次数降序。"""
+        merged = collections.Counter()
+        for sql, count in self.shapes.items():
+            merged[sql_shape(sql)] += count
+        return [{'sql': sql, 'count': count} for sql, count in merged.most_common() if count >= threshold]
+
+
+@contextlib.contextmanager
+def profile_section(name):
+    """累计当前请求中某一分段（如 serialize）的耗时，追踪中的请求同时记为同名 span；均未启用时不计时。"""
+    profile = current_profile.get()
+    with tracing.span(name):
+        if profile is None:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            profile.sections[name] += time.perf_counter() - start
+
+
+def record_cache(hit):
+    """记录一次应用层缓存查找的命中/未命中。"""
+    if getattr(settings, 'METRICS_ENABLED', False):
+        metrics.record_cache_lookup(hit)
+    profile = current_profile.get()
+    if profile is None:
+        return
+    if hit:
+        profile.cache_hits += 1
+    else:
+        profile.cache_misses += 1
+
+
+class ProfileBuffer:
+    """最近请求剖析结果的环形缓冲，供管理员查看。"""
+    def __init__(self, size):
+        self._items = collections.deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def append(self, item):
+        with self._lock:
+            self._items.append(item)
+
+    def snapshot(self):
+        with self._lock:
+            return list(reversed(self._items))
+
+
+recent_profiles = ProfileBuffer(getattr(settings, 'REQUEST_PROFILING_BUFFER_SIZE', 200))
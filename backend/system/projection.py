@@ -0,0 +1,132 @@
+import datetime
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.utils import timezone
+from rest_framework import ISO_8601, serializers
+
+
+class DateTimeFormat:
+    """与 DRF DateTimeField（显式 strftime 格式、未指定字段时区）输出一致的日期时间格式化。"""
+    def __init__(self, fmt):
+        self.fmt = fmt
+
+    def bind(self, tz):
+        fmt = self.fmt
+
+        def convert(value):
+            if isinstance(value, str):
+                return value
+            if tz is not None:
+                if timezone.is_aware(value):
+                    value = value.astimezone(tz)
+                else:
+                    value = timezone.make_aware(value, tz)
+            elif timezone.is_aware(value):
+                value = timezone.make_naive(value, datetime.timezone.utc)
+            return value.strftime(fmt)
+        return convert
+
+
+class ReadOnlyProjection:
+    """
+    只读列表投影：把序列化器编译为 values() 列清单与逐行映射函数，
+    列表 GET 直接由数据库行生成与 DRF 逐字段序列化一致的输出，绕过模型实例化与字段取值开销。
+
+    - 普通字段：来源需为当前模型的非关联字段，按字段类型预选转换函数（CharField→str、IntegerField→int、
+      带格式的 DateTimeField→DateTimeFormat，其余直接复用字段自身的 to_representation）；
+    - 方法字段：序列化器需提供 `project_<字段名>(rows)` 批量钩子（rows 为 values() 行，
+      含主键与 method_field_sources 声明的列），返回与 rows 对齐的取值列表；
+    - 无法编译的序列化器（自定义 to_representation、嵌套/关联来源、无钩子的方法字段等）返回 None，调用方回退 DRF。
+    """
+    _cache = {}
+
+    @classmethod
+    def for_serializer(cls, serializer):
+        key = (type(serializer), tuple(serializer.fields))
+        if key not in cls._cache:
+            cls._cache[key] = cls._compile(serializer)
+        return cls._cache[key]
+
+    @classmethod
+    def _compile(cls, serializer):
+        if type(serializer).to_representation is not serializers.Serializer.to_representation:
+            return None
+        model = serializer.Meta.model
+        method_sources = getattr(serializer, 'method_field_sources', {})
+        pk = model._meta.pk.attname
+        columns = [pk]
+        steps = []
+        batches = []
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            if isinstance(field, serializers.SerializerMethodField):
+                hook = getattr(serializer, f'project_{name}', None)
+                if hook is None:
+                    return None
+                columns.extend(c for c in method_sources.get(name, ()) if c not in columns)
+                steps.append((name, None, None))
+                batches.append((name, hook))
+                continue
+            if field.source == '*' or len(field.source_attrs) != 1:
+                return None
+            attr = field.source_attrs[0]
+            try:
+                model_field = model._meta.get_field(attr)
+            except FieldDoesNotExist:
+                if hasattr(model, attr):
+                    return None
+                # 模型上不存在的可选字段在 DRF 中被跳过，此处同样不输出
+                continue
+            if model_field.is_relation:
+                return None
+            column = model_field.attname
+            if column not in columns:
+                columns.append(column)
+            steps.append((name, column, cls._converter(field)))
+        return cls(columns, steps, batches)
+
+    @staticmethod
+    def _converter(field):
+        method = type(field).to_representation
+        if method is serializers.CharField.to_representation:
+            return str
+        if method is serializers.IntegerField.to_representation:
+            return int
+        if (method is serializers.DateTimeField.to_representation and not hasattr(field, 'timezone')
+                and isinstance(field.format, str) and field.format.lower() != ISO_8601):
+            return DateTimeFormat(field.format)
+        return field.to_representation
+
+    def __init__(self, columns, steps, batches):
+        self.columns = columns
+        self.steps = steps
+        self.batches = batches
+
+    def values(self, queryset):
+        # UNION 等组合查询不支持 prefetch_related，且本身不会带预取
+        if queryset.query.combinator:
+            return queryset.values(*self.columns)
+        return queryset.prefetch_related(None).values(*self.columns)
+
+    def to_representation(self, rows):
+        rows = list(rows)
+        batch_values = {name: hook(rows) for name, hook in self.batches}
+        # 时区每批解析一次，而不是每个值都经 DRF 字段查询当前时区
+        tz = timezone.get_current_timezone() if settings.USE_TZ else None
+        steps = [
+            (name, column, convert.bind(tz) if isinstance(convert, DateTimeFormat) else convert)
+            for name, column, convert in self.steps
+        ]
+        data = []
+        for index, row in enumerate(rows):
+            item = {}
+            for name, column, convert in steps:
+                if column is None:
+                    item[name] = batch_values[name][index]
+                    continue
+                value = row[column]
+                item[name] = None if value is None else convert(value)
+            data.append(item)
+        return data
@@ -0,0 +1,31 @@
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # 未安装 orjson 时回退为 DRF 标准库实现
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    基于 orjson 的 JSON 渲染器，直接产出 bytes；输出与 DRF JSONRenderer（紧凑、UTF-8）一致。
+    datetime/UUID 等由 orjson 原生处理，Decimal、惰性翻译字符串、QuerySet 等交给 DRF JSONEncoder.default。
+    未安装 orjson、请求缩进输出或遇到 orjson 不支持的数据（如超长整数）时自动回退父类实现。
+    """
+    options = (orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS) if orjson else 0
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        renderer_context = renderer_context or {}
+        if (orjson is None or self.ensure_ascii or not self.compact
+                or self.get_indent(accepted_media_type, renderer_context) is not None):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(data, default=self.encoder_class().default, option=self.options)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        # 与父类一致，转义 \u2028 / \u2029 以保证输出是合法的 JavaScript 子集
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
@@ -0,0 +1,196 @@
+import cProfile
+import io
+import json
+import linecache
+import os
+import pstats
+import re
+import threading
+import time
+import tracemalloc
+
+from django.conf import settings
+from django.core import signing
+from django.utils import timezone
+
+HEADER = 'X-Profile-Token'
+
+_signer = signing.TimestampSigner(salt='system.request_profiler')
+# cProfile（3.12 起基于 sys.monitoring）与 tracemalloc 都是进程级的，同一时刻只剖析一个请求
+_lock = threading.Lock()
+_ID_RE = re.compile(r'^[\w-]{1,100}$')
+
+
+def sign(method, path):
+    """为指定方法 + 路径签发剖析令牌，客户端在 X-Profile-Token 头中携带。"""
+    return _signer.sign(f'{method.upper()} {path}')
+
+
+def verify(token, method, path):
+    max_age = getattr(settings, 'REQUEST_CAPTURE_TOKEN_MAX_AGE', 600)
+    try:
+        value = _signer.unsign(token, max_age=max_age)
+    except signing.BadSignature:
+        return False
+    return value == f'{method.upper()} {path}'
+
+
+def capture_dir():
+    return str(getattr(settings, 'REQUEST_CAPTURE_DIR'))
+
+
+def _capture_id(method, path):
+    slug = re.sub(r'[^\w]+', '_', path).strip('_')[:60] or 'root'
+    return f'{time.strftime("%Y%m%d%H%M%S")}-{method.lower()}-{slug}-{os.urandom(3).hex()}'
+
+
+class Capture:
+    """一次请求剖析：cProfile 统计 CPU，tracemalloc 统计请求期间新分配且仍存活的内存及峰值。"""
+    def __init__(self, request):
+        self.method = request.method
+        self.path = request.path
+        self.id = _capture_id(self.method, self.path)
+        self.profiler = cProfile.Profile()
+        self.started_tracing = False
+        self.before = None
+
+    def __enter__(self):
+        frames = getattr(settings, 'REQUEST_CAPTURE_TRACEMALLOC_FRAMES', 10)
+        if tracemalloc.is_tracing():
+            # 进程已在追踪内存（如 PYTHONTRACEMALLOC），以请求前快照为基线做差
+            self.before = tracemalloc.take_snapshot()
+        else:
+            tracemalloc.start(frames)
+            self.started_tracing = True
+        tracemalloc.reset_peak()
+        self.started = time.perf_counter()
+        self.profiler.enable()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.profiler.disable()
+        self.duration = time.perf_counter() - self.started
+        self.snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+        ))
+        _, self.peak = tracemalloc.get_traced_memory()
+        if self.started_tracing:
+            tracemalloc.stop()
+        return False
+
+    def save(self, request, response):
+        """写入 <id>.pstats、<id>.tracemalloc 及摘要 <id>.json，返回摘要。"""
+        directory = capture_dir()
+        os.makedirs(directory, exist_ok=True)
+        base = os.path.join(directory, self.id)
+        self.profiler.dump_stats(f'{base}.pstats')
+        self.snapshot.dump(f'{base}.tracemalloc')
+        summary = {
+            'id': self.id,
+            'time': timezone.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'method': self.method,
+            'path': self.path,
+            'user': getattr(getattr(request, 'user', None), 'username', '') or '',
+            'status': response.status_code,
+            'durationMs': round(self.duration * 1000, 1),
+            'peakMemory': self.peak,
+            'cpu': cpu_top(f'{base}.pstats'),
+            'memory': memory_top(self.snapshot, self.before),
+        }
+        with open(f'{base}.json', 'w', encoding='utf-8') as fp:
+            json.dump(summary, fp, ensure_ascii=False)
+        prune(directory, getattr(settings, 'REQUEST_CAPTURE_MAX_FILES', 50))
+        return summary
+
+
+def try_capture(request):
+    """请求携带有效令牌且当前没有其他剖析在进行时返回 Capture，否则返回 None。"""
+    token = request.headers.get(HEADER)
+    if not token or not verify(token, request.method, request.path):
+        return None
+    if not _lock.acquire(blocking=False):
+        return None
+    return Capture(request)
+
+
+def release():
+    _lock.release()
+
+
+def cpu_top(path, sort='cumulative', limit=None):
+    """读取 pstats 文件，返回按 sort 排序的前 limit 个函数。"""
+    limit = limit or getattr(settings, 'REQUEST_CAPTURE_TOP', 30)
+    stats = pstats.Stats(path, stream=io.StringIO())
+    stats.sort_stats(sort)
+    rows = []
+    for func in stats.fcn_list[:limit]:
+        cc, nc, tt, ct, _ = stats.stats[func]
+        filename, line, name = func
+        rows.append({
+            'function': f'{filename}:{line}({name})' if line else name,
+            'calls': nc,
+            'primitiveCalls': cc,
+            'tottimeMs': round(tt * 1000, 3),
+            'cumtimeMs': round(ct * 1000, 3),
+        })
+    return rows
+
+
+def memory_top(snapshot, before=None, limit=None):
+    """按源码行汇总的内存分配前 limit 项（有基线时为相对基线的增量）。"""
+    limit = limit or getattr(settings, 'REQUEST_CAPTURE_TOP', 30)
+    stats = snapshot.compare_to(before, 'lineno') if before else snapshot.statistics('lineno')
+    rows = []
+    for stat in stats[:limit]:
+        frame = stat.traceback[0]
+        rows.append({
+            'location': f'{frame.filename}:{frame.lineno}',
+            'code': linecache.getline(frame.filename, frame.lineno).strip(),
+            'size': getattr(stat, 'size_diff', stat.size) if before else stat.size,
+            'count': getattr(stat, 'count_diff', stat.count) if before else stat.count,
+        })
+    return rows
+
+
+def list_captures():
+    directory = capture_dir()
+    if not os.path.isdir(directory):
+        return []
+    rows = []
+    for name in sorted(os.listdir(directory), reverse=True):
+        if not name.endswith('.json'):
+            continue
+        try:
+            with open(os.path.join(directory, name), encoding='utf-8') as fp:
+                data = json.load(fp)
+        except (OSError, ValueError):
+            continue
+        rows.append({k: data[k] for k in ('id', 'time', 'method', 'path', 'user', 'status', 'durationMs', 'peakMemory')})
+    return rows
+
+
+def load_capture(capture_id, sort=None):
+    """读取剖析摘要；指定 sort（如 tottime、ncalls）时按该列从 pstats 文件重新排序 CPU 统计。"""
+    if not _ID_RE.match(capture_id or ''):
+        return None
+    base = os.path.join(capture_dir(), capture_id)
+    try:
+        with open(f'{base}.json', encoding='utf-8') as fp:
+            data = json.load(fp)
+    except (OSError, ValueError):
+        return None
+    if sort and sort != 'cumulative':
+        data['cpu'] = cpu_top(f'{base}.pstats', sort)
+    return data
+
+
+def prune(directory, keep):
+    """只保留最近 keep 次剖析的文件。"""
+    ids = sorted({os.path.splitext(n)[0] for n in os.listdir(directory) if n.endswith('.json')}, reverse=True)
+    for old in ids[keep:]:
+        for ext in ('.json', '.pstats', '.tracemalloc'):
+            try:
+                os.remove(os.path.join(directory, old + ext))
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,45 @@
+import datetime
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from .models import LoginInforDaily
+from .partitions import login_log_partitions
+
+
+def day_range(day):
+    """某日（当前时区）的 [起, 止) 时间范围。"""
+    start = datetime.datetime.combine(day, datetime.time.min)
+    if settings.USE_TZ:
+        start = timezone.make_aware(start, timezone.get_current_timezone())
+    return start, start + datetime.timedelta(days=1)
+
+
+def rollup_login_daily(day):
+    """
+    汇总某日登录日志：在该日所在分区上按 (用户, IP, 登录状态) 分组计数（GROUP BY），
+    结果整体替换该日已有汇总行，可重复执行。返回汇总行数。
+    """
+    start, end = day_range(day)
+    counts = {}
+    # 当前时区的一天只落在一个月分区内；仍按分区逐个聚合后合并，不依赖这一点
+    for qs in login_log_partitions.querysets(start, end):
+        rows = (
+            qs.filter(login_time__lt=end)
+            .values_list('user_name', 'ipaddr', 'status')
+            .annotate(count=Count('pk'))
+            .order_by()
+        )
+        for user_name, ipaddr, status, count in rows:
+            key = (user_name, ipaddr, status)
+            counts[key] = counts.get(key, 0) + count
+    objs = [
+        LoginInforDaily(stat_date=day, user_name=user_name, ipaddr=ipaddr, status=status, count=count)
+        for (user_name, ipaddr, status), count in counts.items()
+    ]
+    with transaction.atomic():
+        LoginInforDaily.objects.filter(stat_date=day).delete()
+        LoginInforDaily.objects.bulk_create(objs, batch_size=500)
+    return len(objs)
@@ -0,0 +1,33 @@
+from django.apps import apps
+from django.conf import settings
+
+
+class AuditRouter:
+    """
+    审计数据（操作日志、登录日志及其按月分区）读写路由到 settings.AUDIT_DATABASE，
+    可将审计数据放到单独的数据库（如另一个 SQLite 文件），不与业务表争用写锁。
+    """
+    def _alias(self, model):
+        if getattr(model, 'audit_storage', False):
+            return getattr(settings, 'AUDIT_DATABASE', 'default')
+        return None
+
+    def db_for_read(self, model, **hints):
+        return self._alias(model)
+
+    def db_for_write(self, model, **hints):
+        return self._alias(model)
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # 审计模板表（sys_oper_log / sys_logininfor）只在审计库中建表：它定义月分区的结构，
+        # 并暂存分区化之前写入的历史记录，直到 prune_audit_logs 将其迁入月分区。
+        # 月分区由 PartitionedTable 按需建表，不经过迁移；其他模型不做限制。
+        if model_name is None:
+            return None
+        try:
+            model = apps.get_model(app_label, model_name)
+        except LookupError:
+            return None
+        if getattr(model, 'audit_storage', False):
+            return db == getattr(settings, 'AUDIT_DATABASE', 'default')
+        return None
@@ -1,5 +1,8 @@
+from django.conf import settings
+from django.db import models
+from django.db.models import Prefetch
 from rest_framework import serializers
-from .models import User, Dept, Role, UserRole, Menu, DictType, DictData, Config
+from .models import User, Dept, Role, UserRole, Menu, DictType, DictData, Config, LoginInfor, LoginInforDaily, OperLog
 from .common import snake_to_camel
 
 class CamelCaseModelSerializer(serializers.ModelSerializer):
@@ -44,17 +47,82 @@ class BaseModelSerializer(serializers.ModelSerializer):
  
 
 # User related
+def load_dept_briefs(dept_ids):
+    """一次 IN 查询取回部门简要信息，返回 {dept_id: {'deptId', 'deptName'}}。"""
+    dept_ids = {d for d in dept_ids if d}
+    if not dept_ids:
+        return {}
+    rows = Dept.objects.filter(dept_id__in=dept_ids).values_list('dept_id', 'dept_name')
+    return {dept_id: {'deptId': dept_id, 'deptName': dept_name} for dept_id, dept_name in rows}
+
+
+class UserListSerializer(serializers.ListSerializer):
+    """列表序列化时先为整页用户批量加载部门映射，避免逐行查询部门。"""
+    def to_representation(self, data):
+        items = list(data.all() if isinstance(data, models.manager.BaseManager) else data)
+        if 'dept' in self.child.fields:
+            self.child._dept_briefs = load_dept_briefs(u.dept_id for u in items)
+        return super().to_representation(items)
+
+
 class UserSerializer(BaseModelSerializer):
     userId = serializers.IntegerField(source='id', required=False)
     userName = serializers.CharField(source='username', required=False)
     nickName = serializers.CharField(source='nick_name', required=False)
-    # dept = serializers.SerializerMethodField()
+    dept = serializers.SerializerMethodField()
     deptId = serializers.IntegerField(source='dept_id')
+    roles = serializers.SerializerMethodField()
     
     class Meta:
         model = User
         fields = ['userId', 'userName', 'nickName', 'phonenumber', 'email', 'sex', 'avatar', 'status', 
-                 'remark', 'deptId']
+                 'remark', 'deptId', 'dept', 'roles']
+        list_serializer_class = UserListSerializer
+
+    # 方法字段依赖的模型列，供 ?fields= 稀疏查询收窄 .only()
+    method_field_sources = {'dept': ('dept_id',), 'roles': ()}
+
+    @staticmethod
+    def setup_eager_loading(queryset):
+        # 每页一次预取 UserRole→Role，配合 UserListSerializer 的部门映射使查询数与页大小无关
+        return queryset.prefetch_related(
+            Prefetch('userrole_set', queryset=UserRole.objects.filter(role__del_flag='0').select_related('role').order_by('id'))
+        )
+
+    # 只读列表投影（system.projection）的批量钩子：按整页行一次性解析方法字段
+    @classmethod
+    def project_dept(cls, rows):
+        briefs = load_dept_briefs(r['dept_id'] for r in rows)
+        return [briefs.get(r['dept_id']) for r in rows]
+
+    @classmethod
+    def project_roles(cls, rows):
+        roles = {}
+        if rows:
+            user_roles = (
+                UserRole.objects.filter(user_id__in=[r['id'] for r in rows], role__del_flag='0')
+                .order_by('id')
+                .values_list('user_id', 'role__role_id', 'role__role_key', 'role__role_name')
+            )
+            for user_id, role_id, role_key, role_name in user_roles:
+                roles.setdefault(user_id, []).append({'roleId': role_id, 'roleKey': role_key, 'roleName': role_name})
+        return [roles.get(r['id'], []) for r in rows]
+
+    def get_dept(self, obj):
+        briefs = getattr(self, '_dept_briefs', None)
+        if briefs is None:
+            briefs = load_dept_briefs([obj.dept_id])
+        return briefs.get(obj.dept_id)
+
+    def get_roles(self, obj):
+        if 'userrole_set' in getattr(obj, '_prefetched_objects_cache', {}):
+            user_roles = obj.userrole_set.all()
+        else:
+            user_roles = UserRole.objects.filter(user=obj, role__del_flag='0').select_related('role').order_by('id')
+        return [
+            {'roleId': ur.role.role_id, 'roleKey': ur.role.role_key, 'roleName': ur.role.role_name}
+            for ur in user_roles
+        ]
     
 
 
@@ -77,16 +145,7 @@ class UserProfileSerializer(serializers.Serializer):
                  'dept_id', 'dept', 'roleIds', 'postIds']
     
     def get_dept(self, obj):
-        if obj.dept_id:
-            try:
-                dept = Dept.objects.get(dept_id=obj.dept_id)
-                return {
-                    'deptId': dept.dept_id,
-                    'deptName': dept.dept_name
-                }
-            except Dept.DoesNotExist:
-                return None
-        return None
+        return load_dept_briefs([obj.dept_id]).get(obj.dept_id)
     
     def get_roleIds(self, obj):
         return list(UserRole.objects.filter(user=obj).values_list('role_id', flat=True))
@@ -105,24 +164,27 @@ class UserInfoSerializer(serializers.Serializer):
     dept = serializers.SerializerMethodField()
 
     def get_dept(self, obj):
-        if obj.dept_id:
-            try:
-                dept = Dept.objects.get(dept_id=obj.dept_id)
-                return {
-                    'deptId': dept.dept_id,
-                    'deptName': dept.dept_name
-                }
-            except Dept.DoesNotExist:
-                return None
-        return None
-
-
-class ResetPwdSerializer(serializers.Serializer):
-    userId = serializers.IntegerField()
+        return load_dept_briefs([obj.dept_id]).get(obj.dept_id)
+
+
+class UserIdsSerializer(serializers.Serializer):
+    """单个 userId 或批量 userIds 二选一，校验后统一归并到 userIds。"""
+    userId = serializers.IntegerField(required=False)
+    userIds = serializers.ListField(child=serializers.IntegerField(), required=False, allow_empty=False)
+
+    def validate(self, attrs):
+        ids = list(attrs.get('userIds') or [])
+        if attrs.get('userId') is not None:
+            ids.append(attrs['userId'])
+        if not ids:
+            raise serializers.ValidationError('userId 或 userIds 不能为空')
+        attrs['userIds'] = list(dict.fromkeys(ids))
+        return attrs
+
+class ResetPwdSerializer(UserIdsSerializer):
     password = serializers.CharField(min_length=6, max_length=128)
 
-class ChangeStatusSerializer(serializers.Serializer):
-    userId = serializers.IntegerField()
+class ChangeStatusSerializer(UserIdsSerializer):
     status = serializers.ChoiceField(choices=['0','1'])
 
 class UpdatePwdSerializer(serializers.Serializer):
@@ -181,6 +243,19 @@ class RoleSerializer(BaseModelSerializer):
         model = Role
         fields = ['roleId', 'roleName', 'roleKey', 'roleSort', 'dataScope', 'menuCheckStrictly', 'deptCheckStrictly']
 
+    method_field_sources = {
+        'menuCheckStrictly': ('menu_check_strictly',),
+        'deptCheckStrictly': ('dept_check_strictly',),
+    }
+
+    @classmethod
+    def project_menuCheckStrictly(cls, rows):
+        return [r['menu_check_strictly'] == 1 for r in rows]
+
+    @classmethod
+    def project_deptCheckStrictly(cls, rows):
+        return [r['dept_check_strictly'] == 1 for r in rows]
+
     def get_menuCheckStrictly(self, obj):
         return True if getattr(obj, 'menu_check_strictly', 1) == 1 else False
 
@@ -218,6 +293,9 @@ class RoleDataScopeSerializer(serializers.Serializer):
     deptIds = serializers.ListField(child=serializers.IntegerField(), required=False, allow_empty=True)
     deptCheckStrictly = serializers.BooleanField(required=False, default=True)
 
+class AuthUserFilterSerializer(UserQuerySerializer):
+    roleId = serializers.IntegerField()
+
 # Menu related
 class MenuQuerySerializer(PaginationQuerySerializer):
     menuName = serializers.CharField(required=False, allow_blank=True)
@@ -323,4 +401,112 @@ class ConfigCreateSerializer(serializers.Serializer):
     remark = serializers.CharField(required=False, allow_blank=True, default='')
 
 class ConfigUpdateSerializer(ConfigCreateSerializer):
-    configId = serializers.IntegerField()
\ No newline at end of file
+    configId = serializers.IntegerField()
+
+# Batch related
+class BatchSubRequestSerializer(serializers.Serializer):
+    method = serializers.CharField(default='GET')
+    path = serializers.CharField(max_length=500)
+    query = serializers.DictField(required=False, default=dict)
+    body = serializers.JSONField(required=False, default=None)
+
+    def validate_method(self, value):
+        value = value.upper()
+        if value not in ('GET', 'POST', 'PUT', 'DELETE'):
+            raise serializers.ValidationError('不支持的请求方法')
+        return value
+
+    def validate_path(self, value):
+        if not value.startswith('/'):
+            value = '/' + value
+        return value
+
+class BatchRequestSerializer(serializers.Serializer):
+    requests = BatchSubRequestSerializer(many=True, allow_empty=False)
+
+    def validate_requests(self, value):
+        limit = getattr(settings, 'BATCH_MAX_REQUESTS', 20)
+        if len(value) > limit:
+            raise serializers.ValidationError(f'单次批量请求最多 {limit} 个子请求')
+        return value
+
+
+class RequestCaptureSignSerializer(serializers.Serializer):
+    method = serializers.CharField(default='GET')
+    path = serializers.CharField(max_length=500)
+
+    def validate_method(self, value):
+        value = value.upper()
+        if value not in ('GET', 'POST', 'PUT', 'DELETE'):
+            raise serializers.ValidationError('不支持的请求方法')
+        return value
+
+    def validate_path(self, value):
+        # 令牌只绑定路径，查询参数不参与签名
+        value = value.split('?', 1)[0]
+        if not value.startswith('/'):
+            value = '/' + value
+        return value
+
+# Monitor related
+class LoginInforQuerySerializer(PaginationQuerySerializer):
+    userName = serializers.CharField(required=False, allow_blank=True)
+    ipaddr = serializers.CharField(required=False, allow_blank=True)
+    status = serializers.ChoiceField(required=False, choices=['0','1'])
+    beginTime = serializers.DateTimeField(required=False)
+    endTime = serializers.DateTimeField(required=False)
+
+class LoginInforDailyQuerySerializer(PaginationQuerySerializer):
+    userName = serializers.CharField(required=False, allow_blank=True)
+    ipaddr = serializers.CharField(required=False, allow_blank=True)
+    status = serializers.ChoiceField(required=False, choices=['0','1'])
+    beginDate = serializers.DateField(required=False)
+    endDate = serializers.DateField(required=False)
+
+class LoginInforSerializer(serializers.ModelSerializer):
+    infoId = serializers.IntegerField(source='info_id', read_only=True)
+    userName = serializers.CharField(source='user_name')
+    ipaddr = serializers.CharField()
+    userAgent = serializers.CharField(source='user_agent')
+    status = serializers.CharField()
+    msg = serializers.CharField()
+    loginTime = serializers.DateTimeField(source='login_time', format='%Y-%m-%d %H:%M:%S')
+
+    class Meta:
+        model = LoginInfor
+        fields = ['infoId', 'userName', 'ipaddr', 'userAgent', 'status', 'msg', 'loginTime']
+
+class LoginInforDailySerializer(serializers.ModelSerializer):
+    statDate = serializers.DateField(source='stat_date')
+    userName = serializers.CharField(source='user_name')
+    ipaddr = serializers.CharField()
+    status = serializers.CharField()
+    count = serializers.IntegerField()
+
+    class Meta:
+        model = LoginInforDaily
+        fields = ['statDate', 'userName', 'ipaddr', 'status', 'count']
+
+class OperLogQuerySerializer(PaginationQuerySerializer):
+    operName = serializers.CharField(required=False, allow_blank=True)
+    operUrl = serializers.CharField(required=False, allow_blank=True)
+    requestMethod = serializers.CharField(required=False, allow_blank=True)
+    status = serializers.IntegerField(required=False)
+    beginTime = serializers.DateTimeField(required=False)
+    endTime = serializers.DateTimeField(required=False)
+
+class OperLogSerializer(serializers.ModelSerializer):
+    operId = serializers.IntegerField(source='oper_id', read_only=True)
+    operName = serializers.CharField(source='oper_name')
+    requestMethod = serializers.CharField(source='request_method')
+    operUrl = serializers.CharField(source='oper_url')
+    method = serializers.CharField()
+    operIp = serializers.CharField(source='oper_ip')
+    operParam = serializers.CharField(source='oper_param')
+    status = serializers.IntegerField()
+    costTime = serializers.IntegerField(source='cost_time')
+    operTime = serializers.DateTimeField(source='oper_time', format='%Y-%m-%d %H:%M:%S')
+
+    class Meta:
+        model = OperLog
+        fields = ['operId', 'operName', 'requestMethod', 'operUrl', 'method', 'operIp', 'operParam', 'status', 'costTime', 'operTime']
@@ -0,0 +1,298 @@
+import functools
+import os
+import platform
+import shutil
+import socket
+import sys
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections
+
+from .metrics import PROCESS_START_TIME, registry
+
+# 本地文件系统类型，服务器监控只列出这些挂载点
+LOCAL_FS_TYPES = {'ext2', 'ext3', 'ext4', 'xfs', 'btrfs', 'zfs', 'overlay', 'apfs', 'ntfs', 'vfat', 'f2fs'}
+
+_lock = threading.Lock()
+_cpu_sample = None
+_cached = (0.0, None)
+
+
+def _read(path):
+    try:
+        with open(path) as fp:
+            return fp.read()
+    except OSError:
+        return None
+
+
+def _meminfo(path='/proc/meminfo'):
+    text = _read(path)
+    if not text:
+        return {}
+    info = {}
+    for line in text.splitlines():
+        name, _, rest = line.partition(':')
+        parts = rest.split()
+        if parts and parts[0].isdigit():
+            info[name] = int(parts[0]) * 1024
+    return info
+
+
+def _round(value, digits=2):
+    return round(value, digits)
+
+
+def file_size(num):
+    """字节数转为可读字符串（与前端服务监控页一致，如 12.3 GB）。"""
+    for unit in ('B', 'KB', 'MB', 'GB', 'TB'):
+        if num < 1024 or unit == 'TB':
+            return f'{num:.1f} {unit}' if unit != 'B' else f'{num} B'
+        num /= 1024
+
+
+def duration_text(seconds):
+    days, rest = divmod(int(seconds), 86400)
+    hours, rest = divmod(rest, 3600)
+    return f'{days}天{hours}小时{rest // 60}分钟'
+
+
+def cpu_info():
+    """
+    CPU 使用率：取 /proc/stat 与上次采样之间的差值（首次为开机以来的平均值），无需为采样而等待。
+    """
+    global _cpu_sample
+    text = _read('/proc/stat')
+    data = {'cpuNum': os.cpu_count() or 1, 'total': 0, 'sys': 0, 'used': 0, 'wait': 0, 'free': 0}
+    if not text:
+        load = os.getloadavg()[0] if hasattr(os, 'getloadavg') else 0
+        data['used'] = _round(min(load / data['cpuNum'], 1) * 100)
+        data['free'] = _round(100 - data['used'])
+        return data
+    ticks = [int(v) for v in text.splitlines()[0].split()[1:9]]
+    user, nice, system, idle, iowait, irq, softirq, steal = ticks + [0] * (8 - len(ticks))
+    current = (user + nice, system + irq + softirq, iowait, idle, sum(ticks))
+    with _lock:
+        previous, _cpu_sample = _cpu_sample, current
+    if previous and current[4] > previous[4]:
+        delta = [c - p for c, p in zip(current, previous)]
+    else:
+        delta = list(current)
+    total = delta[4] or 1
+    data.update({
+        'total': delta[4],
+        'used': _round(delta[0] * 100 / total),
+        'sys': _round(delta[1] * 100 / total),
+        'wait': _round(delta[2] * 100 / total),
+        'free': _round(delta[3] * 100 / total),
+    })
+    return data
+
+
+def mem_info():
+    info = _meminfo()
+    total = info.get('MemTotal', 0)
+    free = info.get('MemAvailable', info.get('MemFree', 0))
+    used = total - free
+    gb = 1024 ** 3
+    return {
+        'total': _round(total / gb),
+        'used': _round(used / gb),
+        'free': _round(free / gb),
+        'usage': _round(used * 100 / total) if total else 0,
+    }
+
+
+def process_status():
+    info = {}
+    text = _read('/proc/self/status') or ''
+    for line in text.splitlines():
+        name, _, rest = line.partition(':')
+        info[name] = rest.strip()
+    return info
+
+
+def _kb(value):
+    try:
+        return int(value.split()[0]) * 1024
+    except (AttributeError, IndexError, ValueError):
+        return 0
+
+
+def runtime_info(status):
+    """Python 运行时，对应前端“JVM”卡片：总内存取峰值常驻内存，已用为当前常驻内存（MB）。"""
+    rss = _kb(status.get('VmRSS'))
+    peak = _kb(status.get('VmHWM')) or rss
+    mb = 1024 ** 2
+    return {
+        'name': f'{platform.python_implementation()} {platform.python_version()}',
+        'version': platform.python_version(),
+        'home': sys.executable,
+        'startTime': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(PROCESS_START_TIME)),
+        'runTime': duration_text(time.time() - PROCESS_START_TIME),
+        'inputArgs': ' '.join(sys.argv),
+        'total': _round(peak / mb),
+        'used': _round(rss / mb),
+        'free': _round((peak - rss) / mb),
+        'usage': _round(rss * 100 / peak) if peak else 0,
+    }
+
+
+@functools.lru_cache(maxsize=None)
+def sys_info():
+    """主机信息，进程内只读取一次（避免每次采样解析主机名）。"""
+    name = socket.gethostname()
+    try:
+        ip = socket.gethostbyname(name)
+    except OSError:
+        ip = '127.0.0.1'
+    return {
+        'computerName': name,
+        'computerIp': ip,
+        'osName': f'{platform.system()} {platform.release()}',
+        'osArch': platform.machine(),
+        'userDir': str(settings.BASE_DIR),
+    }
+
+
+def _mounts():
+    text = _read('/proc/mounts')
+    if not text:
+        return [('/', 'local')]
+    seen = set()
+    mounts = []
+    for line in text.splitlines():
+        parts = line.split()
+        if len(parts) < 3 or parts[2] not in LOCAL_FS_TYPES or parts[1] in seen:
+            continue
+        seen.add(parts[1])
+        mounts.append((parts[1], parts[2]))
+    return mounts or [('/', 'local')]
+
+
+def sys_files():
+    rows = []
+    for path, fs_type in _mounts():
+        try:
+            usage = shutil.disk_usage(path)
+        except OSError:
+            continue
+        rows.append({
+            'dirName': path,
+            'sysTypeName': fs_type,
+            'typeName': path,
+            'total': file_size(usage.total),
+            'free': file_size(usage.free),
+            'used': file_size(usage.used),
+            'usage': _round(usage.used * 100 / usage.total) if usage.total else 0,
+        })
+    return rows
+
+
+def process_info(status):
+    try:
+        fds = len(os.listdir('/proc/self/fd'))
+    except OSError:
+        fds = None
+    cpu = os.times()
+    return {
+        'pid': os.getpid(),
+        'rss': _kb(status.get('VmRSS')),
+        'threads': int(status['Threads']) if status.get('Threads', '').isdigit() else threading.active_count(),
+        'pythonThreads': threading.active_count(),
+        'openFiles': fds,
+        'cpuSeconds': _round(cpu.user + cpu.system),
+        'uptime': int(time.time() - PROCESS_START_TIME),
+    }
+
+
+def _size(path):
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+def database_info():
+    """各数据库：SQLite 的库文件与 WAL 大小，以及当前线程连接的已存活秒数（未连接为 None）。"""
+    rows = []
+    for alias in connections:
+        conn = connections[alias]
+        row = {'alias': alias, 'vendor': conn.vendor, 'connMaxAge': conn.settings_dict.get('CONN_MAX_AGE')}
+        if conn.vendor == 'sqlite':
+            name = str(conn.settings_dict['NAME'])
+            row.update({'file': name, 'fileSize': _size(name), 'walSize': _size(f'{name}-wal')})
+        created = getattr(conn, 'created_at', None)
+        row['connectionAge'] = int(time.monotonic() - created) if conn.connection is not None and created else None
+        rows.append(row)
+    return rows
+
+
+def cache_info():
+    totals = registry.counter_totals('app_cache_requests_total')
+    hits = totals.get((('result', 'hit'),), 0)
+    misses = totals.get((('result', 'miss'),), 0)
+    rows = []
+    for alias in settings.CACHES:
+        backend = caches[alias]
+        row = {'alias': alias, 'backend': type(backend).__name__}
+        # LocMemCache 可直接读取条目数；其他后端无此信息
+        store = getattr(backend, '_cache', None)
+        if isinstance(store, dict):
+            row['entries'] = len(store)
+            row['maxEntries'] = getattr(backend, '_max_entries', None)
+        rows.append(row)
+    return {
+        'caches': rows,
+        'hits': hits,
+        'misses': misses,
+        'hitRatio': _round(hits * 100 / (hits + misses)) if hits + misses else None,
+    }
+
+
+def queue_info():
+    from .common import get_login_log_writer, get_oper_log_writer
+    from .tracing import exporter
+    return {
+        'operLog': get_oper_log_writer().stats(),
+        'loginLog': get_login_log_writer().stats(),
+        'traceExport': {'pending': exporter.queue.qsize(), 'dropped': exporter.dropped},
+    }
+
+
+def note_connection_created(connection):
+    connection.created_at = time.monotonic()
+
+
+def collect():
+    status = process_status()
+    return {
+        'cpu': cpu_info(),
+        'mem': mem_info(),
+        'jvm': runtime_info(status),
+        'sys': sys_info(),
+        'sysFiles': sys_files(),
+        'process': process_info(status),
+        'database': database_info(),
+        'cache': cache_info(),
+        'queues': queue_info(),
+        'uptime': {
+            'process': int(time.time() - PROCESS_START_TIME),
+            'system': int(float((_read('/proc/uptime') or '0').split()[0])),
+        },
+    }
+
+
+def snapshot():
+    """服务器监控数据；SERVER_MONITOR_CACHE_SECONDS 内的重复轮询直接返回上次结果。"""
+    global _cached
+    ttl = getattr(settings, 'SERVER_MONITOR_CACHE_SECONDS', 2)
+    taken, data = _cached
+    if data is not None and time.monotonic() - taken < ttl:
+        return data
+    data = collect()
+    _cached = (time.monotonic(), data)
+    return data
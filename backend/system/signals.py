@@ -0,0 +1,33 @@
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from . import metrics, server_monitor, slowquery, tracing
+from .common import bump_model_version
+
+
+@receiver(post_save)
+def bump_version_on_save(sender, **kwargs):
+    # 只监听 post_save：若挂 post_delete，关联表的 QuerySet.delete() 将无法走单条 DELETE 的快速删除
+    if sender._meta.app_label == 'system':
+        bump_model_version(sender)
+
+
+@receiver(connection_created)
+def install_slow_query_log(sender, connection, **kwargs):
+    slowquery.install(connection)
+
+
+@receiver(connection_created)
+def install_query_metrics(sender, connection, **kwargs):
+    metrics.install(connection)
+
+
+@receiver(connection_created)
+def install_query_tracing(sender, connection, **kwargs):
+    tracing.install(connection)
+
+
+@receiver(connection_created)
+def note_connection_created(sender, connection, **kwargs):
+    server_monitor.note_connection_created(connection)
@@ -0,0 +1,125 @@
+import contextvars
+import hashlib
+import logging
+import threading
+import time
+
+from django.conf import settings
+
+from .profiling import sql_shape
+
+logger = logging.getLogger('system.slowquery')
+
+# 当前请求所在的视图/动作，由 QueryContextMiddleware 设置，用于把慢 SQL 归属到调用方
+current_view = contextvars.ContextVar('current_view', default='-')
+
+
+def fingerprint(shape):
+    return hashlib.sha1(shape.encode()).hexdigest()[:12]
+
+
+class SlowQueryStats:
+    """
+    慢 SQL 按指纹（规范化 SQL 形状）在内存中聚合：次数、总耗时、最大耗时及触发的视图。
+    指纹数超过上限后新形状只计入 overflow；dump() 输出当前窗口并清零。
+    """
+    def __init__(self, max_fingerprints=500):
+        self.max_fingerprints = max_fingerprints
+        self._stats = {}
+        self._overflow = 0
+        self._since = time.time()
+        self._lock = threading.Lock()
+        self._dumper = None
+
+    def record(self, sql, duration, view):
+        shape = sql_shape(sql)
+        key = fingerprint(shape)
+        with self._lock:
+            item = self._stats.get(key)
+            if item is None:
+                if len(self._stats) >= self.max_fingerprints:
+                    self._overflow += 1
+                    return key
+                item = self._stats[key] = {
+                    'fingerprint': key, 'sql': shape, 'count': 0, 'totalMs': 0.0, 'maxMs': 0.0, 'views': {},
+                }
+            ms = duration * 1000
+            item['count'] += 1
+            item['totalMs'] += ms
+            item['maxMs'] = max(item['maxMs'], ms)
+            item['views'][view] = item['views'].get(view, 0) + 1
+        return key
+
+    def snapshot(self, reset=False):
+        """按总耗时降序返回当前窗口的聚合结果。"""
+        with self._lock:
+            rows = [dict(item, views=dict(item['views'])) for item in self._stats.values()]
+            result = {'since': self._since, 'overflow': self._overflow}
+            if reset:
+                self._stats = {}
+                self._overflow = 0
+                self._since = time.time()
+        for row in rows:
+            row['totalMs'] = round(row['totalMs'], 1)
+            row['maxMs'] = round(row['maxMs'], 1)
+            row['avgMs'] = round(row['totalMs'] / row['count'], 1)
+        rows.sort(key=lambda r: r['totalMs'], reverse=True)
+        result['rows'] = rows
+        return result
+
+    def dump(self, top=20):
+        """把当前窗口按总耗时排名前 top 的指纹写入日志并清零。"""
+        data = self.snapshot(reset=True)
+        for row in data['rows'][:top]:
+            logger.info(
+                '慢 SQL 汇总 %s 次数=%d 总耗时=%.1fms 最大=%.1fms 视图=%s SQL=%s',
+                row['fingerprint'], row['count'], row['totalMs'], row['maxMs'], row['views'], row['sql'],
+            )
+        if data['overflow']:
+            logger.info('慢 SQL 汇总：%d 条因指纹数超限未聚合', data['overflow'])
+        return data
+
+    def ensure_dumper(self):
+        interval = getattr(settings, 'SLOW_QUERY_DUMP_INTERVAL', 300)
+        if not interval or (self._dumper is not None and self._dumper.is_alive()):
+            return
+        with self._lock:
+            if self._dumper is not None and self._dumper.is_alive():
+                return
+            self._dumper = threading.Thread(target=self._dump_loop, args=(interval,), name='slow-query-dump', daemon=True)
+            self._dumper.start()
+
+    def _dump_loop(self, interval):
+        while True:
+            time.sleep(interval)
+            try:
+                if self._stats or self._overflow:
+                    self.dump()
+            except Exception:
+                logger.exception('慢 SQL 汇总输出失败')
+
+
+slow_query_stats = SlowQueryStats(getattr(settings, 'SLOW_QUERY_MAX_FINGERPRINTS', 500))
+
+
+def slow_query_wrapper(execute, sql, params, many, context):
+    """数据库执行包装：耗时超过 SLOW_QUERY_MS 的语句单独记日志并按指纹聚合。"""
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration = time.perf_counter() - start
+        threshold = getattr(settings, 'SLOW_QUERY_MS', None)
+        if threshold is not None and duration * 1000 >= threshold:
+            view = current_view.get()
+            key = slow_query_stats.record(sql, duration, view)
+            slow_query_stats.ensure_dumper()
+            logger.warning('慢 SQL %s %.1fms 视图=%s SQL=%s', key, duration * 1000, view, sql[:1000])
+
+
+def install(connection):
+    """为新建的数据库连接挂上慢 SQL 包装（连接重连时不重复挂载）。"""
+    if getattr(settings, 'SLOW_QUERY_MS', None) is None:
+        return
+    if slow_query_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, slow_query_wrapper)
@@ -1,3 +1,863 @@
-from django.test import TestCase
+import datetime
+import decimal
+import gzip
+import io
+import threading
+import time
+import uuid
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import ProtectedError
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework.renderers import JSONRenderer
+from rest_framework.permissions import BasePermission, IsAuthenticated
+from rest_framework.test import APIClient
+
+from . import metrics, profiling, request_profiler, server_monitor, tracing
+from .common import get_login_log_writer, get_oper_log_writer, model_version
+from .compression import brotli, compress_body
+from .error_telemetry import CLIENT, SERVER, ErrorGroups, classify
+from .parsers import FastJSONParser
+from .renderers import FastJSONRenderer
+from .slowquery import SlowQueryStats
+from .models import Config, LoginInforDaily, Dept, DictData, DictType, Menu, OperLog, Role, RoleMenu, User, UserRole
+from .partitions import AUDIT_PARTITIONS, month_key, oper_log_partitions
+from .views.batch import BatchView
+from .views.core import BaseViewSet
+from .views.user import UserViewSet
+
+
+class AdminClientMixin:
+    """以 admin 角色用户强制认证，每个用例前清空缓存（列表缓存与模型写版本）。"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='admin', password='admin123')
+        self.admin_role = Role.objects.create(role_name='超级管理员', role_key='admin')
+        UserRole.objects.create(user=self.user, role=self.admin_role)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+
+@override_settings(OPER_LOG_ENABLED=False, CACHE_SINGLE_PROCESS=True)
+class ApiTestCase(AdminClientMixin, TestCase):
+    """接口测试基类。"""
+
+    def commit(self, method, url, data=None):
+        """发起写请求并执行事务提交回调（模型写版本在 on_commit 中递增）。"""
+        with self.captureOnCommitCallbacks(execute=True):
+            return getattr(self.client, method)(url, data, format='json')
+
+
+@override_settings(OPER_LOG_ENABLED=False, CACHE_SINGLE_PROCESS=True)
+class AuditTestCase(AdminClientMixin, TransactionTestCase):
+    """审计日志测试基类：SQLite 不能在事务内建表，分区表测试不包在事务中，结束后删除全部分区。"""
+
+    def tearDown(self):
+        for table in AUDIT_PARTITIONS:
+            table.drop_before(999999)
+        super().tearDown()
+
+    def drain(self, writer, timeout=5):
+        """等待异步写入器把已提交的记录全部落库（后台线程可能持有一批尚未写入的记录）。"""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            writer.flush()
+            stats = writer.stats()
+            if stats['written'] + stats['failed'] >= stats['submitted']:
+                self.assertEqual(stats['failed'], 0)
+                return
+            time.sleep(0.02)
+        self.fail('异步写入超时')
+
+
+class ProjectionTests(ApiTestCase):
+    """只读投影（ReadOnlyProjection）与 DRF 序列化器的输出须逐字节一致，含 ?fields= 裁剪字段。"""
+
+    def setUp(self):
+        super().setUp()
+        depts = [Dept.objects.create(dept_name=f'部门{i}', parent_id=0 if i == 0 else 1) for i in range(4)]
+        roles = [Role.objects.create(role_name=f'角色{i}', role_key=f'r{i}', menu_check_strictly=i % 2) for i in range(3)]
+        self.role = roles[1]
+        for i in range(30):
+            user = User.objects.create(
+                username=f'u{i}', nick_name=None if i % 4 else f'用户{i}', email=f'u{i}@example.com',
+                dept_id=depts[i % 4].dept_id if i % 5 else None,
+            )
+            if i % 3:
+                UserRole.objects.create(user=user, role=roles[i % 3])
+        DictType.objects.create(dict_name='性别', dict_type='sex')
+        for i in range(5):
+            DictData.objects.create(dict_label=f'标签{i}', dict_value=str(i), dict_type='sex', remark='备注')
+            Config.objects.create(config_name=f'参数{i}', config_key=f'key.{i}', config_value='v')
+            Menu.objects.create(menu_name=f'菜单{i}', parent_id=0, order_num=i)
+
+    def render(self, url, use_projection):
+        cache.clear()
+        with mock.patch.object(BaseViewSet, 'use_projection', use_projection):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, url)
+        return response.content
+
+    def test_projection_matches_serializer(self):
+        urls = [
+            '/system/user/list?pageSize=20',
+            '/system/user/list?pageSize=20&pageNum=2',
+            '/system/user/list?fields=userId,dept,roles',
+            '/system/user/list?fields=userName',
+            '/system/role/list',
+            '/system/dict/data/list',
+            '/system/dict/type/list',
+            '/system/config/list',
+            '/system/menu/list',
+            '/system/dept/list',
+            '/system/dept/list?fields=deptName,remark',
+            f'/system/role/authUser/allocatedList?roleId={self.role.role_id}',
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertEqual(self.render(url, False), self.render(url, True))
+
+
+class ETagTests(ApiTestCase):
+    """条件 GET：批量写入须递增模型写版本，使 ETag 失效；未变化时返回 304。"""
+
+    def setUp(self):
+        super().setUp()
+        self.users = [User.objects.create(username=f'u{i}') for i in range(3)]
+
+    def change_status(self):
+        self.commit('put', '/system/user/changeStatus', {'userIds': [u.id for u in self.users], 'status': '1'})
+
+    def test_bulk_write_bumps_model_version(self):
+        before = model_version(User)
+        self.change_status()
+        self.assertNotEqual(model_version(User), before)
+
+    def test_bulk_write_invalidates_etag(self):
+        url = f'/system/user/{self.users[0].id}'
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.change_status()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_routers_etag(self):
+        Menu.objects.create(menu_name='系统', parent_id=0, order_num=1, path='system', menu_type='M')
+        etag = self.client.get('/getRouters')['ETag']
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get('/getRouters', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        with self.captureOnCommitCallbacks(execute=True):
+            Menu.objects.create(menu_name='监控', parent_id=0, order_num=2, path='monitor', menu_type='M')
+        self.assertEqual(self.client.get('/getRouters', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class ListCacheTests(ApiTestCase):
+    """列表响应缓存：命中时不查询数据库，批量写入后失效；进程内缓存且非单进程运行时不启用。"""
+    url = '/system/user/list?pageSize=10'
+
+    def setUp(self):
+        super().setUp()
+        self.users = [User.objects.create(username=f'u{i}') for i in range(3)]
+
+    def assertQueried(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        self.assertTrue(queries.captured_queries)
+        return response
+
+    def test_cache_hit(self):
+        first = self.client.get(self.url)
+        with self.assertNumQueries(0):
+            second = self.client.get(self.url)
+        self.assertEqual(first.content, second.content)
+        # 参数顺序与空值不影响缓存键
+        with self.assertNumQueries(0):
+            self.client.get('/system/user/list?status=&pageSize=10')
+
+    def test_bulk_write_invalidates(self):
+        self.client.get(self.url)
+        self.commit('put', '/system/user/changeStatus', {'userIds': [u.id for u in self.users], 'status': '1'})
+        rows = {row['userName']: row['status'] for row in self.assertQueried().json()['rows']}
+        self.assertEqual([rows[u.username] for u in self.users], ['1', '1', '1'])
+        ids = ','.join(str(u.id) for u in self.users[:2])
+        self.commit('delete', f'/system/user/{ids}')
+        self.assertQueried()
+
+    @override_settings(CACHE_SINGLE_PROCESS=False)
+    def test_requires_shared_backend(self):
+        self.client.get(self.url)
+        self.assertQueried()
+
+
+class AuthUserByFilterTests(ApiTestCase):
+    """按筛选条件批量授权/取消授权，返回实际影响的行数。"""
+
+    def setUp(self):
+        super().setUp()
+        self.dept = Dept.objects.create(dept_name='研发部', parent_id=0)
+        for i in range(10):
+            User.objects.create(username=f'u{i}', status=str(i % 2), dept_id=self.dept.dept_id if i < 6 else None)
+        self.role = Role.objects.create(role_name='测试', role_key='test')
+        UserRole.objects.create(user=User.objects.get(username='u0'), role=self.role)
+
+    def test_select_by_filter(self):
+        url = f'/system/role/authUser/selectByFilter?roleId={self.role.role_id}&deptId={self.dept.dept_id}'
+        response = self.client.put(url, format='json')
+        self.assertEqual(response.json()['data']['affected'], 5)
+        self.assertEqual(UserRole.objects.filter(role=self.role).count(), 6)
+        # 已授权的用户不会重复插入
+        self.assertEqual(self.client.put(url, format='json').json()['data']['affected'], 0)
+
+    def test_select_by_filter_body(self):
+        body = {'roleId': self.role.role_id, 'status': '1'}
+        response = self.client.put('/system/role/authUser/selectByFilter', body, format='json')
+        self.assertEqual(response.json()['data']['affected'], 5)
+
+    def test_cancel_by_filter(self):
+        self.client.put(f'/system/role/authUser/selectByFilter?roleId={self.role.role_id}', format='json')
+        self.assertEqual(UserRole.objects.filter(role=self.role).count(), 11)
+        body = {'roleId': self.role.role_id, 'deptId': self.dept.dept_id, 'status': '0'}
+        response = self.client.put('/system/role/authUser/cancelByFilter', body, format='json')
+        self.assertEqual(response.json()['data']['affected'], 3)
+        self.assertEqual(UserRole.objects.filter(role=self.role).count(), 8)
+
+    def test_missing_role(self):
+        response = self.client.put('/system/role/authUser/cancelByFilter', {'roleId': 999}, format='json')
+        self.assertEqual(response.status_code, 404)
+
+
+class AuthUserListTests(ApiTestCase):
+    """角色已授权/未授权用户列表：EXISTS 子查询划分用户，?lastId= 走主键游标分页。"""
+
+    def setUp(self):
+        super().setUp()
+        self.role = Role.objects.create(role_name='测试', role_key='test')
+        self.users = [User.objects.create(username=f'u{i}') for i in range(7)]
+        for user in self.users[:5]:
+            UserRole.objects.create(user=user, role=self.role)
+
+    def url(self, name, **params):
+        query = '&'.join(f'{k}={v}' for k, v in {'roleId': self.role.role_id, **params}.items())
+        return f'/system/role/authUser/{name}?{query}'
+
+    def test_allocated_and_unallocated(self):
+        allocated = self.client.get(self.url('allocatedList')).json()
+        self.assertEqual(allocated['total'], 5)
+        unallocated = {row['userName'] for row in self.client.get(self.url('unallocatedList')).json()['rows']}
+        self.assertEqual(unallocated, {'admin', 'u5', 'u6'})
+
+    def test_keyset_paging(self):
+        seen = []
+        last_id = ''
+        while True:
+            data = self.client.get(self.url('allocatedList', lastId=last_id, pageSize=2)).json()
+            self.assertNotIn('total', data)
+            seen.extend(row['userId'] for row in data['rows'])
+            if data['nextId'] is None:
+                break
+            last_id = data['nextId']
+        self.assertEqual(seen, sorted((u.id for u in self.users[:5]), reverse=True))
+
+    def test_missing_role_id(self):
+        response = self.client.get('/system/role/authUser/allocatedList')
+        self.assertEqual(response.status_code, 400)
+
+
+class UserAuthRoleTests(ApiTestCase):
+    """用户授权角色：查询时标记已授权角色，更新时按差量增删 UserRole。"""
+
+    def setUp(self):
+        super().setUp()
+        self.target = User.objects.create(username='u1')
+        self.roles = [Role.objects.create(role_name=f'角色{i}', role_key=f'r{i}') for i in range(3)]
+        for role in self.roles[:2]:
+            UserRole.objects.create(user=self.target, role=role)
+
+    def test_get_auth_role_flags(self):
+        data = self.client.get(f'/system/user/authRole/{self.target.id}').json()['data']
+        flags = {row['roleId']: row['flag'] for row in data['roles']}
+        self.assertEqual([flags[r.role_id] for r in self.roles], [True, True, False])
+
+    def test_update_auth_role_by_diff(self):
+        kept = UserRole.objects.get(user=self.target, role=self.roles[1]).pk
+        body = {'userId': self.target.id, 'roleIds': [self.roles[1].role_id, self.roles[2].role_id, 9999]}
+        self.assertEqual(self.client.put('/system/user/authRole', body, format='json').json()['code'], 200)
+        rows = dict(UserRole.objects.filter(user=self.target).values_list('role_id', 'pk'))
+        self.assertEqual(set(rows), {self.roles[1].role_id, self.roles[2].role_id})
+        # 保留的授权不删除重建
+        self.assertEqual(rows[self.roles[1].role_id], kept)
+
+    def test_update_auth_role_clear(self):
+        self.client.put('/system/user/authRole', {'userId': self.target.id, 'roleIds': []}, format='json')
+        self.assertFalse(UserRole.objects.filter(user=self.target).exists())
+        response = self.client.put('/system/user/authRole', {'userId': 9999, 'roleIds': []}, format='json')
+        self.assertEqual(response.status_code, 404)
+
+
+class RoleUpdateTests(ApiTestCase):
+    """角色修改：只更新请求中出现的字段，菜单关联按差量同步。"""
+
+    def setUp(self):
+        super().setUp()
+        self.menus = [Menu.objects.create(menu_name=f'菜单{i}', parent_id=0) for i in range(4)]
+        self.role = Role.objects.create(role_name='测试', role_key='test', status='1', remark='备注')
+        for menu in self.menus[:2]:
+            RoleMenu.objects.create(role=self.role, menu=menu)
+
+    def put(self, **extra):
+        body = {'roleId': self.role.role_id, 'roleName': '测试', 'roleKey': 'test', **extra}
+        return self.client.put(f'/system/role/{self.role.role_id}', body, format='json')
+
+    def menu_rows(self):
+        return dict(RoleMenu.objects.filter(role=self.role).values_list('menu_id', 'pk'))
+
+    def test_sync_menus_by_diff(self):
+        kept = self.menu_rows()[self.menus[1].menu_id]
+        self.menus[3].del_flag = '1'
+        self.menus[3].save()
+        ids = [self.menus[1].menu_id, self.menus[2].menu_id, self.menus[3].menu_id]
+        self.assertEqual(self.put(menuIds=ids).json()['code'], 200)
+        rows = self.menu_rows()
+        # 已删除的菜单不关联，保留的关联不删除重建
+        self.assertEqual(set(rows), {self.menus[1].menu_id, self.menus[2].menu_id})
+        self.assertEqual(rows[self.menus[1].menu_id], kept)
+
+    def test_omitted_fields_unchanged(self):
+        before = self.menu_rows()
+        self.put(roleName='改名')
+        self.role.refresh_from_db()
+        self.assertEqual((self.role.role_name, self.role.status, self.role.remark), ('改名', '1', '备注'))
+        self.assertEqual(self.menu_rows(), before)
+
+    def test_clear_menus(self):
+        self.put(menuIds=[])
+        self.assertEqual(self.menu_rows(), {})
+
+
+class UserListQueryTests(ApiTestCase):
+    """用户列表附带部门与角色，查询条数不随每页条数增长（无 N+1）。"""
+
+    def setUp(self):
+        super().setUp()
+        depts = [Dept.objects.create(dept_name=f'部门{i}', parent_id=0) for i in range(3)]
+        roles = [Role.objects.create(role_name=f'角色{i}', role_key=f'r{i}') for i in range(3)]
+        for i in range(40):
+            user = User.objects.create(username=f'u{i}', dept_id=depts[i % 3].dept_id)
+            UserRole.objects.create(user=user, role=roles[i % 3])
+            UserRole.objects.create(user=user, role=roles[(i + 1) % 3])
+
+    def count_queries(self, url):
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries.captured_queries), response.json()['rows']
+
+    def test_constant_queries(self):
+        small, _ = self.count_queries('/system/user/list?pageSize=5')
+        large, rows_large = self.count_queries('/system/user/list?pageSize=40')
+        self.assertEqual(small, large)
+        self.assertEqual(len(rows_large), 40)
+        row = next(r for r in rows_large if r['userName'] == 'u1')
+        self.assertEqual(row['dept']['deptName'], '部门1')
+        self.assertEqual(len(row['roles']), 2)
+
+    def test_detail_includes_dept_and_roles(self):
+        user = User.objects.get(username='u2')
+        data = self.client.get(f'/system/user/{user.id}').json()['data']
+        self.assertEqual(data['dept']['deptName'], '部门2')
+        self.assertEqual(len(data['roles']), 2)
+
+
+@override_settings(OPER_LOG_ENABLED=False, CACHE_SINGLE_PROCESS=True)
+class BatchTests(AdminClientMixin, TransactionTestCase):
+    """
+    批量接口：逐项返回状态与响应体，写请求按顺序执行，拒绝嵌套批量请求。
+    并发的读子请求在工作线程中使用各自的数据库连接，测试不包在事务中。
+    """
+
+    def post(self, *requests):
+        response = self.client.post('/batch', {'requests': list(requests)}, format='json')
+        self.assertEqual(response.status_code, 200)
+        return response.json()['data']
+
+    def test_per_item_status(self):
+        data = self.post(
+            {'path': '/getInfo'},
+            {'method': 'PUT', 'path': '/system/user/changeStatus', 'body': {'userId': self.user.id, 'status': '1'}},
+            {'path': f'/system/user/{self.user.id}'},
+            {'path': '/nope'},
+            {'path': '/batch'},
+            {'path': '/system/user/99999'},
+        )
+        self.assertEqual([item['status'] for item in data], [200, 200, 200, 404, 400, 200])
+        self.assertEqual(data[0]['body']['user']['userName'], 'admin')
+        # 写请求之后的读取能看到写入结果
+        self.assertEqual(data[2]['body']['data']['status'], '1')
+        self.assertEqual(data[4]['body']['msg'], '不支持嵌套批量请求')
+        self.assertEqual(data[5]['body']['code'], 404)
+
+    def test_empty_batch(self):
+        response = self.client.post('/batch', {'requests': []}, format='json')
+        self.assertEqual(response.json()['code'], 400)
+
+    @override_settings(REQUEST_PROFILING=True)
+    def test_threaded_reads_keep_request_context(self):
+        seen = []
+        dispatch = BatchView.dispatch_sub
+
+        def spy(view, request, sub):
+            seen.append(profiling.current_profile.get() is not None)
+            return dispatch(view, request, sub)
+
+        with mock.patch.object(BatchView, 'dispatch_sub', spy):
+            data = self.post({'path': '/getInfo'}, {'path': '/getRouters'}, {'path': '/system/user/list'})
+        self.assertEqual([item['status'] for item in data], [200, 200, 200])
+        self.assertEqual(seen, [True, True, True])
+
+
+class UserBulkTests(ApiTestCase):
+    """按用户 id 批量删除、修改状态与重置密码。"""
+
+    def setUp(self):
+        super().setUp()
+        self.users = [User.objects.create(username=f'u{i}') for i in range(5)]
+        self.ids = [u.id for u in self.users]
+
+    def test_bulk_delete(self):
+        ids = ','.join(str(i) for i in self.ids[:3])
+        response = self.client.delete(f'/system/user/{ids}')
+        self.assertEqual(response.json()['code'], 200)
+        flags = dict(User.objects.filter(id__in=self.ids).values_list('id', 'del_flag'))
+        self.assertEqual([flags[i] for i in self.ids], ['1', '1', '1', '0', '0'])
+        self.assertEqual(User.objects.get(id=self.ids[0]).update_by, 'admin')
+        # 已删除的 id 视为不存在
+        response = self.client.delete(f'/system/user/{self.ids[0]},{self.ids[3]}')
+        self.assertEqual(response.status_code, 404)
+
+    def test_bulk_delete_partial_match(self):
+        response = self.client.delete(f'/system/user/{self.ids[0]},9998,9999')
+        self.assertEqual(response.status_code, 404)
+        self.assertIn('9998,9999', response.json()['msg'])
+        self.assertEqual(User.objects.get(id=self.ids[0]).del_flag, '0')
+
+    def test_bulk_delete_checks_object_permissions(self):
+        class DenyFirst(BasePermission):
+            def has_object_permission(self, request, view, obj):
+                return obj.username != 'u0'
+
+        with mock.patch.object(UserViewSet, 'permission_classes', [IsAuthenticated, DenyFirst]):
+            response = self.client.delete(f'/system/user/{self.ids[0]},{self.ids[1]}')
+        self.assertEqual(response.json()['code'], 403)
+        self.assertFalse(User.objects.filter(id__in=self.ids[:2], del_flag='1').exists())
+
+    def test_change_status(self):
+        body = {'userIds': self.ids[:4], 'status': '1'}
+        self.assertEqual(self.client.put('/system/user/changeStatus', body, format='json').json()['code'], 200)
+        statuses = dict(User.objects.filter(id__in=self.ids).values_list('id', 'status'))
+        self.assertEqual([statuses[i] for i in self.ids], ['1', '1', '1', '1', '0'])
+        # 兼容单个 userId
+        self.client.put('/system/user/changeStatus', {'userId': self.ids[0], 'status': '0'}, format='json')
+        self.assertEqual(User.objects.get(id=self.ids[0]).status, '0')
+        response = self.client.put('/system/user/changeStatus', {'userId': 9999, 'status': '0'}, format='json')
+        self.assertEqual(response.status_code, 404)
+
+    def test_reset_password(self):
+        body = {'userIds': self.ids[:3], 'password': 'secret123'}
+        self.assertEqual(self.client.put('/system/user/resetPwd', body, format='json').json()['code'], 200)
+        users = {u.id: u for u in User.objects.filter(id__in=self.ids)}
+        self.assertTrue(all(users[i].check_password('secret123') for i in self.ids[:3]))
+        self.assertFalse(users[self.ids[3]].check_password('secret123'))
+        # 每个用户独立加盐
+        self.assertEqual(len({users[i].password for i in self.ids[:3]}), 3)
+        self.client.put('/system/user/resetPwd', {'userId': self.ids[4], 'password': 'other123'}, format='json')
+        self.assertTrue(User.objects.get(id=self.ids[4]).check_password('other123'))
+
+
+class CompressionTests(TestCase):
+    """响应压缩：gzip 与 br 都带随机长度填充（缓解 BREACH），且可正确解压。"""
+    body = b'{"code":200,"msg":"ok","token":"secret"}' * 100
+
+    def test_gzip_padding(self):
+        sizes = {len(compress_body(self.body, 'gzip', 100)) for _ in range(20)}
+        self.assertGreater(len(sizes), 1)
+        self.assertEqual(gzip.decompress(compress_body(self.body, 'gzip', 100)), self.body)
+
+    def test_brotli_padding(self):
+        if brotli is None:
+            self.skipTest('未安装 brotli')
+        sizes = set()
+        for _ in range(20):
+            compressed = compress_body(self.body, 'br', 100)
+            self.assertEqual(brotli.decompress(compressed), self.body)
+            sizes.add(len(compressed))
+        self.assertGreater(len(sizes), 1)
+        self.assertEqual(brotli.decompress(compress_body(self.body, 'br')), self.body)
+
+
+@override_settings(OPER_LOG_ENABLED=True)
+class OperLogTests(AuditTestCase):
+    """操作日志：审计接口经异步写入器写入当月分区，请求参数中的密码脱敏。"""
+
+    def test_audited_request_logged(self):
+        target = User.objects.create(username='u1')
+        body = {'userId': target.id, 'password': 'secret123'}
+        self.assertEqual(self.client.put('/system/user/resetPwd', body, format='json').json()['code'], 200)
+        self.client.put('/system/user/changeStatus', {'userId': 9999, 'status': '1'}, format='json')
+        self.drain(get_oper_log_writer())
+        rows = self.client.get('/monitor/operlog/list?operName=admin').json()['rows']
+        logs = {row['method']: row for row in rows}
+        self.assertEqual(logs['UserViewSet.resetPwd']['status'], 200)
+        self.assertEqual(logs['UserViewSet.resetPwd']['requestMethod'], 'PUT')
+        self.assertIn('******', logs['UserViewSet.resetPwd']['operParam'])
+        self.assertNotIn('secret123', logs['UserViewSet.resetPwd']['operParam'])
+        self.assertEqual(logs['UserViewSet.changeStatus']['status'], 404)
+        # 只写分区表，模板表保持为空
+        self.assertFalse(OperLog.objects.exists())
+
+
+class LoginInforTests(AuditTestCase):
+    """登录日志：登录成功与失败都写入当月分区，按日汇总后可查询。"""
+
+    def test_login_events_and_daily_rollup(self):
+        client = APIClient()
+        for password in ('wrong', 'wrong', 'admin123'):
+            client.post('/login', {'username': 'admin', 'password': password}, format='json')
+        self.drain(get_login_log_writer())
+        rows = self.client.get('/monitor/logininfor/list?userName=admin').json()['rows']
+        self.assertEqual(sorted(row['status'] for row in rows), ['0', '1', '1'])
+        failed = self.client.get('/monitor/logininfor/list?status=1').json()
+        self.assertEqual(failed['total'], 2)
+
+        today = timezone.localdate()
+        call_command('rollup_logininfor', date=f'{today:%Y-%m-%d}', stdout=io.StringIO())
+        counts = dict(LoginInforDaily.objects.values_list('status', 'count'))
+        self.assertEqual(counts, {'0': 1, '1': 2})
+        daily = self.client.get('/monitor/logininfor/daily').json()['rows']
+        self.assertEqual(sorted((row['status'], row['count']) for row in daily), [('0', 1), ('1', 2)])
+
+
+class AuditPartitionTests(AuditTestCase):
+    """操作日志按月分区：跨分区合并查询、迁入分区化之前的历史记录、其他进程删除分区后的查询。"""
+
+    def log(self, when, url='/system/user'):
+        return OperLog(oper_name='admin', request_method='PUT', oper_url=url, oper_time=when)
+
+    def setUp(self):
+        super().setUp()
+        now = timezone.now()
+        self.old_time = now - datetime.timedelta(days=70)
+        oper_log_partitions.bulk_create([self.log(now), self.log(now, '/system/role'), self.log(self.old_time)])
+
+    def list_urls(self, query=''):
+        response = self.client.get(f'/monitor/operlog/list{query}')
+        self.assertEqual(response.status_code, 200)
+        return [row['operUrl'] for row in response.json()['rows']]
+
+    def test_union_across_partitions(self):
+        self.assertEqual(len(oper_log_partitions.months_between()), 2)
+        self.assertEqual(len(self.list_urls()), 3)
+        self.assertEqual(self.list_urls('?operUrl=/system/role'), ['/system/role'])
+        begin = timezone.localtime(timezone.now()).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        self.assertEqual(len(self.list_urls(f'?beginTime={begin:%Y-%m-%d %H:%M:%S}')), 2)
+
+    def test_absorb_base_table(self):
+        OperLog.objects.create(oper_name='admin', request_method='GET', oper_url='/legacy', oper_time=self.old_time)
+        self.assertEqual(oper_log_partitions.absorb_base_table(), 1)
+        self.assertFalse(OperLog.objects.exists())
+        self.assertIn('/legacy', self.list_urls())
+
+    def test_partition_dropped_by_other_process(self):
+        oper_log_partitions.existing_months()
+        old_month = month_key(self.old_time)
+        # 模拟 prune_audit_logs 在其他进程中删除分区：本进程的已知分区列表不变
+        with connection.cursor() as cursor:
+            cursor.execute(f'DROP TABLE {connection.ops.quote_name(oper_log_partitions.table_name(old_month))}')
+        self.assertEqual(len(self.list_urls()), 2)
+        self.assertNotIn(old_month, oper_log_partitions.months_between())
+
+
+class FastJSONTests(TestCase):
+    """orjson 渲染器输出须与 DRF JSONRenderer 逐字节一致；解析器结果与标准库一致。"""
+
+    def test_renderer_matches_drf(self):
+        utc8 = datetime.timezone(datetime.timedelta(hours=8))
+        cases = [
+            {'naive': datetime.datetime(2026, 1, 2, 3, 4, 5, 123456)},
+            {'utc': datetime.datetime(2026, 1, 2, 3, 4, 5, 123456, tzinfo=datetime.timezone.utc)},
+            {'aware': datetime.datetime(2026, 1, 2, 3, 4, 5, tzinfo=utc8)},
+            {'date': datetime.date(2026, 1, 2), 'time': datetime.time(1, 2, 3, 456789)},
+            {'decimal': decimal.Decimal('1.10'), 'uuid': uuid.UUID(int=5), 'lazy': gettext_lazy('name')},
+            {'text': '中文\u2028\u2029', 1: 'int key', 'big': 2 ** 70},
+            {'nested': [1, [2.5, {}], None, True], 'delta': datetime.timedelta(seconds=5)},
+            [],
+        ]
+        for data in cases:
+            with self.subTest(data=data):
+                self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+        self.assertEqual(FastJSONRenderer().render(None), b'')
+
+    def test_parser(self):
+        body = '{"userName":"中文","ids":[1,2],"nested":{"a":null}}'.encode()
+        self.assertEqual(
+            FastJSONParser().parse(io.BytesIO(body)),
+            {'userName': '中文', 'ids': [1, 2], 'nested': {'a': None}},
+        )
+
+
+class SlowQueryStatsTests(TestCase):
+    """慢 SQL 按形状聚合：字面量不同的同一语句归为一个指纹，指纹数超限后只计入 overflow。"""
+
+    def test_same_shape_aggregated(self):
+        stats = SlowQueryStats()
+        first = stats.record("SELECT * FROM sys_user WHERE user_id = 1 AND user_name = 'a'", 0.3, 'UserViewSet.list')
+        second = stats.record("SELECT * FROM sys_user WHERE user_id = 2 AND user_name = 'b'", 0.1, 'UserViewSet.retrieve')
+        self.assertEqual(first, second)
+        row, = stats.snapshot()['rows']
+        self.assertEqual(row['count'], 2)
+        self.assertEqual(row['totalMs'], 400.0)
+        self.assertEqual(row['maxMs'], 300.0)
+        self.assertEqual(row['views'], {'UserViewSet.list': 1, 'UserViewSet.retrieve': 1})
+
+    def test_overflow_and_reset(self):
+        stats = SlowQueryStats(max_fingerprints=1)
+        stats.record('SELECT 1 FROM sys_user', 0.2, '-')
+        stats.record('SELECT 1 FROM sys_role', 0.2, '-')
+        data = stats.snapshot(reset=True)
+        self.assertEqual(len(data['rows']), 1)
+        self.assertEqual(data['overflow'], 1)
+        data = stats.snapshot()
+        self.assertEqual((data['rows'], data['overflow']), ([], 0))
+
+
+class RequestProfilerTokenTests(TestCase):
+    """剖析令牌只对签发时的方法 + 路径有效，且受 REQUEST_CAPTURE_TOKEN_MAX_AGE 限制。"""
+
+    def test_token_bound_to_method_and_path(self):
+        token = request_profiler.sign('get', '/system/user/list')
+        self.assertTrue(request_profiler.verify(token, 'GET', '/system/user/list'))
+        self.assertFalse(request_profiler.verify(token, 'POST', '/system/user/list'))
+        self.assertFalse(request_profiler.verify(token, 'GET', '/system/role/list'))
+        self.assertFalse(request_profiler.verify(token + 'x', 'GET', '/system/user/list'))
+
+    @override_settings(REQUEST_CAPTURE_TOKEN_MAX_AGE=1)
+    def test_token_expires(self):
+        token = request_profiler.sign('GET', '/system/user/list')
+        with mock.patch('time.time', return_value=time.time() + 5):
+            self.assertFalse(request_profiler.verify(token, 'GET', '/system/user/list'))
+
+
+class ErrorTelemetryTests(TestCase):
+    """异常按客户端/服务端分类，按指纹归组计数，超过上限时淘汰最久未出现的分组。"""
+
+    def event(self, message='boom'):
+        return {
+            'time': '2026-01-01 00:00:00', 'kind': SERVER, 'type': 'ValueError', 'view': 'UserViewSet.list',
+            'status': 500, 'method': 'GET', 'path': '/system/user/list', 'user': 'admin', 'message': message,
+        }
+
+    def test_classify(self):
+        self.assertEqual(classify(ValueError(), 400), CLIENT)
+        self.assertEqual(classify(ProtectedError('protected', set()), 500), CLIENT)
+        self.assertEqual(classify(ValueError(), 500), SERVER)
+
+    def test_grouping_and_eviction(self):
+        groups = ErrorGroups(max_groups=2, recent_size=2)
+        groups.record('a', self.event('first'), trace='Traceback ...')
+        groups.record('a', self.event('second'))
+        groups.record('b', self.event())
+        groups.record('a', self.event())
+        groups.record('c', self.event())
+        data = groups.snapshot()
+        self.assertEqual([(g['fingerprint'], g['count']) for g in data['groups']], [('a', 3), ('c', 1)])
+        self.assertEqual(data['evicted'], 1)
+        self.assertEqual(len(data['recent']), 2)
+        self.assertTrue(data['groups'][0]['hasTraceback'])
+        self.assertEqual(groups.get('a')['traceback'], 'Traceback ...')
+        self.assertEqual(groups.snapshot(kind=CLIENT)['groups'], [])
+
+
+class RequestProfilingTests(ApiTestCase):
+    """SQL 按形状归并识别 N+1；开启 REQUEST_PROFILING 时响应带 Server-Timing 并进入最近剖析记录。"""
+
+    def test_sql_shape(self):
+        self.assertEqual(
+            profiling.sql_shape("SELECT * FROM sys_user WHERE user_id = 12 AND user_name = 'it''s' AND dept_id IN (%s, %s, %s)"),
+            'SELECT * FROM sys_user WHERE user_id = ? AND user_name = ? AND dept_id IN (...)',
+        )
+
+    def test_repeated_queries(self):
+        profile = profiling.RequestProfile(mock.Mock(method='GET', path='/system/user/list'))
+        execute = mock.Mock(return_value=None)
+        for pk in range(5):
+            profile.execute_wrapper(execute, f'SELECT * FROM sys_dept WHERE dept_id = {pk}', None, False, {})
+        profile.execute_wrapper(execute, 'SELECT COUNT(*) FROM sys_user', None, False, {})
+        self.assertEqual(profile.query_count, 6)
+        self.assertEqual(
+            profile.repeated_queries(5), [{'sql': 'SELECT * FROM sys_dept WHERE dept_id = ?', 'count': 5}],
+        )
+
+    @override_settings(REQUEST_PROFILING=True)
+    def test_server_timing_header(self):
+        response = self.client.get('/system/user/list')
+        self.assertEqual(response.status_code, 200)
+        self.assertRegex(response['Server-Timing'], r'^db;dur=[\d.]+;desc="\d+ queries", .*total;dur=[\d.]+$')
+        latest = profiling.recent_profiles.snapshot()[0]
+        self.assertEqual((latest['method'], latest['path'], latest['user']), ('GET', '/system/user/list', 'admin'))
+        self.assertGreater(latest['dbCount'], 0)
+
+
+class MetricsRegistryTests(TestCase):
+    """按线程分片的计数器与直方图：已结束线程的分片并入合计后回收，导出为 Prometheus 文本格式。"""
+
+    def test_dead_thread_shards_retired(self):
+        registry = metrics.MetricsRegistry(buckets=(0.1, 1))
+        labels = (('route', 'user-list'),)
+
+        def work():
+            for _ in range(100):
+                registry.inc('http_requests_total', labels)
+
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        registry.inc('http_requests_total', labels)
+        self.assertEqual(registry.counter_totals('http_requests_total'), {labels: 401})
+        self.assertEqual(len(registry._shards), 1)
+
+    def test_render(self):
+        registry = metrics.MetricsRegistry(buckets=(0.1, 1))
+        labels = (('route', 'user-list'), ('method', 'GET'))
+        for value in (0.05, 0.5, 2):
+            registry.observe('http_request_duration_seconds', labels, value)
+        registry.inc('http_requests_total', labels + (('status', '200'),), 3)
+        text = metrics.render([registry.snapshot(), registry.snapshot()], registry.buckets)
+        self.assertIn('http_requests_total{route="user-list",method="GET",status="200"} 6\n', text)
+        for line in (
+            'http_request_duration_seconds_bucket{route="user-list",method="GET",le="0.1"} 2',
+            'http_request_duration_seconds_bucket{route="user-list",method="GET",le="1"} 4',
+            'http_request_duration_seconds_bucket{route="user-list",method="GET",le="+Inf"} 6',
+            'http_request_duration_seconds_count{route="user-list",method="GET"} 6',
+        ):
+            self.assertIn(line + '\n', text)
+
+
+class TracingTests(TestCase):
+    """traceparent 解析与 span 父子关系：嵌套 span 以外层 span 为父，最外层接续上游 parent id。"""
+
+    def test_parse_traceparent(self):
+        trace_id, parent_id = '4bf92f3577b34da6a3ce929d0e0e4736', '00f067aa0ba902b7'
+        self.assertEqual(tracing.parse_traceparent(f'00-{trace_id}-{parent_id}-01'), (trace_id, parent_id, True))
+        self.assertEqual(tracing.parse_traceparent(f'00-{trace_id}-{parent_id}-00'), (trace_id, parent_id, False))
+        for value in (None, '', f'00-{"0" * 32}-{parent_id}-01', f'00-{trace_id}-{"0" * 16}-01', 'garbage'):
+            self.assertIsNone(tracing.parse_traceparent(value))
+
+    def test_span_nesting(self):
+        trace = tracing.Trace(parent_id='00f067aa0ba902b7', max_spans=2)
+        token = tracing.current_trace.set(trace)
+        try:
+            with tracing.span('outer') as outer:
+                with tracing.span('inner', rows=3) as inner:
+                    pass
+            with self.assertRaises(ValueError):
+                with tracing.span('failed'):
+                    raise ValueError('boom')
+        finally:
+            tracing.current_trace.reset(token)
+        self.assertEqual([s.name for s in trace.spans], ['inner', 'outer'])
+        self.assertEqual(trace.dropped, 1)
+        self.assertEqual(inner.parent_id, outer.span_id)
+        self.assertEqual(outer.parent_id, '00f067aa0ba902b7')
+        spans = trace.to_otlp()['resourceSpans'][0]['scopeSpans'][0]['spans']
+        self.assertEqual(spans[0]['traceId'], trace.trace_id)
+        self.assertEqual(spans[0]['attributes'], [{'key': 'rows', 'value': {'intValue': '3'}}])
+        self.assertEqual(spans[1]['status'], {'code': tracing.STATUS_OK})
+
+    def test_span_outside_trace(self):
+        with tracing.span('noop') as item:
+            self.assertIsNone(item)
+
+
+class ServerMonitorTests(ApiTestCase):
+    """服务监控接口返回各分组数据，仅 admin 角色可访问。"""
+
+    def test_snapshot(self):
+        response = self.client.get('/monitor/server')
+        self.assertEqual(response.json()['code'], 200)
+        data = response.json()['data']
+        for key in ('cpu', 'mem', 'jvm', 'sys', 'sysFiles', 'process', 'database', 'cache', 'queues', 'uptime'):
+            self.assertIn(key, data)
+        self.assertEqual(data['database'][0]['vendor'], 'sqlite')
+        self.assertIn('pending', data['queues']['operLog'])
+
+    def test_requires_admin(self):
+        user = User.objects.create_user(username='guest', password='guest123')
+        self.client.force_authenticate(user)
+        self.assertEqual(self.client.get('/monitor/server').json()['code'], 403)
+
+    def test_formatting(self):
+        self.assertEqual(server_monitor.file_size(512), '512 B')
+        self.assertEqual(server_monitor.file_size(3 * 1024 ** 3), '3.0 GB')
+        self.assertEqual(server_monitor.duration_text(90061), '1天1小时1分钟')
+
+
+class BootstrapTests(ApiTestCase):
+    """首屏引导接口各部分须与 getInfo、getRouters、字典与参数接口一致；相关数据写入后 ETag 失效。"""
+
+    def setUp(self):
+        super().setUp()
+        DictType.objects.create(dict_name='性别', dict_type='sex')
+        DictData.objects.create(dict_label='男', dict_value='0', dict_type='sex')
+        Config.objects.create(config_name='皮肤', config_key='sys.index.skinName', config_value='skin-blue')
+        self.url = '/bootstrap?dictTypes=sex&configKeys=sys.index.skinName'
+
+    def test_parts_match_endpoints(self):
+        data = self.client.get(self.url).json()['data']
+        info = self.client.get('/getInfo').json()
+        info.pop('code'), info.pop('msg')
+        self.assertEqual(data['info'], info)
+        self.assertEqual(data['routers'], self.client.get('/getRouters').json()['data'])
+        self.assertEqual(data['dicts']['sex'], self.client.get('/system/dict/data/type/sex').json()['data'])
+        self.assertEqual(data['configs'], {'sys.index.skinName': 'skin-blue'})
+
+    def test_etag_invalidated_by_config_write(self):
+        etag = self.client.get(self.url)['ETag']
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        config = Config.objects.get(config_key='sys.index.skinName')
+        with self.captureOnCommitCallbacks(execute=True):
+            config.config_value = 'skin-green'
+            config.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+
+class SparseFieldsTests(ApiTestCase):
+    """?fields= 只输出指定字段并以 .only() 收窄查询列；全部为未知字段时保持完整输出。"""
+
+    def setUp(self):
+        super().setUp()
+        self.config = Config.objects.create(config_name='皮肤', config_key='sys.index.skinName', config_value='skin-blue')
+
+    def test_list_projects_fields_and_columns(self):
+        with CaptureQueriesContext(connection) as queries:
+            rows = self.client.get('/system/config/list?fields=configKey,configName').json()['rows']
+        self.assertEqual(rows, [{'configKey': 'sys.index.skinName', 'configName': '皮肤'}])
+        select = next(q['sql'] for q in queries if 'FROM "sys_config"' in q['sql'] and 'COUNT' not in q['sql'])
+        self.assertNotIn('config_value', select)
+
+    def test_detail_and_unknown_fields(self):
+        data = self.client.get(f'/system/config/{self.config.pk}?fields=configValue').json()['data']
+        self.assertEqual(data, {'configValue': 'skin-blue'})
+        full = self.client.get('/system/config/list').json()['rows']
+        self.assertEqual(self.client.get('/system/config/list?fields=nope').json()['rows'], full)
@@ -0,0 +1,236 @@
+import contextlib
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import re
+import threading
+import time
+
+from django.conf import settings
+
+logger = logging.getLogger('system.tracing')
+
+# 当前请求的 trace 与活动 span；未启用追踪或不在请求内时为 None，埋点直接返回
+current_trace = contextvars.ContextVar('current_trace', default=None)
+current_span = contextvars.ContextVar('current_span', default=None)
+
+# OTLP SpanKind
+KIND_INTERNAL = 1
+KIND_SERVER = 2
+KIND_CLIENT = 3
+
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+_TRACEPARENT_RE = re.compile(r'^[0-9a-f]{2}-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$')
+_REQUEST_ID_RE = re.compile(r'^[\w.:-]{1,128}$')
+
+
+def new_id(nbytes):
+    return os.urandom(nbytes).hex()
+
+
+def parse_traceparent(value):
+    """解析 W3C traceparent 头，返回 (trace_id, parent_span_id, sampled)；格式不合法返回 None。"""
+    match = _TRACEPARENT_RE.match((value or '').strip().lower())
+    if not match or match.group(1) == '0' * 32 or match.group(2) == '0' * 16:
+        return None
+    return match.group(1), match.group(2), bool(int(match.group(3), 16) & 1)
+
+
+def request_id_from(value):
+    """上游传入的 X-Request-ID 合法时沿用，否则返回 None。"""
+    value = (value or '').strip()
+    return value if _REQUEST_ID_RE.match(value) else None
+
+
+def _attribute(key, value):
+    if isinstance(value, bool):
+        return {'key': key, 'value': {'boolValue': value}}
+    if isinstance(value, int):
+        return {'key': key, 'value': {'intValue': str(value)}}
+    if isinstance(value, float):
+        return {'key': key, 'value': {'doubleValue': value}}
+    return {'key': key, 'value': {'stringValue': str(value)}}
+
+
+class Span:
+    __slots__ = ('name', 'kind', 'span_id', 'parent_id', 'start', 'end', 'attributes', 'error')
+
+    def __init__(self, name, parent_id=None, kind=KIND_INTERNAL, attributes=None):
+        self.name = name
+        self.kind = kind
+        self.span_id = new_id(8)
+        self.parent_id = parent_id
+        self.start = time.time_ns()
+        self.end = None
+        self.attributes = dict(attributes or {})
+        self.error = None
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def finish(self, error=None):
+        if self.end is None:
+            self.end = time.time_ns()
+        if error is not None:
+            self.error = f'{type(error).__name__}: {error}'
+
+    def to_otlp(self, trace_id):
+        data = {
+            'traceId': trace_id,
+            'spanId': self.span_id,
+            'name': self.name,
+            'kind': self.kind,
+            'startTimeUnixNano': str(self.start),
+            'endTimeUnixNano': str(self.end or self.start),
+            'attributes': [_attribute(k, v) for k, v in self.attributes.items() if v is not None],
+            'status': {'code': STATUS_ERROR, 'message': self.error} if self.error else {'code': STATUS_OK},
+        }
+        if self.parent_id:
+            data['parentSpanId'] = self.parent_id
+        return data
+
+
+class Trace:
+    """单个请求的 trace：收集全部已结束的 span，请求结束后按采样结果导出。"""
+    def __init__(self, trace_id=None, parent_id=None, sampled=False, request_id=None, max_spans=1000):
+        self.trace_id = trace_id or new_id(16)
+        self.parent_id = parent_id
+        self.sampled = sampled
+        self.request_id = request_id or self.trace_id
+        self.max_spans = max_spans
+        self.spans = []
+        self.dropped = 0
+
+    def start_span(self, name, kind=KIND_INTERNAL, attributes=None):
+        parent = current_span.get()
+        return Span(name, parent.span_id if parent is not None else self.parent_id, kind, attributes)
+
+    def add(self, span):
+        if len(self.spans) >= self.max_spans:
+            self.dropped += 1
+            return
+        self.spans.append(span)
+
+    def to_otlp(self):
+        """OTLP/JSON（ExportTraceServiceRequest）结构，可直接由 OpenTelemetry Collector 的 otlpjsonfile 接收器读取。"""
+        return {
+            'resourceSpans': [{
+                'resource': {'attributes': [
+                    _attribute('service.name', getattr(settings, 'TRACING_SERVICE_NAME', 'web-hrms')),
+                    _attribute('process.pid', os.getpid()),
+                ]},
+                'scopeSpans': [{
+                    'scope': {'name': 'system.tracing'},
+                    'spans': [s.to_otlp(self.trace_id) for s in self.spans],
+                }],
+            }],
+        }
+
+
+@contextlib.contextmanager
+def span(name, kind=KIND_INTERNAL, **attributes):
+    """在当前 trace 中记录一个 span；不在追踪中的请求内时不做任何事。"""
+    trace = current_trace.get()
+    if trace is None:
+        yield None
+        return
+    item = trace.start_span(name, kind, attributes)
+    token = current_span.set(item)
+    error = None
+    try:
+        yield item
+    except BaseException as exc:
+        error = exc
+        raise
+    finally:
+        current_span.reset(token)
+        item.finish(error)
+        trace.add(item)
+
+
+def should_sample():
+    rate = getattr(settings, 'TRACING_SAMPLE_RATE', 0.0)
+    return rate >= 1 or (rate > 0 and random.random() < rate)
+
+
+def trace_query_wrapper(execute, sql, params, many, context):
+    """数据库执行包装：追踪中的请求为每条 SQL 记录一个 db.query span。"""
+    if current_trace.get() is None:
+        return execute(sql, params, many, context)
+    with span('db.query', KIND_CLIENT, **{
+        'db.system': context['connection'].vendor,
+        'db.statement': sql[:1000],
+        'db.many': many or None,
+    }):
+        return execute(sql, params, many, context)
+
+
+def install(connection):
+    """为新建的数据库连接挂上 SQL span 包装。"""
+    if not getattr(settings, 'TRACING_ENABLED', False):
+        return
+    if trace_query_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(trace_query_wrapper)
+
+
+class JsonLinesExporter:
+    """
+    trace 导出：请求线程只把 trace 放入有界队列，后台守护线程逐行（每个 trace 一行 OTLP/JSON）
+    追加写入文件，按大小轮转（RotatingFileHandler）。队列满时丢弃并计数，不阻塞请求。
+    """
+    def __init__(self, queue_size=10000):
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.dropped = 0
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    def export(self, trace):
+        self._ensure_started()
+        try:
+            self.queue.put_nowait(trace)
+        except queue.Full:
+            self.dropped += 1
+            return False
+        return True
+
+    def _ensure_started(self):
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='trace-export', daemon=True)
+            self._thread.start()
+
+    def _handler(self):
+        path = str(getattr(settings, 'TRACING_EXPORT_FILE'))
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        return logging.handlers.RotatingFileHandler(
+            path,
+            maxBytes=getattr(settings, 'TRACING_EXPORT_MAX_BYTES', 50 * 1024 * 1024),
+            backupCount=getattr(settings, 'TRACING_EXPORT_BACKUP_COUNT', 5),
+            encoding='utf-8',
+        )
+
+    def _run(self):
+        handler = None
+        while True:
+            trace = self.queue.get()
+            try:
+                if handler is None:
+                    handler = self._handler()
+                line = json.dumps(trace.to_otlp(), ensure_ascii=False, separators=(',', ':'))
+                handler.emit(logging.makeLogRecord({'msg': line, 'args': None}))
+            except Exception:
+                logger.exception('trace 导出失败')
+
+
+exporter = JsonLinesExporter(getattr(settings, 'TRACING_EXPORT_QUEUE_SIZE', 10000))
@@ -2,7 +2,8 @@ from django.urls import path, include, re_path
 from rest_framework.routers import DefaultRouter
 from .views import (
     UserViewSet, MenuViewSet, RoleViewSet, DeptViewSet, LoginView, CaptchaView, GetInfoView, LogoutView, GetRoutersView,
-    DictTypeViewSet, DictDataViewSet, ConfigViewSet,
+    DictTypeViewSet, DictDataViewSet, ConfigViewSet, BatchView, BootstrapView, LoginInforViewSet, OperLogViewSet, ProfileListView, SlowQueryView, MetricsView,
+    RequestCaptureListView, RequestCaptureDetailView, RequestCaptureSignView, ServerMonitorView, ErrorGroupView,
 )
 
 router = DefaultRouter(trailing_slash=False)
@@ -14,6 +15,10 @@ router.register(r'dict/type', DictTypeViewSet, basename='dict-type')
 router.register(r'dict/data', DictDataViewSet, basename='dict-data')
 router.register(r'config', ConfigViewSet, basename='config')
 
+monitor_router = DefaultRouter(trailing_slash=False)
+monitor_router.register(r'logininfor', LoginInforViewSet, basename='logininfor')
+monitor_router.register(r'operlog', OperLogViewSet, basename='operlog')
+
 urlpatterns = [
     # 兼容前端集合 PUT 路由，需在 include(router.urls) 之前以确保优先匹配
     path('system/menu', MenuViewSet.as_view({'put': 'update_by_body'}), name='menu-update-body'),
@@ -24,9 +29,20 @@ urlpatterns = [
 
     # 其余 REST 路由
     path('system/', include(router.urls)),
+    path('monitor/profiles', ProfileListView.as_view(), name='monitor-profiles'),
+    path('monitor/slowqueries', SlowQueryView.as_view(), name='monitor-slow-queries'),
+    path('monitor/errors', ErrorGroupView.as_view(), name='monitor-errors'),
+    path('monitor/server', ServerMonitorView.as_view(), name='monitor-server'),
+    path('monitor/captures', RequestCaptureListView.as_view(), name='monitor-captures'),
+    path('monitor/captures/sign', RequestCaptureSignView.as_view(), name='monitor-captures-sign'),
+    path('monitor/captures/<str:capture_id>', RequestCaptureDetailView.as_view(), name='monitor-capture-detail'),
+    path('monitor/', include(monitor_router.urls)),
     path('login', LoginView.as_view(), name='login'),
     path('captchaImage/', CaptchaView.as_view(), name='captcha-image'),
     path('getInfo', GetInfoView.as_view(), name='get-info'),
     path('logout', LogoutView.as_view(), name='logout'),
     path('getRouters', GetRoutersView.as_view(), name='get-routers'),
+    path('batch', BatchView.as_view(), name='batch'),
+    path('bootstrap', BootstrapView.as_view(), name='bootstrap'),
+    path('metrics', MetricsView.as_view(), name='metrics'),
 ]
\ No newline at end of file
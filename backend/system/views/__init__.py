@@ -7,8 +7,15 @@ from .role import RoleViewSet
 from .dept import DeptViewSet
 from .dict import DictTypeViewSet, DictDataViewSet
 from .config import ConfigViewSet
+from .batch import BatchView
+from .bootstrap import BootstrapView
+from .monitor import (
+    LoginInforViewSet, OperLogViewSet, ProfileListView, SlowQueryView, MetricsView,
+    RequestCaptureListView, RequestCaptureDetailView, RequestCaptureSignView, ServerMonitorView, ErrorGroupView,
+)
 __all__ = [
-    'CaptchaView', 'LoginView', 'GetInfoView', 'LogoutView', 'GetRoutersView',
+    'CaptchaView', 'LoginView', 'GetInfoView', 'LogoutView', 'GetRoutersView', 'BatchView', 'BootstrapView',
     'DictTypeViewSet', 'DictDataViewSet', 'ConfigViewSet',
-    'UserViewSet', 'MenuViewSet', 'RoleViewSet', 'DeptViewSet'
+    'UserViewSet', 'MenuViewSet', 'RoleViewSet', 'DeptViewSet', 'LoginInforViewSet', 'OperLogViewSet', 'ProfileListView', 'SlowQueryView', 'MetricsView',
+    'RequestCaptureListView', 'RequestCaptureDetailView', 'RequestCaptureSignView', 'ServerMonitorView', 'ErrorGroupView',
 ]
\ No newline at end of file
@@ -0,0 +1,138 @@
+import contextlib
+import contextvars
+import io
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connections
+from django.http import HttpRequest, QueryDict
+from django.urls import Resolver404, resolve
+from rest_framework import generics
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from ..profiling import current_profile
+from ..serializers import BatchRequestSerializer
+
+from drf_spectacular.utils import extend_schema
+
+try:
+    import orjson
+except ImportError:  # 未安装 orjson 时回退为标准库解析
+    orjson = None
+
+
+# 子请求不继承的请求头：请求体相关头按子请求重建；协商缓存与压缩由外层批量响应统一处理
+SKIPPED_META = ('CONTENT_TYPE', 'CONTENT_LENGTH', 'HTTP_IF_NONE_MATCH', 'HTTP_IF_MODIFIED_SINCE', 'HTTP_ACCEPT_ENCODING')
+
+
+class BatchView(generics.GenericAPIView):
+    """
+    批量接口：一次往返执行多个子请求（method/path/query/body），在进程内经 URL 解析分发到对应视图。
+
+    - 子请求复用外层请求已完成的 JWT 认证（强制认证为同一用户），不再重复解码令牌与查询用户；
+      角色等按用户对象暂存的查询结果也在各子请求间共享；
+    - 相邻的 GET 子请求视为相互独立的读，在线程池中并发执行；写请求按顺序执行并作为读的分隔；
+    - 结果按提交顺序返回：data 为 [{status, body}]，单个子请求失败不影响其他子请求。
+    """
+    permission_classes = [IsAuthenticated]
+    serializer_class = BatchRequestSerializer
+
+    @extend_schema(request=BatchRequestSerializer)
+    def post(self, request):
+        v = BatchRequestSerializer(data=request.data)
+        v.is_valid(raise_exception=True)
+        subs = v.validated_data['requests']
+        results = [None] * len(subs)
+        reads = []
+        for index, sub in enumerate(subs):
+            if sub['method'] == 'GET':
+                reads.append(index)
+                continue
+            self.run_reads(request, subs, reads, results)
+            reads = []
+            results[index] = self.dispatch_sub(request, sub)
+        self.run_reads(request, subs, reads, results)
+        return Response({'code': 200, 'msg': '操作成功', 'data': results})
+
+    def run_reads(self, request, subs, indexes, results):
+        if len(indexes) <= 1:
+            for index in indexes:
+                results[index] = self.dispatch_sub(request, subs[index])
+            return
+        workers = min(len(indexes), getattr(settings, 'BATCH_MAX_WORKERS', 4))
+        # 每个子请求在外层请求上下文的副本中执行，保留请求剖析、追踪 span 与 SQL 计数等 contextvars
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                index: pool.submit(contextvars.copy_context().run, self.dispatch_threaded, request, subs[index])
+                for index in indexes
+            }
+        for index, future in futures.items():
+            results[index] = future.result()
+
+    def dispatch_threaded(self, request, sub):
+        # 工作线程使用各自的数据库连接，执行完即关闭，避免连接随线程池泄漏；
+        # 外层请求在剖析中时，这些连接上的 SQL 同样计入该请求
+        profile = current_profile.get()
+        try:
+            with contextlib.ExitStack() as stack:
+                if profile is not None:
+                    for conn in connections.all():
+                        stack.enter_context(conn.execute_wrapper(profile.execute_wrapper))
+                return self.dispatch_sub(request, sub)
+        finally:
+            connections.close_all()
+
+    def build_sub_request(self, request, sub):
+        outer = request._request
+        path, _, query_string = sub['path'].partition('?')
+        http_request = HttpRequest()
+        http_request.method = sub['method']
+        http_request.path = http_request.path_info = path
+        http_request.META = {k: v for k, v in outer.META.items() if k not in SKIPPED_META}
+        http_request.META.update({'REQUEST_METHOD': sub['method'], 'PATH_INFO': path})
+        query = QueryDict(query_string, mutable=True)
+        for name, value in sub['query'].items():
+            if isinstance(value, (list, tuple)):
+                query.setlist(name, [str(v) for v in value])
+            elif value is not None:
+                query[name] = str(value)
+        http_request.META['QUERY_STRING'] = query.urlencode()
+        http_request.GET = query
+        body = b''
+        if sub['body'] is not None:
+            body = json.dumps(sub['body']).encode()
+            http_request.META.update({'CONTENT_TYPE': 'application/json', 'CONTENT_LENGTH': str(len(body))})
+        http_request._stream = io.BytesIO(body)
+        http_request._read_started = False
+        # 复用外层认证结果，子请求中 DRF 以强制认证代替重新解析 Authorization
+        http_request._force_auth_user = request.user
+        http_request._force_auth_token = request.auth
+        http_request._dont_enforce_csrf_checks = True
+        return http_request
+
+    def dispatch_sub(self, request, sub):
+        try:
+            match = resolve(sub['path'].partition('?')[0])
+        except Resolver404:
+            return {'status': 404, 'body': {'code': 404, 'msg': '接口不存在'}}
+        if getattr(match.func, 'view_class', None) is type(self):
+            return {'status': 400, 'body': {'code': 400, 'msg': '不支持嵌套批量请求'}}
+        try:
+            response = match.func(self.build_sub_request(request, sub), *match.args, **match.kwargs)
+        except Exception:
+            # DRF 视图的异常已由异常处理器转为响应，此处只兜底非 DRF 视图
+            return {'status': 500, 'body': {'code': 500, 'msg': '服务器内部错误'}}
+        if hasattr(response, 'render') and not response.is_rendered:
+            response.render()
+        return {'status': response.status_code, 'body': self.decode_body(response)}
+
+    @staticmethod
+    def decode_body(response):
+        content = response.content
+        if not content:
+            return None
+        if not response.get('Content-Type', '').startswith('application/json'):
+            return content.decode(response.charset or 'utf-8', errors='replace')
+        return orjson.loads(content) if orjson else json.loads(content)
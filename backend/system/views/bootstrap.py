@@ -0,0 +1,48 @@
+from rest_framework import generics
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from ..common import model_version, not_modified, version_etag
+from ..models import Config, DictData, Menu, Role, User, UserRole
+from .config import get_config_value
+from .core import build_user_info, get_routers_payload
+from .dict import get_dict_data_payload
+
+
+def split_param(request, name):
+    raw = request.query_params.get(name) or ''
+    return sorted({v.strip() for v in raw.split(',') if v.strip()})
+
+
+class BootstrapView(generics.GenericAPIView):
+    """
+    首屏引导接口：一次返回 getInfo 数据、路由树、所需字典与参数，替代登录后的多次串行请求。
+    GET /bootstrap?dictTypes=sys_user_sex,sys_normal_disable&configKeys=sys.index.skinName
+
+    各部分均取自已有缓存（路由、字典为版本校验的缓存载荷，参数为按键缓存），角色只解析一次；
+    ETag 由用户、角色、菜单、字典、参数的写版本及请求的字典类型/参数键派生，未变化时返回 304。
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        user = request.user
+        dict_types = split_param(request, 'dictTypes')
+        config_keys = split_param(request, 'configKeys')
+        menu_version = model_version(Menu)
+        dict_version = model_version(DictData)
+        etag = version_etag(
+            'bootstrap', user.pk,
+            model_version(User), model_version(UserRole), model_version(Role),
+            menu_version, dict_version, model_version(Config),
+            ','.join(dict_types), ','.join(config_keys),
+        )
+        response = not_modified(request, etag)
+        if response is not None:
+            return response
+        data = {
+            'info': build_user_info(user),
+            'routers': get_routers_payload(menu_version).data,
+            'dicts': {t: get_dict_data_payload(t, dict_version).data for t in dict_types},
+            'configs': {k: get_config_value(k) for k in config_keys},
+        }
+        return Response({'code': 200, 'msg': '操作成功', 'data': data}, headers={'ETag': etag})
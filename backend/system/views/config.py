@@ -7,8 +7,9 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework import status
 
-from .core import BaseViewSet
+from .core import BaseViewSet, cache_list_response
 from ..permission import HasRolePermission
+from ..profiling import record_cache
 from ..models import Config
 from ..serializers import (
     ConfigSerializer,
@@ -18,10 +19,27 @@ from ..serializers import (
 )
 
 
+def get_config_value(config_key):
+    """按键名读取参数值（优先缓存），不存在时返回空串。"""
+    value = None
+    try:
+        value = cache.get(f"config:{config_key}")
+        record_cache(value is not None)
+        if value is None:
+            obj = Config.objects.filter(config_key=config_key, del_flag='0').first()
+            value = obj.config_value if obj else ''
+            cache.set(f"config:{config_key}", value, timeout=3600)
+    except Exception:
+        obj = Config.objects.filter(config_key=config_key, del_flag='0').first()
+        value = obj.config_value if obj else ''
+    return value
+
+
 class ConfigViewSet(BaseViewSet):
     permission_classes = [IsAuthenticated, HasRolePermission]
     queryset = Config.objects.filter(del_flag='0').order_by('-create_time')
     serializer_class = ConfigSerializer
+    list_cache_timeout = 300
     update_body_serializer_class = ConfigUpdateSerializer
     update_body_id_field = 'configId'
 
@@ -48,14 +66,13 @@ class ConfigViewSet(BaseViewSet):
         return qs.order_by('-create_time')
 
     @action(detail=False, methods=['get'], url_path='list')
+    @cache_list_response
     def list_action(self, request):
-        qs = self.get_queryset()
-        page = self.paginate_queryset(qs)
-        if page is not None:
-            serializer = self.get_serializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
-        serializer = self.get_serializer(qs, many=True)
-        return Response({"code": 200, "msg": "操作成功", "rows": serializer.data, "total": qs.count()})
+        qs = self.filter_queryset(self.get_queryset())
+        paginated, data = self.paginate_and_serialize(qs)
+        if paginated:
+            return self.get_paginated_response(data)
+        return Response({"code": 200, "msg": "操作成功", "rows": data, "total": qs.count()})
 
     # 详情响应由 BaseViewSet.retrieve 统一封装
 
@@ -122,17 +139,7 @@ class ConfigViewSet(BaseViewSet):
     @action(detail=False, methods=['get'], url_path=r'configKey/(?P<configKey>[^/]+)')
     def get_config_key(self, request, configKey=None):
         # 返回值放在 msg 字段以兼容前端用法
-        value = None
-        try:
-            value = cache.get(f"config:{configKey}")
-            if value is None:
-                obj = Config.objects.filter(config_key=configKey, del_flag='0').first()
-                value = obj.config_value if obj else ''
-                cache.set(f"config:{configKey}", value, timeout=3600)
-        except Exception:
-            obj = Config.objects.filter(config_key=configKey, del_flag='0').first()
-            value = obj.config_value if obj else ''
-        return Response({"code": 200, "msg": value})
+        return Response({"code": 200, "msg": get_config_value(configKey)})
 
     @action(detail=False, methods=['delete'], url_path='refreshCache')
     def refresh_cache(self, request):
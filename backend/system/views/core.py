@@ -1,20 +1,29 @@
 from rest_framework import generics
 from rest_framework.views import APIView
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import BasePermission, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.decorators import action
-from rest_framework import status, viewsets
+from rest_framework import serializers, status, viewsets
 from rest_framework_simplejwt.views import TokenObtainPairView
 from captcha.models import CaptchaStore
 from captcha.views import captcha_image
 import base64
+import functools
 
-from ..models import UserRole, Menu, DictType, DictData
+from ..models import UserRole, Role, Menu, DictType, DictData
 from ..serializers import DictTypeSerializer, DictDataSerializer, UserProfileSerializer, UserInfoSerializer
 from django.db.models import Q
 from django.core.cache import cache
+from django.core.exceptions import FieldDoesNotExist
+from django.utils import timezone
 from rest_framework.pagination import PageNumberPagination
-from ..common import audit_log
+from ..common import (
+    audit_log, bump_model_version, model_version, not_modified, record_login, version_cache_usable, version_etag,
+)
+from ..compression import CachedPayload
+from ..permission import get_user_role_keys
+from ..projection import ReadOnlyProjection
+from ..profiling import profile_section, record_cache
 
 from drf_spectacular.utils import extend_schema
 
@@ -42,48 +51,49 @@ class LoginView(TokenObtainPairView):
     @audit_log
     def post(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
+        user_name = request.data.get('username', '') if hasattr(request.data, 'get') else ''
         try:
             serializer.is_valid(raise_exception=True)
         except Exception:
+            record_login(request, user_name, False, '用户名或密码错误')
             return Response({'msg': '用户名或密码错误'}, status=status.HTTP_400_BAD_REQUEST)
+        record_login(request, user_name, True, '登录成功')
         return Response({'token': serializer.validated_data.get('access')})
 
 
+def build_user_info(user):
+    """getInfo 的数据部分（用户、角色、权限），供 getInfo 与 bootstrap 共用。"""
+    user_data = {
+        'userId': user.id,
+        'userName': user.username,
+        'nickName': getattr(user, 'nick_name', '') or user.username,
+        'avatar': getattr(user, 'avatar', '') or '',
+        'phonenumber': getattr(user, 'phonenumber', '') or '',
+        'email': getattr(user, 'email', '') or '',
+        'sex': getattr(user, 'sex', '2'),
+    }
+
+    roles = get_user_role_keys(user)
+    if "admin" in roles:
+        permissions = ["*:*:*"]
+    else:
+        permissions = []
+
+    return {
+        'user': user_data,
+        'roles': roles,
+        'permissions': permissions,
+        'isDefaultModifyPwd': False,
+        'isPasswordExpired': False,
+    }
+
+
 class GetInfoView(generics.GenericAPIView):
     permission_classes = [IsAuthenticated]
 
     @extend_schema(responses=UserInfoSerializer)
     def get(self, request):
-        user = request.user
-        user_data = {
-            'userId': user.id,
-            'userName': user.username,
-            'nickName': getattr(user, 'nick_name', '') or user.username,
-            'avatar': getattr(user, 'avatar', '') or '',
-            'phonenumber': getattr(user, 'phonenumber', '') or '',
-            'email': getattr(user, 'email', '') or '',
-            'sex': getattr(user, 'sex', '2'),
-        }
-
-        try:
-            user_roles = UserRole.objects.filter(user=user).select_related('role')
-            roles = [ur.role.role_key for ur in user_roles]
-        except Exception:
-            roles = []
-        if "admin" in roles:
-            permissions = ["*:*:*"]
-        else:
-            permissions = []
-
-        resp = {
-            'code': 200,
-            'msg': '操作成功',
-            'user': user_data,
-            'roles': roles,
-            'permissions': permissions,
-            'isDefaultModifyPwd': False,
-            'isPasswordExpired': False,
-        }
+        resp = {'code': 200, 'msg': '操作成功', **build_user_info(request.user)}
         return Response(resp)
 
 
@@ -95,71 +105,107 @@ class LogoutView(generics.GenericAPIView):
         return Response({'code': 200, 'msg': '操作成功'})
 
 
-class GetRoutersView(generics.GenericAPIView):
-    permission_classes = [IsAuthenticated]
-
-    def get(self, request):
-        cached = cache.get('routers')
-        if cached is not None:
-            return Response({"code": 200, "msg": "操作成功", "data": cached})
-        menus = list(Menu.objects.filter(status='0', del_flag='0').order_by('parent_id', 'order_num'))
-
-        def build_tree(items, pid=0):
-            nodes = []
-            for m in items:
-                if m.parent_id == pid:
-                    children = build_tree(items, m.menu_id)
-                    nodes.append({"menu": m, "children": children})
-            return nodes
-
-        def to_router(node):
-            m = node["menu"]
-            children = node["children"]
-            hidden = (m.visible == '1')
-            is_outer = (m.is_frame == '0')
-
-            meta = {
-                "title": m.menu_name,
-                "icon": m.icon or None,
-                "noCache": (m.is_cache == '1')
+def get_routers_payload(version):
+    """读取路由树缓存载荷，缓存缺失或菜单写版本变化时重建。"""
+    cached = cache.get('routers')
+    hit = isinstance(cached, CachedPayload) and cached.version == version
+    record_cache(hit)
+    if hit:
+        return cached
+    menus = list(Menu.objects.filter(status='0', del_flag='0').order_by('parent_id', 'order_num'))
+
+    def build_tree(items, pid=0):
+        nodes = []
+        for m in items:
+            if m.parent_id == pid:
+                children = build_tree(items, m.menu_id)
+                nodes.append({"menu": m, "children": children})
+        return nodes
+
+    def to_router(node):
+        m = node["menu"]
+        children = node["children"]
+        hidden = (m.visible == '1')
+        is_outer = (m.is_frame == '0')
+
+        meta = {
+            "title": m.menu_name,
+            "icon": m.icon or None,
+            "noCache": (m.is_cache == '1')
+        }
+        if m.query:
+            meta["query"] = m.query
+
+        if m.menu_type == 'M':
+            route = {
+                "path": m.path or ("/" + str(m.menu_id)),
+                "component": "Layout" if m.parent_id == 0 else "ParentView",
+                "hidden": hidden,
+                "alwaysShow": True,
+                "name": m.menu_name.replace('-', '').replace('_', ''),
+                "meta": meta
             }
-            if m.query:
-                meta["query"] = m.query
-
-            if m.menu_type == 'M':
-                route = {
-                    "path": m.path or ("/" + str(m.menu_id)),
-                    "component": "Layout" if m.parent_id == 0 else "ParentView",
-                    "hidden": hidden,
-                    "alwaysShow": True,
-                    "name": m.menu_name.replace('-', '').replace('_', ''),
-                    "meta": meta
-                }
-                route["children"] = [r for r in [to_router(c) for c in children] if r is not None]
-                return route
-            elif m.menu_type == 'C':
-                if is_outer and (m.path.startswith('http://') or m.path.startswith('https://')):
-                    return {
-                        "path": m.path,
-                        "component": "InnerLink",
-                        "hidden": hidden,
-                        "name": m.menu_name.replace('-', '').replace('_', ''),
-                        "meta": meta
-                    }
+            route["children"] = [r for r in [to_router(c) for c in children] if r is not None]
+            return route
+        elif m.menu_type == 'C':
+            if is_outer and (m.path.startswith('http://') or m.path.startswith('https://')):
                 return {
-                    "path": m.path or ("/" + str(m.menu_id)),
-                    "component": m.component or "Layout",
+                    "path": m.path,
+                    "component": "InnerLink",
                     "hidden": hidden,
                     "name": m.menu_name.replace('-', '').replace('_', ''),
                     "meta": meta
                 }
-            else:
-                return None
+            return {
+                "path": m.path or ("/" + str(m.menu_id)),
+                "component": m.component or "Layout",
+                "hidden": hidden,
+                "name": m.menu_name.replace('-', '').replace('_', ''),
+                "meta": meta
+            }
+        else:
+            return None
+
+    tree = build_tree(menus, 0)
+    routers = [r for r in [to_router(n) for n in tree] if r is not None]
+    payload = CachedPayload(routers, version=version)
+    cache.set('routers', payload, timeout=3600)
+    return payload
+
+
+class GetRoutersView(generics.GenericAPIView):
+    permission_classes = [IsAuthenticated]
 
-        tree = build_tree(menus, 0)
-        routers = [r for r in [to_router(n) for n in tree] if r is not None]
-        cache.set('routers', routers, timeout=3600)
-        return Response({"code": 200, "msg": "操作成功", "data": routers})
+    def get(self, request):
+        version = model_version(Menu)
+        etag = version_etag('routers', version)
+        response = not_modified(request, etag)
+        if response is not None:
+            return response
+        return get_routers_payload(version).response(request, etag)
+
+
+def cache_list_response(func):
+    """
+    列表响应缓存：视图集设置 list_cache_timeout 且缓存后端可用（见 version_cache_usable）时生效，键由 BaseViewSet.get_list_cache_key 生成。
+    命中时直接返回预渲染（及预压缩）的响应体，跳过参数校验、过滤、计数与序列化。
+    """
+    @functools.wraps(func)
+    def wrapper(self, request, *args, **kwargs):
+        key = self.get_list_cache_key(request)
+        if key is None:
+            return func(self, request, *args, **kwargs)
+        cached = cache.get(key)
+        record_cache(isinstance(cached, CachedPayload))
+        if isinstance(cached, CachedPayload):
+            return cached.response(request)
+        response = func(self, request, *args, **kwargs)
+        if response.status_code != 200 or not isinstance(getattr(response, 'data', None), dict):
+            return response
+        payload = CachedPayload(envelope=response.data)
+        cache.set(key, payload, timeout=self.list_cache_timeout)
+        return payload.response(request)
+    return wrapper
 
 
 class BaseViewSet(viewsets.ModelViewSet):
@@ -168,6 +214,15 @@ class BaseViewSet(viewsets.ModelViewSet):
     update_body_serializer_class = None  # 子类设置：用于校验请求体
     update_body_id_field = 'id'          # 子类设置：请求体中的主键字段名，如 menuId/deptId/roleId/configId
 
+    # 稀疏字段：GET 请求可通过 ?fields=a,b 仅返回指定字段，并以 .only() 同步收窄查询列
+    fields_query_param = 'fields'
+    # 输出还依赖的其他模型（如用户中的角色、部门名），其写版本参与详情 ETag 与列表缓存键
+    etag_version_models = ()
+    # 列表响应缓存时长（秒），None 表示不缓存；缓存键含模型写版本，任意写入即整体失效
+    list_cache_timeout = None
+    # 列表 GET 是否尝试使用只读投影（values() + 预编译行映射）替代 DRF 逐字段序列化
+    use_projection = True
+
     def get_queryset(self):
         qs = super().get_queryset()
         model = qs.model
@@ -178,6 +233,142 @@ class BaseViewSet(viewsets.ModelViewSet):
                 pass
         return qs
 
+    def get_sparse_fields(self):
+        request = getattr(self, 'request', None)
+        if request is None or request.method not in ('GET', 'HEAD'):
+            return None
+        raw = request.query_params.get(self.fields_query_param)
+        if not raw:
+            return None
+        return {f.strip() for f in raw.split(',') if f.strip()} or None
+
+    def is_field_requested(self, name):
+        """稀疏字段模式下该字段是否会输出；未指定 fields 或 fields 全部未知时视为全部输出。"""
+        fields = self.get_sparse_fields()
+        if not fields:
+            return True
+        known = set(getattr(self.get_serializer_class().Meta, 'fields', ()))
+        return name in fields or not (fields & known)
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        fields = self.get_sparse_fields()
+        if fields:
+            target = getattr(serializer, 'child', serializer)
+            # 全部为未知字段时保持完整输出
+            if fields & set(target.fields):
+                for name in list(target.fields):
+                    if name not in fields:
+                        target.fields.pop(name)
+        return serializer
+
+    def get_sparse_columns(self, model):
+        """
+        将保留的序列化字段映射为模型列名供 .only() 使用；
+        无法确定依赖列（如未声明 method_field_sources 的方法字段）时返回 None，不收窄查询。
+        """
+        if not self.get_sparse_fields():
+            return None
+        serializer = self.get_serializer()
+        method_sources = getattr(serializer, 'method_field_sources', {})
+        columns = {model._meta.pk.name}
+        for name, field in serializer.fields.items():
+            if isinstance(field, serializers.SerializerMethodField):
+                if name not in method_sources:
+                    return None
+                columns.update(method_sources[name])
+                continue
+            if field.source == '*':
+                return None
+            attr = field.source_attrs[0]
+            try:
+                columns.add(model._meta.get_field(attr).name)
+            except FieldDoesNotExist:
+                if hasattr(model, attr):
+                    return None
+        return columns
+
+    def filter_queryset(self, queryset):
+        with profile_section('queryset'):
+            queryset = super().filter_queryset(queryset)
+            # UNION 等组合查询（如按月分区的日志）不支持 .only()
+            if queryset.query.combinator:
+                return queryset
+            columns = self.get_sparse_columns(queryset.model)
+            if columns:
+                queryset = queryset.only(*columns)
+            return queryset
+
+    def get_projection(self):
+        request = getattr(self, 'request', None)
+        if not self.use_projection or request is None or request.method not in ('GET', 'HEAD'):
+            return None
+        return ReadOnlyProjection.for_serializer(self.get_serializer())
+
+    def paginate_and_serialize(self, queryset):
+        """
+        列表分页 + 序列化，返回 (是否分页, 数据)。可投影时分页与取数都基于 values() 行，
+        否则回退为 DRF 序列化器。
+        """
+        projection = self.get_projection()
+        source = projection.values(queryset) if projection else queryset
+        page = self.paginate_queryset(source)
+        rows = source if page is None else page
+        with profile_section('serialize'):
+            if projection:
+                return page is not None, projection.to_representation(rows)
+            return page is not None, self.get_serializer(rows, many=True).data
+
+    def serialize_list(self, queryset):
+        """不分页列表（如菜单、部门树数据源）的序列化，同样优先走只读投影。"""
+        projection = self.get_projection()
+        with profile_section('serialize'):
+            if projection:
+                return projection.to_representation(projection.values(queryset))
+            return self.get_serializer(queryset, many=True).data
+
+    def get_data_scope_fingerprint(self, user):
+        """
+        数据范围指纹：由用户的角色及其数据范围、所属部门组成（仅本人范围时再加入用户 id），
+        数据范围相同的用户共享列表缓存。结果按角色写版本缓存，避免每次请求查询角色。
+        """
+        memo_key = f'datascope:{user.pk}:{model_version(UserRole)}:{model_version(Role)}:{getattr(user, "dept_id", None)}'
+        fingerprint = cache.get(memo_key)
+        if fingerprint is None:
+            scopes = sorted(
+                UserRole.objects.filter(user_id=user.pk, role__del_flag='0')
+                .values_list('role_id', 'role__data_scope')
+            )
+            parts = [scopes, getattr(user, 'dept_id', None)]
+            if not scopes or any(scope == '5' for _, scope in scopes):
+                parts.append(user.pk)
+            fingerprint = version_etag(*parts).strip('"')
+            cache.set(memo_key, fingerprint, timeout=3600)
+        return fingerprint
+
+    def get_list_cache_key(self, request):
+        """
+        列表缓存键：(视图集, 动作, 规范化查询参数, 数据范围指纹, 模型写版本)。
+        查询参数按键排序、去除空值；仅对 JSON 渲染的 GET 请求生效。
+        """
+        if not self.list_cache_timeout or request.method != 'GET' or not version_cache_usable():
+            return None
+        if getattr(getattr(request, 'accepted_renderer', None), 'format', None) != 'json':
+            return None
+        user = getattr(request, 'user', None)
+        if user is None or not user.is_authenticated:
+            return None
+        params = []
+        for name, values in sorted(request.query_params.lists()):
+            values = sorted(v for v in values if v != '')
+            if values:
+                params.append((name, values))
+        model = self.get_serializer_class().Meta.model
+        versions = [model_version(m) for m in (model, *self.etag_version_models)]
+        view = f'{type(self).__module__}.{type(self).__name__}:{self.action}'
+        digest = version_etag(view, params, self.get_data_scope_fingerprint(user), *versions).strip('"')
+        return f'list:{model._meta.db_table}:{digest}'
+
     # 通用响应封装
     def ok(self, msg='操作成功'):
         return Response({'code': 200, 'msg': msg})
@@ -194,15 +385,13 @@ class BaseViewSet(viewsets.ModelViewSet):
     def raw_response(self, data):
         return Response(data)
     
+    @cache_list_response
     def list(self, request, *args, **kwargs):
-        queryset = self.get_queryset()
-        page = self.paginate_queryset(queryset)
-        if page is not None:
-            serializer = self.get_serializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
-        serializer = self.get_serializer(queryset, many=True)
-        # return Response({'total': len(serializer.data), 'rows': serializer.data, 'code': 200, 'msg': '操作成功'})
-        return self.raw_response({'total': len(serializer.data), 'rows': serializer.data, 'code': 200, 'msg': '操作成功'})
+        queryset = self.filter_queryset(self.get_queryset())
+        paginated, data = self.paginate_and_serialize(queryset)
+        if paginated:
+            return self.get_paginated_response(data)
+        return self.raw_response({'total': len(data), 'rows': data, 'code': 200, 'msg': '操作成功'})
 
     @audit_log
     def create(self, request, *args, **kwargs):
@@ -222,6 +411,10 @@ class BaseViewSet(viewsets.ModelViewSet):
 
     @audit_log
     def destroy(self, request, *args, **kwargs):
+        # 兼容前端批量删除 DELETE /xxx/1,2,3：软删除模型以一条 UPDATE ... WHERE id IN 完成
+        lookup = str(self.kwargs.get(self.lookup_url_kwarg or self.lookup_field, ''))
+        if ',' in lookup:
+            return self.bulk_destroy(request, [i for i in lookup.split(',') if i])
         instance = self.get_object()
         if hasattr(instance, 'del_flag'):
             instance.del_flag = '1'
@@ -229,11 +422,89 @@ class BaseViewSet(viewsets.ModelViewSet):
             return self.ok()
         return super().destroy(request, *args, **kwargs)
 
+    def bulk_destroy(self, request, ids):
+        """
+        批量删除：与单条删除的 get_object 一致，只作用于 get_queryset() 范围内的记录，并在视图集
+        声明了对象级权限时逐条校验；任一 id 不存在（或已删除）时不做修改，返回 404 及未匹配的 id。
+        """
+        try:
+            ids = {int(i) for i in ids}
+        except ValueError:
+            return self.error('参数错误')
+        queryset = self.get_queryset().filter(pk__in=ids)
+        Model = queryset.model
+        soft_delete = hasattr(Model, 'del_flag')
+        if soft_delete:
+            queryset = queryset.filter(del_flag='0')
+        if self.has_object_permissions():
+            objects = list(queryset)
+            for obj in objects:
+                self.check_object_permissions(request, obj)
+            matched = {obj.pk for obj in objects}
+        else:
+            matched = set(queryset.values_list('pk', flat=True))
+        missing = sorted(ids - matched)
+        if missing:
+            return self.not_found(f"数据不存在：{','.join(str(i) for i in missing)}")
+        queryset = Model._base_manager.filter(pk__in=matched)
+        if not soft_delete:
+            queryset.delete()
+            bump_model_version(Model)
+            return self.ok()
+        fields = {'del_flag': '1'}
+        user = getattr(request, 'user', None)
+        if hasattr(Model, 'update_by') and user and getattr(user, 'username', None):
+            fields['update_by'] = user.username
+        if hasattr(Model, 'update_time'):
+            fields['update_time'] = timezone.now()
+        queryset.update(**fields)
+        bump_model_version(Model)
+        return self.ok()
+
+    def has_object_permissions(self):
+        """视图集的权限类中是否有实现了对象级校验（has_object_permission）的类。"""
+        return any(
+            type(permission).has_object_permission is not BasePermission.has_object_permission
+            for permission in self.get_permissions()
+        )
+
+    def get_object_etag(self):
+        """
+        详情 ETag：由对象 update_time、请求路径（含 ?fields= 等参数）及 etag_version_models 的写版本派生，
+        只查询 update_time 一列，命中 If-None-Match 时无需加载与序列化对象。
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        lookup = self.kwargs.get(lookup_url_kwarg)
+        model = queryset.model
+        if lookup is None or not hasattr(model, 'update_time'):
+            return None
+        try:
+            update_time = (
+                queryset.prefetch_related(None).filter(**{self.lookup_field: lookup})
+                .values_list('update_time', flat=True).first()
+            )
+        except (TypeError, ValueError):
+            return None
+        if update_time is None:
+            return None
+        versions = [model_version(m) for m in self.etag_version_models]
+        return version_etag(model._meta.db_table, lookup, update_time.isoformat(), self.request.get_full_path(), *versions)
+
     # 统一数据详情响应包装
     def retrieve(self, request, *args, **kwargs):
+        etag = self.get_object_etag()
+        if etag:
+            response = not_modified(request, etag)
+            if response is not None:
+                return response
         instance = self.get_object()
-        data = self.get_serializer(instance).data
-        return self.data(data)
+        with profile_section('serialize'):
+            data = self.get_serializer(instance).data
+        response = self.data(data)
+        if etag:
+            response['ETag'] = etag
+        return response
 
     @audit_log
     def partial_update(self, request, *args, **kwargs):
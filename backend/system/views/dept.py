@@ -5,6 +5,7 @@ from rest_framework import status
 
 from .core import BaseViewSet
 from ..permission import HasRolePermission
+from ..common import model_version, not_modified, version_etag
 from ..models import Dept
 from ..serializers import (
     DeptSerializer,
@@ -21,11 +22,19 @@ class DeptViewSet(BaseViewSet):
     update_body_serializer_class = DeptUpdateSerializer
     update_body_id_field = 'deptId'
 
+    def list_etag(self, request):
+        # 部门列表随部门写版本与查询参数变化
+        return version_etag('dept-list', model_version(Dept), request.get_full_path())
+
     def list(self, request, *args, **kwargs):
+        etag = self.list_etag(request)
+        response = not_modified(request, etag)
+        if response is not None:
+            return response
         s = DeptQuerySerializer(data=request.query_params)
         s.is_valid(raise_exception=True)
         data = s.validated_data
-        qs = self.get_queryset()
+        qs = self.filter_queryset(self.get_queryset())
 
         dept_name = data.get('deptName')
         status_value = data.get('status')
@@ -34,8 +43,7 @@ class DeptViewSet(BaseViewSet):
         if status_value:
             qs = qs.filter(status=status_value)
 
-        serializer = self.get_serializer(qs, many=True)
-        return Response({"code": 200, "msg": "操作成功", "data": serializer.data})
+        return Response({"code": 200, "msg": "操作成功", "data": self.serialize_list(qs)}, headers={'ETag': etag})
 
     # 详情响应由 BaseViewSet.retrieve 统一封装
 
@@ -93,6 +101,10 @@ class DeptViewSet(BaseViewSet):
     @action(detail=False, methods=['get'], url_path=r'list/exclude/(?P<deptId>\d+)')
     def list_exclude_child(self, request, deptId=None):
         # 返回排除指定部门及其所有子部门的列表（用于上级部门选择）
+        etag = self.list_etag(request)
+        response = not_modified(request, etag)
+        if response is not None:
+            return response
         try:
             root_id = int(deptId)
         except Exception:
@@ -114,4 +126,4 @@ class DeptViewSet(BaseViewSet):
 
         filtered = [d for d in items if d.dept_id not in exclude_ids]
         serializer = self.get_serializer(filtered, many=True)
-        return Response({"code": 200, "msg": "操作成功", "data": serializer.data})
\ No newline at end of file
+        return Response({"code": 200, "msg": "操作成功", "data": serializer.data}, headers={'ETag': etag})
\ No newline at end of file
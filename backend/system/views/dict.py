@@ -10,13 +10,36 @@ from ..serializers import (
     DictTypeQuerySerializer, DictDataQuerySerializer
 )
 from ..permission import HasRolePermission
-from .core import BaseViewSet
+from ..common import model_version, not_modified, version_etag
+from ..compression import CachedPayload
+from ..profiling import record_cache
+from .core import BaseViewSet, cache_list_response
+
+
+def refresh_dict_data_cache(dict_type):
+    """重建某字典类型的数据缓存（含预渲染、预压缩的响应体），返回新的缓存载荷。"""
+    version = model_version(DictData)
+    qs = DictData.objects.filter(dict_type=dict_type, status='0', del_flag='0').order_by('dict_sort', 'dict_label')
+    payload = CachedPayload(DictDataSerializer(qs, many=True).data, version=version)
+    cache.set(f'dict_data_by_type:{dict_type}', payload, timeout=3600)
+    return payload
+
+
+def get_dict_data_payload(dict_type, version):
+    """读取某字典类型的缓存载荷，缓存缺失或版本过期时重建。"""
+    cached = cache.get(f'dict_data_by_type:{dict_type}')
+    hit = isinstance(cached, CachedPayload) and cached.version == version
+    record_cache(hit)
+    if hit:
+        return cached
+    return refresh_dict_data_cache(dict_type)
 
 
 class DictTypeViewSet(BaseViewSet):
     permission_classes = [IsAuthenticated, HasRolePermission]
     queryset = DictType.objects.filter(del_flag='0').order_by('-create_time')
     serializer_class = DictTypeSerializer
+    list_cache_timeout = 300
 
     def get_queryset(self):
         qs = DictType.objects.filter(del_flag='0')
@@ -34,30 +57,20 @@ class DictTypeViewSet(BaseViewSet):
             qs = qs.filter(status=status_value)
         return qs.order_by('-create_time')
 
+    @cache_list_response
     def list(self, request, *args, **kwargs):
-        qs = self.get_queryset()
-        page = self.paginate_queryset(qs)
-        if page is not None:
-            serializer = self.get_serializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
-        serializer = self.get_serializer(qs, many=True)
-        return Response({'code': 200, 'msg': '操作成功', 'rows': serializer.data, 'total': len(serializer.data)})
-
-    def retrieve(self, request, *args, **kwargs):
-        instance = self.get_object()
-        data = self.get_serializer(instance).data
-        return Response({'code': 200, 'msg': '操作成功', 'data': data})
+        qs = self.filter_queryset(self.get_queryset())
+        paginated, data = self.paginate_and_serialize(qs)
+        if paginated:
+            return self.get_paginated_response(data)
+        return Response({'code': 200, 'msg': '操作成功', 'rows': data, 'total': len(data)})
 
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         serializer.save()
         # 更新该类型缓存
-        dict_type = serializer.instance.dict_type
-        cache_key = f'dict_data_by_type:{dict_type}'
-        qs = DictData.objects.filter(dict_type=dict_type, status='0', del_flag='0').order_by('dict_sort', 'dict_label')
-        data = self.get_serializer(qs, many=True).data
-        cache.set(cache_key, data, timeout=3600)
+        refresh_dict_data_cache(serializer.instance.dict_type)
         return Response({'code': 200, 'msg': '操作成功'})
 
     def update(self, request, *args, **kwargs):
@@ -70,10 +83,7 @@ class DictTypeViewSet(BaseViewSet):
         # 如果类型发生变化，同时更新旧类型与新类型缓存
         new_type = serializer.instance.dict_type
         for t in {old_type, new_type}:
-            cache_key = f'dict_data_by_type:{t}'
-            qs = DictData.objects.filter(dict_type=t, status='0', del_flag='0').order_by('dict_sort', 'dict_label')
-            data = self.get_serializer(qs, many=True).data
-            cache.set(cache_key, data, timeout=3600)
+            refresh_dict_data_cache(t)
         return Response({'code': 200, 'msg': '操作成功'})
 
     def destroy(self, request, *args, **kwargs):
@@ -81,11 +91,7 @@ class DictTypeViewSet(BaseViewSet):
         instance.del_flag = '1'
         instance.save(update_fields=['del_flag'])
         # 刷新对应类型缓存
-        dict_type = instance.dict_type
-        cache_key = f'dict_data_by_type:{dict_type}'
-        qs = DictData.objects.filter(dict_type=dict_type, status='0', del_flag='0').order_by('dict_sort', 'dict_label')
-        data = self.get_serializer(qs, many=True).data
-        cache.set(cache_key, data, timeout=3600)
+        refresh_dict_data_cache(instance.dict_type)
         return Response({'code': 200, 'msg': '操作成功'})
 
     @action(detail=False, methods=['delete'], url_path='refreshCache')
@@ -95,19 +101,26 @@ class DictTypeViewSet(BaseViewSet):
 
     @action(detail=False, methods=['get'], url_path='optionselect')
     def optionselect(self, request):
+        version = model_version(DictType)
+        etag = version_etag('dict-optionselect', version)
+        response = not_modified(request, etag)
+        if response is not None:
+            return response
         cached = cache.get('dict_optionselect')
-        if cached is not None:
-            return Response({'code': 200, 'msg': '操作成功', 'data': cached})
+        if isinstance(cached, CachedPayload) and cached.version == version:
+            return cached.response(request, etag)
         qs = DictType.objects.filter(status='0', del_flag='0').order_by('dict_name')
         data = [{'dictId': d.dict_id, 'dictName': d.dict_name, 'dictType': d.dict_type} for d in qs]
-        cache.set('dict_optionselect', data, timeout=300)
-        return Response({'code': 200, 'msg': '操作成功', 'data': data})
+        payload = CachedPayload(data, version=version)
+        cache.set('dict_optionselect', payload, timeout=300)
+        return payload.response(request, etag)
 
 
 class DictDataViewSet(BaseViewSet):
     permission_classes = [IsAuthenticated, HasRolePermission]
     queryset = DictData.objects.filter(del_flag='0').order_by('-create_time')
     serializer_class = DictDataSerializer
+    list_cache_timeout = 300
 
     def get_queryset(self):
         qs = DictData.objects.filter(del_flag='0')
@@ -125,19 +138,13 @@ class DictDataViewSet(BaseViewSet):
             qs = qs.filter(status=status_value)
         return qs.order_by('-create_time')
 
+    @cache_list_response
     def list(self, request, *args, **kwargs):
-        qs = self.get_queryset()
-        page = self.paginate_queryset(qs)
-        if page is not None:
-            serializer = self.get_serializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
-        serializer = self.get_serializer(qs, many=True)
-        return Response({'code': 200, 'msg': '操作成功', 'rows': serializer.data, 'total': len(serializer.data)})
-
-    def retrieve(self, request, *args, **kwargs):
-        instance = self.get_object()
-        data = self.get_serializer(instance).data
-        return Response({'code': 200, 'msg': '操作成功', 'data': data})
+        qs = self.filter_queryset(self.get_queryset())
+        paginated, data = self.paginate_and_serialize(qs)
+        if paginated:
+            return self.get_paginated_response(data)
+        return Response({'code': 200, 'msg': '操作成功', 'rows': data, 'total': len(data)})
 
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
@@ -166,11 +173,9 @@ class DictDataViewSet(BaseViewSet):
 
     @action(detail=False, methods=['get'], url_path=r'type/(?P<dict_type>[^/]+)')
     def by_type(self, request, dict_type=None):
-        cache_key = f'dict_data_by_type:{dict_type}'
-        cached = cache.get(cache_key)
-        if cached is not None:
-            return Response({'code': 200, 'msg': '操作成功', 'data': cached})
-        qs = DictData.objects.filter(dict_type=dict_type, status='0', del_flag='0').order_by('dict_sort', 'dict_label')
-        serializer = self.get_serializer(qs, many=True)
-        cache.set(cache_key, serializer.data, timeout=3600)
-        return Response({'code': 200, 'msg': '操作成功', 'data': serializer.data})
\ No newline at end of file
+        version = model_version(DictData)
+        etag = version_etag('dict-data-by-type', dict_type, version)
+        response = not_modified(request, etag)
+        if response is not None:
+            return response
+        return get_dict_data_payload(dict_type, version).response(request, etag)
\ No newline at end of file
@@ -5,6 +5,7 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from .core import BaseViewSet
 from ..permission import HasRolePermission
+from ..common import model_version, not_modified, version_etag
 from ..models import Menu, RoleMenu
 from ..serializers import MenuSerializer, MenuQuerySerializer, MenuCreateSerializer, MenuUpdateSerializer
 
@@ -22,7 +23,7 @@ class MenuViewSet(BaseViewSet):
         data = s.validated_data
         menu_name = data.get('menuName')
         status_value = data.get('status')
-        qs = self.get_queryset()
+        qs = self.filter_queryset(self.get_queryset())
         if menu_name:
             qs = qs.filter(menu_name__icontains=menu_name)
         if status_value:
@@ -31,8 +32,7 @@ class MenuViewSet(BaseViewSet):
         # if page is not None:
         #     serializer = self.get_serializer(page, many=True)
         #     return self.get_paginated_response(serializer.data)
-        serializer = self.get_serializer(qs, many=True)
-        return Response({"code": 200, "msg": "操作成功", "data": serializer.data})
+        return Response({"code": 200, "msg": "操作成功", "data": self.serialize_list(qs)})
 
     def create(self, request, *args, **kwargs):
         v = MenuCreateSerializer(data=request.data)
@@ -52,6 +52,10 @@ class MenuViewSet(BaseViewSet):
 
     @action(detail=False, methods=['get'])
     def treeselect(self, request):
+        etag = version_etag('menu-treeselect', model_version(Menu))
+        response = not_modified(request, etag)
+        if response is not None:
+            return response
         qs = self.get_queryset()
         items = list(qs)
 
@@ -67,7 +71,7 @@ class MenuViewSet(BaseViewSet):
             return res
 
         data = build_tree(items, 0)
-        return Response({"code": 200, "msg": "操作成功", "data": data})
+        return Response({"code": 200, "msg": "操作成功", "data": data}, headers={'ETag': etag})
 
     @action(detail=False, methods=['get'], url_path=r'roleMenuTreeselect/(?P<roleId>\d+)')
     def roleMenuTreeselect(self, request, roleId=None):
@@ -0,0 +1,275 @@
+from django.conf import settings
+from django.http import HttpResponse
+from rest_framework import generics
+from rest_framework.decorators import action
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from .core import BaseViewSet
+from ..permission import HasRolePermission, MetricsPermission
+from ..models import LoginInforDaily
+from ..partitions import login_log_partitions, oper_log_partitions
+from ..metrics import registry, render
+from ..profiling import recent_profiles
+from .. import request_profiler, server_monitor
+from ..error_telemetry import error_groups
+from ..slowquery import slow_query_stats
+from ..serializers import (
+    LoginInforSerializer,
+    LoginInforQuerySerializer,
+    LoginInforDailySerializer,
+    LoginInforDailyQuerySerializer,
+    OperLogSerializer,
+    OperLogQuerySerializer,
+    RequestCaptureSignSerializer,
+)
+
+
+class LoginInforViewSet(BaseViewSet):
+    """
+    登录日志查询：list 查询原始登录事件（按 beginTime/endTime 裁剪月分区），
+    daily 查询按日汇总（见 rollup_logininfor 命令）。
+    """
+    permission_classes = [IsAuthenticated, HasRolePermission]
+    required_roles = ['admin']
+    http_method_names = ['get', 'head', 'options']
+    serializer_class = LoginInforSerializer
+
+    def get_serializer_class(self):
+        if self.action == 'daily':
+            return LoginInforDailySerializer
+        return LoginInforSerializer
+
+    def get_queryset(self):
+        if self.action == 'daily':
+            return self.get_daily_queryset()
+        s = LoginInforQuerySerializer(data=self.request.query_params)
+        s.is_valid(raise_exception=True)
+        data = s.validated_data
+
+        def apply(qs):
+            if data.get('userName'):
+                qs = qs.filter(user_name=data['userName'])
+            if data.get('ipaddr'):
+                qs = qs.filter(ipaddr__icontains=data['ipaddr'])
+            if data.get('status'):
+                qs = qs.filter(status=data['status'])
+            return qs
+
+        qs = login_log_partitions.union(data.get('beginTime'), data.get('endTime'), apply)
+        return qs.order_by('-login_time')
+
+    def get_daily_queryset(self):
+        qs = LoginInforDaily.objects.all()
+        s = LoginInforDailyQuerySerializer(data=self.request.query_params)
+        s.is_valid(raise_exception=True)
+        data = s.validated_data
+        if data.get('userName'):
+            qs = qs.filter(user_name=data['userName'])
+        if data.get('ipaddr'):
+            qs = qs.filter(ipaddr=data['ipaddr'])
+        if data.get('status'):
+            qs = qs.filter(status=data['status'])
+        if data.get('beginDate'):
+            qs = qs.filter(stat_date__gte=data['beginDate'])
+        if data.get('endDate'):
+            qs = qs.filter(stat_date__lte=data['endDate'])
+        return qs.order_by('-stat_date', 'user_name', 'ipaddr', 'status')
+
+    @action(detail=False, methods=['get'], url_path='daily')
+    def daily(self, request):
+        return self.list(request)
+
+    def retrieve(self, request, *args, **kwargs):
+        # 分区表主键跨月不唯一，不提供按主键查询
+        return self.not_found()
+
+
+class OperLogViewSet(BaseViewSet):
+    """操作日志查询：按 beginTime/endTime 裁剪月分区，按操作人走 (用户, 时间) 索引。"""
+    permission_classes = [IsAuthenticated, HasRolePermission]
+    required_roles = ['admin']
+    http_method_names = ['get', 'head', 'options']
+    serializer_class = OperLogSerializer
+
+    def get_queryset(self):
+        s = OperLogQuerySerializer(data=self.request.query_params)
+        s.is_valid(raise_exception=True)
+        data = s.validated_data
+
+        def apply(qs):
+            if data.get('operName'):
+                qs = qs.filter(oper_name=data['operName'])
+            if data.get('operUrl'):
+                qs = qs.filter(oper_url__startswith=data['operUrl'])
+            if data.get('requestMethod'):
+                qs = qs.filter(request_method=data['requestMethod'])
+            if data.get('status'):
+                qs = qs.filter(status=data['status'])
+            return qs
+
+        qs = oper_log_partitions.union(data.get('beginTime'), data.get('endTime'), apply)
+        return qs.order_by('-oper_time')
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.not_found()
+
+
+class ProfileListView(generics.GenericAPIView):
+    """
+    最近请求剖析结果（需开启 REQUEST_PROFILING），新→旧。
+    ?nplusone=1 只看疑似 N+1 的请求，?path= 按路径前缀过滤，?limit= 限制条数（默认 50）。
+    """
+    permission_classes = [IsAuthenticated, HasRolePermission]
+    required_roles = ['admin']
+
+    def get(self, request):
+        rows = recent_profiles.snapshot()
+        if request.query_params.get('nplusone') in ('1', 'true'):
+            rows = [r for r in rows if r['repeatedQueries']]
+        path = request.query_params.get('path')
+        if path:
+            rows = [r for r in rows if r['path'].startswith(path)]
+        try:
+            limit = max(1, int(request.query_params.get('limit', 50)))
+        except ValueError:
+            limit = 50
+        return Response({
+            'code': 200,
+            'msg': '操作成功',
+            'enabled': getattr(settings, 'REQUEST_PROFILING', False),
+            'total': len(rows),
+            'rows': rows[:limit],
+        })
+
+
+class SlowQueryView(generics.GenericAPIView):
+    """慢 SQL 指纹聚合（当前窗口，按总耗时降序）；DELETE 输出到日志并清零窗口。"""
+    permission_classes = [IsAuthenticated, HasRolePermission]
+    required_roles = ['admin']
+
+    def get(self, request):
+        data = slow_query_stats.snapshot()
+        return Response({
+            'code': 200,
+            'msg': '操作成功',
+            'thresholdMs': getattr(settings, 'SLOW_QUERY_MS', None),
+            'since': data['since'],
+            'overflow': data['overflow'],
+            'total': len(data['rows']),
+            'rows': data['rows'],
+        })
+
+    def delete(self, request):
+        slow_query_stats.dump()
+        return Response({'code': 200, 'msg': '操作成功'})
+
+
+class MetricsView(generics.GenericAPIView):
+    """
+    Prometheus 指标（文本格式 0.0.4）：各路由请求数/状态码/耗时直方图、请求内 SQL 条数、应用层缓存命中、
+    异步日志写入器队列深度与进程内存。配置 METRICS_DIR 时汇总全部 worker 进程。
+    p99 告警示例：histogram_quantile(0.99, sum by (le, route) (rate(http_request_duration_seconds_bucket[5m])))
+    """
+    permission_classes = [MetricsPermission]
+
+    def get(self, request):
+        body = render(registry.collect(), registry.buckets)
+        return HttpResponse(body, content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+class RequestCaptureListView(generics.GenericAPIView):
+    """按需剖析结果列表（新→旧），需先通过 /monitor/captures/sign 签发令牌并在目标请求中携带。"""
+    permission_classes = [IsAuthenticated, HasRolePermission]
+    required_roles = ['admin']
+
+    def get(self, request):
+        rows = request_profiler.list_captures()
+        return Response({'code': 200, 'msg': '操作成功', 'total': len(rows), 'rows': rows})
+
+
+class RequestCaptureDetailView(generics.GenericAPIView):
+    """单次剖析详情：CPU 前 N 个函数（?sort=cumulative|tottime|ncalls）及内存分配前 N 行。"""
+    permission_classes = [IsAuthenticated, HasRolePermission]
+    required_roles = ['admin']
+    sort_keys = ('cumulative', 'tottime', 'ncalls')
+
+    def get(self, request, capture_id):
+        sort = request.query_params.get('sort') or 'cumulative'
+        if sort not in self.sort_keys:
+            return Response({'code': 400, 'msg': f'sort 仅支持 {", ".join(self.sort_keys)}'}, status=400)
+        data = request_profiler.load_capture(capture_id, sort)
+        if data is None:
+            return Response({'code': 404, 'msg': '未找到'}, status=404)
+        return Response({'code': 200, 'msg': '操作成功', 'data': data})
+
+
+class RequestCaptureSignView(generics.GenericAPIView):
+    """签发剖析令牌：POST {method, path}，返回在目标请求中携带的请求头。"""
+    permission_classes = [IsAuthenticated, HasRolePermission]
+    required_roles = ['admin']
+    serializer_class = RequestCaptureSignSerializer
+
+    def post(self, request):
+        s = self.get_serializer(data=request.data)
+        s.is_valid(raise_exception=True)
+        data = s.validated_data
+        return Response({
+            'code': 200,
+            'msg': '操作成功',
+            'enabled': getattr(settings, 'REQUEST_CAPTURE_ENABLED', False),
+            'header': request_profiler.HEADER,
+            'token': request_profiler.sign(data['method'], data['path']),
+            'expiresIn': getattr(settings, 'REQUEST_CAPTURE_TOKEN_MAX_AGE', 600),
+        })
+
+
+class ServerMonitorView(generics.GenericAPIView):
+    """
+    服务监控：CPU、内存、Python 运行时、磁盘、进程（线程数/打开文件数）、数据库文件与 WAL 大小、
+    连接存活时长、缓存条目与命中率、后台队列深度及运行时长。数据均读取自 /proc 与进程内计数，
+    并在 SERVER_MONITOR_CACHE_SECONDS 内复用，前端可每隔数秒轮询。
+    """
+    permission_classes = [IsAuthenticated, HasRolePermission]
+    required_roles = ['admin']
+
+    def get(self, request):
+        return Response({'code': 200, 'msg': '操作成功', 'data': server_monitor.snapshot()})
+
+
+class ErrorGroupView(generics.GenericAPIView):
+    """
+    接口异常分组（按指纹聚合，次数降序）：?kind=client|server 过滤，?limit= 限制条数（默认 50）；
+    ?fingerprint= 查看单个分组及保留的堆栈。DELETE 清空。
+    """
+    permission_classes = [IsAuthenticated, HasRolePermission]
+    required_roles = ['admin']
+
+    def get(self, request):
+        key = request.query_params.get('fingerprint')
+        if key:
+            group = error_groups.get(key)
+            if group is None:
+                return Response({'code': 404, 'msg': '未找到'}, status=404)
+            return Response({'code': 200, 'msg': '操作成功', 'data': group})
+        kind = request.query_params.get('kind') or None
+        if kind not in (None, 'client', 'server'):
+            return Response({'code': 400, 'msg': 'kind 仅支持 client、server'}, status=400)
+        try:
+            limit = max(1, int(request.query_params.get('limit', 50)))
+        except ValueError:
+            limit = 50
+        data = error_groups.snapshot(kind)
+        return Response({
+            'code': 200,
+            'msg': '操作成功',
+            'since': data['since'],
+            'evicted': data['evicted'],
+            'total': len(data['groups']),
+            'rows': data['groups'][:limit],
+            'recent': data['recent'][:limit],
+        })
+
+    def delete(self, request):
+        error_groups.clear()
+        return Response({'code': 200, 'msg': '操作成功'})
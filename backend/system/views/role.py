@@ -2,9 +2,15 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework import status
+from django.db import connection, transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
 
 from .core import BaseViewSet
+from .user import apply_user_filters
 from ..permission import HasRolePermission
+from ..common import bump_model_version
+from ..pagination import KeysetPagination
 from ..models import Role, RoleMenu, Menu, User, UserRole
 from ..serializers import (
     RoleSerializer,
@@ -15,6 +21,7 @@ from ..serializers import (
     RoleDataScopeSerializer,
     UserQuerySerializer,
     UserSerializer,
+    AuthUserFilterSerializer,
 )
 
 
@@ -22,6 +29,7 @@ class RoleViewSet(BaseViewSet):
     permission_classes = [IsAuthenticated, HasRolePermission]
     queryset = Role.objects.filter(del_flag='0').order_by('create_time')
     serializer_class = RoleSerializer
+    list_cache_timeout = 300
     update_body_serializer_class = RoleUpdateSerializer
     update_body_id_field = 'roleId'
 
@@ -61,27 +69,71 @@ class RoleViewSet(BaseViewSet):
         # 处理菜单关联
         menu_ids = vd.get('menuIds') or []
         if menu_ids:
-            menus = list(Menu.objects.filter(menu_id__in=menu_ids, del_flag='0').values_list('menu_id', flat=True))
-            RoleMenu.objects.bulk_create([RoleMenu(role=role, menu_id=mid) for mid in menus])
+            self._sync_role_menus(role, menu_ids)
 
         return self.ok()
 
     def update(self, request, *args, **kwargs):
         partial = kwargs.pop('partial', False)
         instance = self.get_object()
-        vd = RoleUpdateSerializer(instance, data=request.data, partial=partial)
-        vd.is_valid(raise_exception=True)
-        instance = vd.save()
-        # 更新菜单关联（全量替换）
-        if 'menuIds' in vd:
-            new_ids = set(vd.get('menuIds') or [])
-            RoleMenu.objects.filter(role=instance).delete()
-            if new_ids:
-                menus = list(Menu.objects.filter(menu_id__in=new_ids, del_flag='0').values_list('menu_id', flat=True))
-                RoleMenu.objects.bulk_create([RoleMenu(role=instance, menu_id=mid) for mid in menus])
+        v = RoleUpdateSerializer(instance=instance, data=request.data, partial=partial)
+        v.is_valid(raise_exception=True)
+        # 只更新请求中出现的字段：validated_data 会为缺省字段补上创建时的默认值（如 status='0'）
+        present = set(v.initial_data)
+        vd = {k: val for k, val in v.validated_data.items() if k in present}
+
+        for src, dst in [
+            ('roleName', 'role_name'),
+            ('roleKey', 'role_key'),
+            ('roleSort', 'role_sort'),
+            ('status', 'status'),
+            ('remark', 'remark'),
+            ('dataScope', 'data_scope'),
+        ]:
+            if src in vd:
+                setattr(instance, dst, vd.get(src))
+        for src, dst in [
+            ('menuCheckStrictly', 'menu_check_strictly'),
+            ('deptCheckStrictly', 'dept_check_strictly'),
+        ]:
+            if src in vd:
+                setattr(instance, dst, 1 if vd.get(src) else 0)
+
+        user = getattr(self.request, 'user', None)
+        if user and getattr(user, 'username', None):
+            instance.update_by = user.username
+        with transaction.atomic():
+            instance.save()
+            # 菜单关联按差量同步，未传 menuIds 时保持不变
+            if 'menuIds' in vd:
+                self._sync_role_menus(instance, vd.get('menuIds') or [])
 
         return self.ok()
 
+    def _sync_role_menus(self, role, menu_ids):
+        """
+        按差量同步角色菜单：只插入新增、只删除移除的菜单；集合未变化时不写库。
+        返回集合是否发生变化，变化时递增 RoleMenu 写版本。
+        """
+        wanted = set()
+        if menu_ids:
+            wanted = set(Menu.objects.filter(menu_id__in=set(menu_ids), del_flag='0').values_list('menu_id', flat=True))
+        current = set(RoleMenu.objects.filter(role=role).values_list('menu_id', flat=True))
+        if wanted == current:
+            return False
+        removed = current - wanted
+        added = wanted - current
+        if removed:
+            RoleMenu.objects.filter(role=role, menu_id__in=removed).delete()
+        if added:
+            username = getattr(getattr(self.request, 'user', None), 'username', '') or ''
+            RoleMenu.objects.bulk_create(
+                [RoleMenu(role=role, menu_id=mid, create_by=username, update_by=username) for mid in added],
+                ignore_conflicts=True,
+            )
+        bump_model_version(RoleMenu)
+        return True
+
     @action(detail=False, methods=['put'], url_path='changeStatus')
     def change_status(self, request):
         s = RoleChangeStatusSerializer(data=request.data)
@@ -142,31 +194,13 @@ class RoleViewSet(BaseViewSet):
     # ----- 角色已/未授权用户及授权操作 -----
     @action(detail=False, methods=['get'], url_path='authUser/allocatedList')
     def allocated_user_list(self, request):
-        s = UserQuerySerializer(data=request.query_params)
-        s.is_valid(raise_exception=True)
-        vd = s.validated_data
-        role_id = request.query_params.get('roleId')
-        try:
-            role_id = int(role_id) if role_id is not None else None
-        except Exception:
-            role_id = None
-        if not role_id:
-            return Response({"code": 400, "msg": "缺少参数 roleId"}, status=status.HTTP_400_BAD_REQUEST)
-
-        qs = User.objects.filter(del_flag='0', userrole__role_id=role_id)
-        if vd.get('userName'):
-            qs = qs.filter(username__icontains=vd['userName'])
-        if vd.get('phonenumber'):
-            qs = qs.filter(phonenumber__icontains=vd['phonenumber'])
-        if vd.get('status'):
-            qs = qs.filter(status=vd['status'])
-
-        page = self.paginate_queryset(qs.order_by('-id'))
-        serializer = UserSerializer(page, many=True)
-        return self.get_paginated_response(serializer.data)
+        return self._auth_user_list(request, allocated=True)
 
     @action(detail=False, methods=['get'], url_path='authUser/unallocatedList')
     def unallocated_user_list(self, request):
+        return self._auth_user_list(request, allocated=False)
+
+    def _auth_user_list(self, request, allocated):
         s = UserQuerySerializer(data=request.query_params)
         s.is_valid(raise_exception=True)
         vd = s.validated_data
@@ -178,15 +212,15 @@ class RoleViewSet(BaseViewSet):
         if not role_id:
             return Response({"code": 400, "msg": "缺少参数 roleId"}, status=status.HTTP_400_BAD_REQUEST)
 
-        assigned_user_ids = list(UserRole.objects.filter(role_id=role_id).values_list('user_id', flat=True))
-        qs = User.objects.filter(del_flag='0').exclude(id__in=assigned_user_ids)
-        if vd.get('userName'):
-            qs = qs.filter(username__icontains=vd['userName'])
-        if vd.get('phonenumber'):
-            qs = qs.filter(phonenumber__icontains=vd['phonenumber'])
-        if vd.get('status'):
-            qs = qs.filter(status=vd['status'])
+        # 关联子查询走 (role_id, user_id) 复合索引，避免把已授权用户 id 整体拉回再拼 NOT IN
+        held = Exists(UserRole.objects.filter(role_id=role_id, user_id=OuterRef('pk')))
+        qs = User.objects.filter(del_flag='0').filter(held if allocated else ~held)
+        qs = UserSerializer.setup_eager_loading(apply_user_filters(qs, vd))
 
+        keyset = KeysetPagination()
+        if keyset.is_requested(request):
+            page = keyset.paginate_queryset(qs, request, view=self)
+            return keyset.get_paginated_response(UserSerializer(page, many=True).data)
         page = self.paginate_queryset(qs.order_by('-id'))
         serializer = UserSerializer(page, many=True)
         return self.get_paginated_response(serializer.data)
@@ -198,6 +232,7 @@ class RoleViewSet(BaseViewSet):
         if not role_id or not user_id:
             return Response({"code": 400, "msg": "缺少参数 roleId 或 userId"}, status=status.HTTP_400_BAD_REQUEST)
         UserRole.objects.filter(role_id=role_id, user_id=user_id).delete()
+        bump_model_version(UserRole)
         return Response({"code": 200, "msg": "操作成功"})
 
     @action(detail=False, methods=['put'], url_path='authUser/cancelAll')
@@ -208,6 +243,7 @@ class RoleViewSet(BaseViewSet):
             return Response({"code": 400, "msg": "缺少参数 roleId 或 userIds"}, status=status.HTTP_400_BAD_REQUEST)
         ids = [int(i) for i in str(user_ids).split(',') if i]
         UserRole.objects.filter(role_id=role_id, user_id__in=ids).delete()
+        bump_model_version(UserRole)
         return Response({"code": 200, "msg": "操作成功"})
 
     @action(detail=False, methods=['put'], url_path='authUser/selectAll')
@@ -224,4 +260,57 @@ class RoleViewSet(BaseViewSet):
         creates = [UserRole(role=role, user_id=uid) for uid in ids if uid not in existing]
         if creates:
             UserRole.objects.bulk_create(creates, ignore_conflicts=True)
-        return Response({"code": 200, "msg": "操作成功"})
\ No newline at end of file
+            bump_model_version(UserRole)
+        return Response({"code": 200, "msg": "操作成功"})
+
+    def _filtered_auth_users(self, request):
+        """
+        解析批量授权的筛选条件（与用户列表一致，可来自查询参数或请求体），
+        返回 (角色, 过滤后的用户 QuerySet)；角色不存在时角色为 None。
+        """
+        params = request.query_params.dict()
+        if isinstance(request.data, dict):
+            params.update(request.data)
+        s = AuthUserFilterSerializer(data=params)
+        s.is_valid(raise_exception=True)
+        vd = s.validated_data
+        role = Role.objects.filter(role_id=vd['roleId'], del_flag='0').first()
+        users = apply_user_filters(User.objects.filter(del_flag='0'), vd)
+        return role, users
+
+    @action(detail=False, methods=['put'], url_path='authUser/selectByFilter')
+    def auth_user_select_by_filter(self, request):
+        # 按筛选条件在数据库内一次性授权：INSERT ... SELECT ... WHERE NOT EXISTS
+        role, users = self._filtered_auth_users(request)
+        if not role:
+            return Response({"code": 404, "msg": "角色不存在"}, status=status.HTTP_404_NOT_FOUND)
+        candidates = users.exclude(
+            Exists(UserRole.objects.filter(role_id=role.role_id, user_id=OuterRef('pk')))
+        ).values(User._meta.pk.attname)
+        select_sql, select_params = candidates.query.sql_with_params()
+        username = getattr(request.user, 'username', '') or ''
+        now = connection.ops.adapt_datetimefield_value(timezone.now())
+        qn = connection.ops.quote_name
+        sql = (
+            f"INSERT INTO {qn(UserRole._meta.db_table)} "
+            f"(user_id, role_id, create_by, update_by, create_time, update_time, del_flag) "
+            f"SELECT sub.{qn(User._meta.pk.column)}, %s, %s, %s, %s, %s, %s FROM ({select_sql}) sub"
+        )
+        params = [role.role_id, username, username, now, now, '0', *select_params]
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            affected = cursor.rowcount
+        if affected:
+            bump_model_version(UserRole)
+        return Response({"code": 200, "msg": "操作成功", "data": {"affected": affected}})
+
+    @action(detail=False, methods=['put'], url_path='authUser/cancelByFilter')
+    def auth_user_cancel_by_filter(self, request):
+        # 按筛选条件一次性取消授权：DELETE ... WHERE user_id IN (子查询)
+        role, users = self._filtered_auth_users(request)
+        if not role:
+            return Response({"code": 404, "msg": "角色不存在"}, status=status.HTTP_404_NOT_FOUND)
+        affected, _ = UserRole.objects.filter(role_id=role.role_id, user_id__in=users.values('pk')).delete()
+        if affected:
+            bump_model_version(UserRole)
+        return Response({"code": 200, "msg": "操作成功", "data": {"affected": affected}})
@@ -1,12 +1,18 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
 from rest_framework import status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from django.db.models import Q
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.db.models import Q, Exists, OuterRef
+from django.utils import timezone
 
 from rest_framework.permissions import IsAuthenticated
 from .core import BaseViewSet
 from ..permission import HasRolePermission
-from ..common import audit_log
+from ..common import audit_log, bump_model_version
 from ..serializers import (
     UserSerializer, DeptSerializer, UserProfileSerializer, RoleSerializer,
     UserQuerySerializer, ResetPwdSerializer, ChangeStatusSerializer,
@@ -17,65 +23,86 @@ from ..serializers import UserSerializer, DeptSerializer, UserProfileSerializer,
 
 from drf_spectacular.utils import extend_schema
 
+# 批量重置密码时计算哈希的线程数
+PASSWORD_HASH_WORKERS = min(8, os.cpu_count() or 1)
+
+
+def apply_user_filters(queryset, data):
+    """按 UserQuerySerializer 校验后的条件过滤用户，供用户列表与角色授权等场景复用。"""
+    user_name = data.get('userName') or ''
+    phonenumber = data.get('phonenumber') or ''
+    status_value = data.get('status') or ''
+    dept_id = data.get('deptId')
+    begin_time = data.get('beginTime')
+    end_time = data.get('endTime')
+    if user_name:
+        queryset = queryset.filter(Q(username__icontains=user_name) | Q(nick_name__icontains=user_name))
+    if phonenumber:
+        queryset = queryset.filter(phonenumber__icontains=phonenumber)
+    if status_value:
+        queryset = queryset.filter(status=status_value)
+    if dept_id:
+        queryset = queryset.filter(dept_id=dept_id)
+    if begin_time:
+        queryset = queryset.filter(create_time__gte=begin_time)
+    if end_time:
+        queryset = queryset.filter(create_time__lte=end_time)
+    return queryset
+
+
 class UserViewSet(BaseViewSet):
     permission_classes = [IsAuthenticated, HasRolePermission]
     queryset = User.objects.all()
     serializer_class = UserSerializer
     update_body_serializer_class = UserSerializer
+    etag_version_models = (UserRole, Role, Dept)
+    list_cache_timeout = 300
     def get_queryset(self):
-        queryset = User.objects.all()
         s = UserQuerySerializer(data=self.request.query_params)
         s.is_valid(raise_exception=True)
-        data = s.validated_data
-        user_name = data.get('userName') or ''
-        phonenumber = data.get('phonenumber') or ''
-        status_value = data.get('status') or ''
-        dept_id = data.get('deptId')
-        begin_time = data.get('beginTime')
-        end_time = data.get('endTime')
-        if user_name:
-            queryset = queryset.filter(Q(username__icontains=user_name) | Q(nick_name__icontains=user_name))
-        if phonenumber:
-            queryset = queryset.filter(phonenumber__icontains=phonenumber)
-        if status_value:
-            queryset = queryset.filter(status=status_value)
-        if dept_id:
-            queryset = queryset.filter(dept_id=dept_id)
-        if begin_time:
-            queryset = queryset.filter(create_time__gte=begin_time)
-        if end_time:
-            queryset = queryset.filter(create_time__lte=end_time)
-        return queryset.order_by('-create_time')
+        queryset = apply_user_filters(User.objects.all(), s.validated_data).order_by('-create_time')
+        if self.is_field_requested('roles'):
+            queryset = UserSerializer.setup_eager_loading(queryset)
+        return queryset
     
     @action(detail=False, methods=['put'])
     @audit_log
     def resetPwd(self, request):
         v = ResetPwdSerializer(data=request.data)
         v.is_valid(raise_exception=True)
-        user_id = v.validated_data['userId']
+        user_ids = v.validated_data['userIds']
         password = v.validated_data['password']
-        try:
-            user = User.objects.get(id=user_id)
-            user.set_password(password)
-            user.save()
-            return self.ok('密码重置成功')
-        except User.DoesNotExist:
+        ids = list(User.objects.filter(id__in=user_ids).values_list('id', flat=True))
+        if not ids:
             return self.not_found('用户不存在')
+        # 每个用户独立加盐，批量时在线程池中并行计算哈希（hashlib 计算期间释放 GIL）
+        if len(ids) == 1:
+            hashes = [make_password(password)]
+        else:
+            with ThreadPoolExecutor(max_workers=min(len(ids), PASSWORD_HASH_WORKERS)) as pool:
+                hashes = list(pool.map(make_password, [password] * len(ids)))
+        username = getattr(request.user, 'username', '') or ''
+        now = timezone.now()
+        users = [User(id=uid, password=pwd, update_by=username, update_time=now) for uid, pwd in zip(ids, hashes)]
+        User.objects.bulk_update(users, ['password', 'update_by', 'update_time'], batch_size=500)
+        bump_model_version(User)
+        return self.ok('密码重置成功')
     
     @action(detail=False, methods=['put'])
     @audit_log
     def changeStatus(self, request):
         v = ChangeStatusSerializer(data=request.data)
         v.is_valid(raise_exception=True)
-        user_id = v.validated_data['userId']
+        user_ids = v.validated_data['userIds']
         status_value = v.validated_data['status']
-        try:
-            user = User.objects.get(id=user_id)
-            user.status = status_value
-            user.save()
-            return self.ok('状态修改成功')
-        except User.DoesNotExist:
+        username = getattr(request.user, 'username', '') or ''
+        updated = User.objects.filter(id__in=user_ids).update(
+            status=status_value, update_by=username, update_time=timezone.now()
+        )
+        if not updated:
             return self.not_found('用户不存在')
+        bump_model_version(User)
+        return self.ok('状态修改成功')
     
     @action(detail=False, methods=['get'])
     def deptTree(self, request):
@@ -144,18 +171,17 @@ class UserViewSet(BaseViewSet):
         user_id = v.validated_data['userId']
         try:
             user = User.objects.get(id=user_id)
-            roles = Role.objects.filter(status='0', del_flag='0')
-            user_roles = UserRole.objects.filter(user=user).values_list('role_id', flat=True)
-            
-            roles_data = []
-            for role in roles:
-                role_data = RoleSerializer(role).data
-                role_data['flag'] = role.role_id in user_roles
-                roles_data.append(role_data)
-            
-            return self.data({'user': UserSerializer(user).data, 'roles': roles_data})
         except User.DoesNotExist:
             return self.not_found('用户不存在')
+        # 一次查询返回全部可用角色，并通过 EXISTS 子查询标记该用户是否已拥有
+        roles = list(
+            Role.objects.filter(status='0', del_flag='0')
+            .annotate(flag=Exists(UserRole.objects.filter(user_id=user.id, role_id=OuterRef('role_id'))))
+        )
+        roles_data = RoleSerializer(roles, many=True).data
+        for role, role_data in zip(roles, roles_data):
+            role_data['flag'] = role.flag
+        return self.data({'user': UserSerializer(user).data, 'roles': roles_data})
     
     @action(detail=False, methods=['put'], url_path=r'authRole')
     @audit_log
@@ -164,16 +190,25 @@ class UserViewSet(BaseViewSet):
         v = AuthRoleAssignSerializer(data=request.data)
         v.is_valid(raise_exception=True)
         user_id = v.validated_data['userId']
-        role_ids = v.validated_data.get('roleIds', [])
+        role_ids = set(v.validated_data.get('roleIds', []))
         try:
             user = User.objects.get(id=user_id)
-            UserRole.objects.filter(user=user).delete()
-            for role_id in role_ids:
-                try:
-                    role = Role.objects.get(role_id=role_id)
-                    UserRole.objects.create(user=user, role=role)
-                except Role.DoesNotExist:
-                    continue
-            return self.ok('授权成功')
         except User.DoesNotExist:
             return self.not_found('用户不存在')
+        username = getattr(request.user, 'username', '') or ''
+        with transaction.atomic():
+            # 仅保留实际存在的角色，再与当前授权求差集：新增的批量插入，移除的单条 DELETE ... IN
+            wanted = set(Role.objects.filter(role_id__in=role_ids).values_list('role_id', flat=True)) if role_ids else set()
+            current = set(UserRole.objects.filter(user_id=user.id).values_list('role_id', flat=True))
+            removed = current - wanted
+            added = wanted - current
+            if removed:
+                UserRole.objects.filter(user_id=user.id, role_id__in=removed).delete()
+            if added:
+                UserRole.objects.bulk_create(
+                    [UserRole(user_id=user.id, role_id=rid, create_by=username, update_by=username) for rid in added],
+                    ignore_conflicts=True,
+                )
+            if removed or added:
+                bump_model_version(UserRole)
+        return self.ok('授权成功')